@@ -0,0 +1,384 @@
+# -*- coding: utf-8 -*-
+# file: api_metrics.py
+"""
+Contabilidad de llamadas a Google Sheets / Drive.
+
+SheetsManager envuelve su spreadsheet y su servicio Drive con los proxies de
+este módulo, así TODA llamada (incluidas las de HostLock, que usa los mismos
+worksheets) pasa por un único punto instrumentado que registra, por operación:
+lecturas, escrituras, errores, 429, bytes aproximados y un histograma de
+latencia. _gspread_call suma reintentos, hits de cache y rechazos por cooldown.
+Los proxies de Sheets además toman un token del RateLimiter compartido antes
+de cada llamada (ver rate_limiter.py).
+
+    sheets.get_api_metrics()        → dict con totales y detalle por operación
+    sheets.api_metrics_summary()    → una línea para logs / /status
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+try:
+    from logger_config import get_logger
+    logger = get_logger(__name__)
+except ImportError:
+    logger = logging.getLogger("ApiMetrics")
+
+
+# Límites superiores (ms) de cada balde del histograma; el último es +inf.
+LATENCY_BUCKETS_MS: Tuple[float, ...] = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Métodos de gspread.Worksheet que son llamadas a la API.
+WORKSHEET_READ_METHODS = frozenset({
+    "get_all_values", "get_all_records", "get", "batch_get", "row_values",
+    "col_values", "cell", "acell", "find", "findall", "get_values",
+})
+WORKSHEET_WRITE_METHODS = frozenset({
+    "append_row", "append_rows", "update_cell", "update", "batch_update",
+    "insert_row", "insert_rows", "delete_rows", "clear", "format", "update_acell",
+    "batch_clear", "resize", "add_rows",
+})
+DRIVE_WRITE_METHODS = frozenset({"create", "update", "delete", "copy"})
+
+_OP_SUFFIX = re.compile(r"\[\d+\]$")
+
+
+def is_quota_error(exc: BaseException) -> bool:
+    msg = str(exc) or ""
+    if "429" in msg or "RESOURCE_EXHAUSTED" in msg:
+        return True
+    if "Read requests" in msg and "per minute" in msg:
+        return True
+    resp = getattr(exc, "response", None)
+    return getattr(resp, "status_code", None) == 429
+
+
+def estimate_bytes(value: Any, _depth: int = 0) -> int:
+    """Tamaño aproximado del payload (texto de celdas / bytes de archivos)."""
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, (int, float, bool)):
+        return 8
+    if _depth > 4:
+        return 0
+    if isinstance(value, dict):
+        return sum(len(str(k)) + estimate_bytes(v, _depth + 1) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_bytes(v, _depth + 1) for v in value)
+    return 0
+
+
+class _OpStats:
+    __slots__ = ("calls", "reads", "writes", "errors", "quota_errors", "retries",
+                 "cache_hits", "coalesced", "cooldown_blocks", "bytes", "latency_sum_ms",
+                 "latency_max_ms", "histogram")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.reads = 0
+        self.writes = 0
+        self.errors = 0
+        self.quota_errors = 0
+        self.retries = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.cooldown_blocks = 0
+        self.bytes = 0
+        self.latency_sum_ms = 0.0
+        self.latency_max_ms = 0.0
+        self.histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def as_dict(self) -> Dict[str, Any]:
+        avg = self.latency_sum_ms / self.calls if self.calls else 0.0
+        hist = {f"<={int(b)}ms": n for b, n in zip(LATENCY_BUCKETS_MS, self.histogram)}
+        hist[f">{int(LATENCY_BUCKETS_MS[-1])}ms"] = self.histogram[-1]
+        return {
+            "calls": self.calls,
+            "reads": self.reads,
+            "writes": self.writes,
+            "errors": self.errors,
+            "quota_errors": self.quota_errors,
+            "retries": self.retries,
+            "cache_hits": self.cache_hits,
+            "coalesced": self.coalesced,
+            "cooldown_blocks": self.cooldown_blocks,
+            "bytes": self.bytes,
+            "latency_avg_ms": round(avg, 1),
+            "latency_max_ms": round(self.latency_max_ms, 1),
+            "latency_p95_ms": _percentile_from_hist(self.histogram, 0.95),
+            "histogram": hist,
+        }
+
+
+def _percentile_from_hist(hist: List[int], q: float) -> Optional[float]:
+    total = sum(hist)
+    if not total:
+        return None
+    target = q * total
+    acc = 0
+    for i, n in enumerate(hist):
+        acc += n
+        if acc >= target:
+            return LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else float("inf")
+    return float("inf")
+
+
+class ApiMetrics:
+    """Contadores por operación (thread-safe)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._ops: Dict[str, _OpStats] = {}
+        # (timestamp, kind) de los últimos 60 s: la cuota de Google es por minuto
+        self._recent: Deque[Tuple[float, str]] = deque()
+        self.started_at = time.time()
+
+    @staticmethod
+    def _norm(op: str) -> str:
+        return _OP_SUFFIX.sub("", op or "?")
+
+    def _get(self, op: str) -> _OpStats:
+        key = self._norm(op)
+        st = self._ops.get(key)
+        if st is None:
+            st = _OpStats()
+            self._ops[key] = st
+        return st
+
+    def record_call(self, op: str, kind: str, latency_s: float, nbytes: int = 0,
+                    error: Optional[BaseException] = None) -> None:
+        ms = latency_s * 1000.0
+        idx = len(LATENCY_BUCKETS_MS)
+        for i, b in enumerate(LATENCY_BUCKETS_MS):
+            if ms <= b:
+                idx = i
+                break
+        now = time.time()
+        with self._lock:
+            self._recent.append((now, kind))
+            while self._recent and now - self._recent[0][0] > 60.0:
+                self._recent.popleft()
+            st = self._get(op)
+            st.calls += 1
+            if kind == "write":
+                st.writes += 1
+            else:
+                st.reads += 1
+            st.bytes += nbytes
+            st.latency_sum_ms += ms
+            st.latency_max_ms = max(st.latency_max_ms, ms)
+            st.histogram[idx] += 1
+            if error is not None:
+                st.errors += 1
+                if is_quota_error(error):
+                    st.quota_errors += 1
+
+    def record_retry(self, op: str) -> None:
+        with self._lock:
+            self._get(op).retries += 1
+
+    def record_cache_hit(self, op: str) -> None:
+        with self._lock:
+            self._get(op).cache_hits += 1
+
+    def record_coalesced(self, op: str) -> None:
+        """Lectura que se ahorró esperando la misma lectura ya en vuelo (single-flight)."""
+        with self._lock:
+            self._get(op).coalesced += 1
+
+    def record_cooldown_block(self, op: str) -> None:
+        with self._lock:
+            self._get(op).cooldown_blocks += 1
+
+    @contextmanager
+    def track(self, op: str, kind: str = "read", nbytes: int = 0) -> Iterator[Dict[str, int]]:
+        """Para llamadas que no pasan por los proxies (p.ej. MediaIoBaseDownload)."""
+        info = {"bytes": nbytes}
+        t0 = time.perf_counter()
+        try:
+            yield info
+        except BaseException as e:
+            self.record_call(op, kind, time.perf_counter() - t0, info["bytes"], e)
+            raise
+        self.record_call(op, kind, time.perf_counter() - t0, info["bytes"])
+
+    def last_minute(self) -> Dict[str, int]:
+        """Lecturas/escrituras de los últimos 60 s (comparables con la cuota por minuto)."""
+        now = time.time()
+        with self._lock:
+            recent = [k for t, k in self._recent if now - t <= 60.0]
+        return {"reads": sum(1 for k in recent if k != "write"), "writes": sum(1 for k in recent if k == "write")}
+
+    def snapshot(self) -> Dict[str, Any]:
+        last_min = self.last_minute()
+        with self._lock:
+            ops = {k: v.as_dict() for k, v in self._ops.items()}
+        totals = {
+            k: sum(o[k] for o in ops.values())
+            for k in ("calls", "reads", "writes", "errors", "quota_errors",
+                      "retries", "cache_hits", "coalesced", "cooldown_blocks", "bytes")
+        }
+        elapsed_min = max((time.time() - self.started_at) / 60.0, 1e-9)
+        totals["reads_per_min"] = round(totals["reads"] / elapsed_min, 2)
+        totals["writes_per_min"] = round(totals["writes"] / elapsed_min, 2)
+        totals["reads_last_min"] = last_min["reads"]
+        totals["writes_last_min"] = last_min["writes"]
+        return {
+            "since": self.started_at,
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "totals": totals,
+            "ops": dict(sorted(ops.items(), key=lambda kv: -kv[1]["calls"])),
+        }
+
+    def summary(self, top: int = 3) -> str:
+        snap = self.snapshot()
+        t = snap["totals"]
+        top_ops = ", ".join(
+            f"{name}×{o['calls']}({o['latency_avg_ms']:.0f}ms)"
+            for name, o in list(snap["ops"].items())[:top]
+        )
+        return (
+            f"API: {t['reads']}R/{t['writes']}W "
+            f"(último min {t['reads_last_min']}R/{t['writes_last_min']}W) "
+            f"429={t['quota_errors']} err={t['errors']} retries={t['retries']} "
+            f"cache={t['cache_hits']} coalesc={t['coalesced']} {t['bytes'] / 1024:.0f}KB | top: {top_ops or '-'}"
+        )
+
+    def reset(self) -> None:
+        with self._lock:
+            self._ops.clear()
+            self._recent.clear()
+            self.started_at = time.time()
+
+
+# ============================================================================
+# PROXIES
+# ============================================================================
+
+class _Proxy:
+    """Reenvía todo al objeto envuelto; las subclases interceptan llamadas a la API."""
+
+    def __init__(self, target: Any, metrics: ApiMetrics, limiter: Any = None) -> None:
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_metrics", metrics)
+        # RateLimiter compartido (solo Sheets); None = sin limitar
+        object.__setattr__(self, "_limiter", limiter)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._target, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._target, name, value)
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} {self._target!r}>"
+
+    def _timed(self, op: str, kind: str, fn: Any, args: tuple, kwargs: dict) -> Any:
+        if self._limiter is not None:
+            self._limiter.acquire(kind)
+        t0 = time.perf_counter()
+        try:
+            res = fn(*args, **kwargs)
+        except BaseException as e:
+            self._metrics.record_call(op, kind, time.perf_counter() - t0, 0, e)
+            if self._limiter is not None and is_quota_error(e):
+                self._limiter.on_quota_error(kind)
+            raise
+        payload = res if kind == "read" else (args, kwargs.get("values"))
+        self._metrics.record_call(op, kind, time.perf_counter() - t0, estimate_bytes(payload))
+        return res
+
+
+class InstrumentedWorksheet(_Proxy):
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._target, name)
+        if name in WORKSHEET_READ_METHODS:
+            kind = "read"
+        elif name in WORKSHEET_WRITE_METHODS:
+            kind = "write"
+        else:
+            return attr
+        op = f"{getattr(self._target, 'title', '?')}:{name}"
+        return lambda *a, **k: self._timed(op, kind, attr, a, k)
+
+    @property
+    def unwrapped(self) -> Any:
+        return self._target
+
+
+class InstrumentedSpreadsheet(_Proxy):
+    def worksheets(self, *args: Any, **kwargs: Any) -> List[InstrumentedWorksheet]:
+        res = self._timed("spreadsheet:worksheets", "read", self._target.worksheets, args, kwargs)
+        return [InstrumentedWorksheet(ws, self._metrics, self._limiter) for ws in res]
+
+    def worksheet(self, *args: Any, **kwargs: Any) -> InstrumentedWorksheet:
+        ws = self._timed("spreadsheet:worksheet", "read", self._target.worksheet, args, kwargs)
+        return InstrumentedWorksheet(ws, self._metrics, self._limiter)
+
+    def values_batch_get(self, *args: Any, **kwargs: Any) -> Any:
+        return self._timed("spreadsheet:values_batch_get", "read", self._target.values_batch_get, args, kwargs)
+
+    def add_worksheet(self, *args: Any, **kwargs: Any) -> InstrumentedWorksheet:
+        ws = self._timed("spreadsheet:add_worksheet", "write", self._target.add_worksheet, args, kwargs)
+        return InstrumentedWorksheet(ws, self._metrics, self._limiter)
+
+    @property
+    def unwrapped(self) -> Any:
+        return self._target
+
+
+class _InstrumentedDriveRequest(_Proxy):
+    def __init__(self, target: Any, metrics: ApiMetrics, op: str, kind: str, nbytes: int) -> None:
+        super().__init__(target, metrics)
+        object.__setattr__(self, "_op", op)
+        object.__setattr__(self, "_kind", kind)
+        object.__setattr__(self, "_nbytes", nbytes)
+
+    def execute(self, *args: Any, **kwargs: Any) -> Any:
+        t0 = time.perf_counter()
+        try:
+            res = self._target.execute(*args, **kwargs)
+        except BaseException as e:
+            self._metrics.record_call(self._op, self._kind, time.perf_counter() - t0, 0, e)
+            raise
+        nbytes = self._nbytes if self._kind == "write" else estimate_bytes(res)
+        self._metrics.record_call(self._op, self._kind, time.perf_counter() - t0, nbytes)
+        return res
+
+
+class _InstrumentedDriveFiles(_Proxy):
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+        kind = "write" if name in DRIVE_WRITE_METHODS else "read"
+
+        def _call(*args: Any, **kwargs: Any) -> Any:
+            media = kwargs.get("media_body")
+            nbytes = 0
+            if media is not None and hasattr(media, "size"):
+                try:
+                    nbytes = int(media.size() or 0)
+                except Exception:
+                    nbytes = 0
+            return _InstrumentedDriveRequest(attr(*args, **kwargs), self._metrics, f"drive:{name}", kind, nbytes)
+
+        return _call
+
+
+class InstrumentedDrive(_Proxy):
+    def files(self, *args: Any, **kwargs: Any) -> _InstrumentedDriveFiles:
+        return _InstrumentedDriveFiles(self._target.files(*args, **kwargs), self._metrics)
+
+    @property
+    def unwrapped(self) -> Any:
+        return self._target
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+# file: async_sheets_manager.py
+"""
+Fachada async de SheetsManager para los handlers de PTB.
+
+SheetsManager es síncrono (gspread/Drive): llamarlo directo desde un handler
+async bloquea el event loop y una llamada lenta frena las actualizaciones de
+todos los grupos. AsyncSheetsManager expone la misma API pública en versión
+awaitable y corre cada llamada en un executor propio y acotado.
+
+Las operaciones que ESCRIBEN se serializan por pestaña (dos updates sobre
+STATS nunca corren a la vez); las lecturas corren en paralelo porque la
+réplica/caches internos ya tienen sus propios locks.
+
+Cada llamada va por el carril de su contexto (ver rate_limiter): los carriles
+sync y housekeeping tienen pocos workers del executor, así un job lento nunca
+ocupa los hilos que necesitan las subidas y las evaluaciones. `lane_depths()`
+expone cuántas llamadas hay encoladas por carril.
+
+Las subidas a Drive no pasan por este executor: van a la cola de
+sheets.drive_uploads y se esperan con asyncio.wrap_future.
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AsyncExitStack
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+try:
+    from rate_limiter import LANE_HOUSEKEEPING, LANE_SYNC, LANES, current_lane
+except ImportError:
+    from src.rate_limiter import LANE_HOUSEKEEPING, LANE_SYNC, LANES, current_lane
+
+try:
+    from drive_uploader import DriveQueueFull, DriveUploadResult
+except ImportError:
+    from src.drive_uploader import DriveQueueFull, DriveUploadResult
+
+try:
+    from image_renditions import make_renditions
+except ImportError:
+    from src.image_renditions import make_renditions
+
+try:
+    from logger_config import get_logger
+    logger = get_logger(__name__)
+except ImportError:
+    logger = logging.getLogger("AsyncSheetsManager")
+
+
+SHEETS_EXECUTOR_WORKERS = int(os.getenv("SHEETS_EXECUTOR_WORKERS", "4"))
+# Workers que pueden ocupar a la vez los carriles de fondo
+SHEETS_LANE_WORKERS: Dict[str, int] = {
+    LANE_SYNC: int(os.getenv("SHEETS_SYNC_LANE_WORKERS", "1")),
+    LANE_HOUSEKEEPING: int(os.getenv("SHEETS_HOUSEKEEPING_LANE_WORKERS", "1")),
+}
+
+# Con la cola de Drive llena, cada cuánto se reintenta encolar (sin bloquear el loop)
+DRIVE_QUEUE_POLL_SECONDS = float(os.getenv("DRIVE_QUEUE_POLL_SECONDS", "0.25"))
+
+# Métodos que escriben → pestañas que se serializan mientras corren.
+WRITE_METHOD_SHEETS: Dict[str, Tuple[str, ...]] = {
+    "log_raw": ("RAW_LOGS", "STATS"),
+    "register_image": ("RAW_LOGS", "STATS"),
+    "registrar_aprobacion_directa": ("RAW_LOGS", "STATS"),
+    "flush_appends": ("RAW_LOGS", "STATS"),
+    "update_telegram_refs": ("STATS",),
+    "update_telegram_refs_many": ("STATS",),
+    "update_supervisor_msg_id": ("STATS",),
+    "update_status_by_uuid": ("STATS",),
+    "mark_as_synced_rows": ("STATS",),
+    "update_evaluation_status": ("STATS",),
+    "upsert_user": ("USERS",),
+    "set_user_role": ("USERS",),
+    "upsert_group": ("GROUPS",),
+    "encolar_imagen_pendiente": ("COLA_IMAGENES",),
+    "marcar_imagen_procesada": ("COLA_IMAGENES",),
+    "limpiar_cola_imagenes": ("COLA_IMAGENES",),
+    "set_user_role_in_group": ("GROUP_ROLES", "BOT_CONTROL"),
+    "bump_roles_epoch": ("BOT_CONTROL",),
+    "register_known_user": ("KNOWN_USERS",),
+    "archive_closed_months": ("RAW_LOGS", "STATS", "BOT_CONTROL"),
+}
+
+
+class AsyncSheetsManager:
+    """
+    Envoltorio awaitable de un SheetsManager.
+
+    Uso:
+        asheets = AsyncSheetsManager(sheets)
+        estado = await asheets.get_semaforo_estado()
+        res = await asheets.update_status_by_uuid(uuid_ref, "Aprobado", sup)
+
+    Cualquier método público de SheetsManager está disponible como coroutine
+    con la misma firma. `sync` da acceso al manager síncrono subyacente.
+    """
+
+    def __init__(self, sheets_manager, max_workers: Optional[int] = None):
+        self.sync = sheets_manager
+        self.max_workers = max_workers or SHEETS_EXECUTOR_WORKERS
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="sheets",
+        )
+        self._sheet_locks: Dict[str, asyncio.Lock] = {}
+        self._lane_slots: Dict[str, asyncio.Semaphore] = {}
+        # Llamadas aceptadas que todavía no terminaron (esperando o corriendo)
+        self._lane_pending: Dict[str, int] = {lane: 0 for lane in LANES}
+        self._wrappers: Dict[str, Callable[..., Any]] = {}
+
+    # ============================================================================
+    # EJECUCIÓN
+    # ============================================================================
+
+    def _lock_for(self, sheet: str) -> asyncio.Lock:
+        lock = self._sheet_locks.get(sheet)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._sheet_locks[sheet] = lock
+        return lock
+
+    def _slots_for(self, lane: str) -> Optional[asyncio.Semaphore]:
+        limit = SHEETS_LANE_WORKERS.get(lane)
+        if not limit:
+            return None
+        slots = self._lane_slots.get(lane)
+        if slots is None:
+            slots = asyncio.Semaphore(max(1, min(limit, self.max_workers - 1)))
+            self._lane_slots[lane] = slots
+        return slots
+
+    async def run(self, fn: Callable[..., Any], *args: Any, sheets: Iterable[str] = (), **kwargs: Any) -> Any:
+        """
+        Corre `fn(*args, **kwargs)` en el executor de Sheets, tomando antes el
+        cupo del carril y los locks de `sheets` (en orden fijo para no generar
+        deadlocks). Propaga contextvars igual que asyncio.to_thread.
+        """
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        lane = ctx.run(current_lane)
+        call = functools.partial(ctx.run, fn, *args, **kwargs)
+        self._lane_pending[lane] = self._lane_pending.get(lane, 0) + 1
+        try:
+            async with AsyncExitStack() as stack:
+                slots = self._slots_for(lane)
+                if slots is not None:
+                    await stack.enter_async_context(slots)
+                for sheet in sorted(set(sheets)):
+                    await stack.enter_async_context(self._lock_for(sheet))
+                return await loop.run_in_executor(self._executor, call)
+        finally:
+            self._lane_pending[lane] -= 1
+
+    def lane_depths(self) -> Dict[str, int]:
+        """Llamadas encoladas o en curso por carril."""
+        return dict(self._lane_pending)
+
+    # ============================================================================
+    # DRIVE
+    # ============================================================================
+
+    async def _submit_drive_upload(self, file_bytes: bytes, filename: str, group_title: str, sent_at: Any) -> Any:
+        """Encola en sheets.drive_uploads; con la cola llena espera lugar sin bloquear el loop."""
+        waited = False
+        while True:
+            try:
+                return self.sync.submit_drive_upload(file_bytes, filename, group_title, sent_at, block=False)
+            except DriveQueueFull:
+                # Backpressure: se espera acá (el loop sigue atendiendo al resto)
+                if not waited:
+                    self.sync.drive_uploads.record_full_wait()
+                    logger.warning(f"⏳ Cola de subidas a Drive llena, {filename} espera lugar")
+                    waited = True
+                await asyncio.sleep(DRIVE_QUEUE_POLL_SECONDS)
+
+    async def upload_to_drive(self, file_bytes: bytes, filename: str, group_title: str, sent_at: Any = None) -> str:
+        """Encola en sheets.drive_uploads y espera el link ("" si falló)."""
+        fut = await self._submit_drive_upload(file_bytes, filename, group_title, sent_at)
+        try:
+            return await asyncio.wrap_future(fut)
+        except Exception as e:
+            logger.error(f"❌ Error subiendo a Drive: {e}")
+            return ""
+
+    async def upload_image_to_drive(self, file_bytes: bytes, filename: str, user_id: int, username: str,
+                                    group_title: str = "BOT_UPLOAD") -> DriveUploadResult:
+        """
+        Versión async de SheetsManager.upload_image_to_drive: el original se
+        encola sin bloquear el loop y la recompresión corre en un hilo mientras
+        sube; el resto (versiones solo si el original subió) es
+        SheetsManager.finish_image_upload.
+        """
+        sent_at = datetime.now()
+        original = await self._submit_drive_upload(file_bytes, filename, group_title, sent_at)
+        try:
+            renditions = await asyncio.to_thread(make_renditions, file_bytes)
+        except Exception:
+            renditions = {}
+        # Esperar el original acá: el hilo de finish_image_upload solo espera las versiones
+        await asyncio.wait([asyncio.wrap_future(original)])
+        return await asyncio.to_thread(
+            self.sync.finish_image_upload, original, renditions, filename, group_title, sent_at
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        target = getattr(self.sync, name)
+        if not callable(target):
+            return target
+
+        wrapper = self._wrappers.get(name)
+        if wrapper is None:
+            sheets = WRITE_METHOD_SHEETS.get(name, ())
+
+            @functools.wraps(target)
+            async def wrapper(*args: Any, **kwargs: Any) -> Any:
+                return await self.run(getattr(self.sync, name), *args, sheets=sheets, **kwargs)
+
+            self._wrappers[name] = wrapper
+        return wrapper
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Libera el executor (flushea antes las escrituras encoladas)."""
+        try:
+            self.sync.flush_appends()
+            self.sync.flush_deferred_writes()
+            if getattr(self.sync, "mirror", None):
+                self.sync.mirror.stop()
+        except Exception as e:
+            logger.error(f"❌ Error flusheando escrituras pendientes al cerrar: {e}")
+        self.sync.drive_uploads.shutdown(wait=wait)
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+# file: columnar_store.py
+"""
+Vista columnar (de solo lectura) de una réplica de pestaña (STATS, RAW_LOGS).
+
+En vez de una lista de dicts por fila (get_all_records / TailReplica.records),
+cada columna del esquema se guarda una sola vez:
+
+- "date": ordinales de fecha (date.toordinal) en un array('l'), 0 = sin fecha
+          válida; además el texto original (internado) para mostrar.
+- "int":  array('q'), 0 = vacío o no numérico (IDs de Telegram nunca son 0).
+- "sym":  strings internados (vendedor, estado, tipo...): pocos valores
+          distintos, se comparten entre filas y se comparan por identidad.
+- "str":  strings sin internar (UUIDs, links, comentarios).
+
+Todos los textos vienen con strip(). La tabla se arma una vez por carga o
+resincronización de la réplica (ver TailReplica.columnar) y la comparten todas
+las consultas; los appends y patches propios se aplican en el lugar.
+"""
+
+import sys
+from array import array
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Columnas que usan las consultas (las demás no se materializan)
+STATS_SCHEMA: Dict[str, str] = {
+    "FECHA": "date",
+    "HORA": "sym",
+    "VENDEDOR": "sym",
+    "GRUPO": "sym",
+    "CLIENTE": "sym",
+    "TIPO_PDV": "sym",
+    "LINK_FOTO": "str",
+    "ESTADO_AUDITORIA": "sym",
+    "COMENTARIOS": "str",
+    "UUID_REF": "str",
+    "MSG_ID_SUPERVISOR": "int",
+    "CHAT_ID_REF": "int",
+    "SYNC_TELEGRAM": "sym",
+    "LINK_WEB": "str",
+    "LINK_THUMB": "str",
+}
+
+RAW_LOGS_SCHEMA: Dict[str, str] = {
+    "UUID": "str",
+    "ID_USER": "sym",
+    "USER_NAME": "sym",
+}
+
+# Se comparan por identidad contra los valores internados de las columnas "sym"
+ESTADO_PENDIENTE = sys.intern("Pendiente")
+ESTADO_APROBADO = sys.intern("Aprobado")
+ESTADO_DESTACADO = sys.intern("Destacado")
+ESTADO_RECHAZADO = sys.intern("Rechazado")
+
+_EMPTY = sys.intern("")
+
+
+def parse_date_ordinal(s: str) -> int:
+    """'DD/MM/YYYY' → date.toordinal(); 0 si no se puede parsear."""
+    if not s:
+        return 0
+    try:
+        return datetime.strptime(s, "%d/%m/%Y").date().toordinal()
+    except ValueError:
+        return 0
+
+
+def parse_int(s: str) -> int:
+    """Acepta '123' y '123.0' (Sheets a veces devuelve floats); 0 si no es número."""
+    if not s:
+        return 0
+    try:
+        return int(s)
+    except ValueError:
+        try:
+            return int(float(s))
+        except ValueError:
+            return 0
+
+
+class ColumnarTable:
+    """
+    Uso:
+        tbl = rep.columnar()
+        estados = tbl.strs("ESTADO_AUDITORIA")
+        fechas = tbl.dates("FECHA")
+        for i in range(len(tbl)): ...        # i + 2 = fila en la hoja
+    """
+
+    def __init__(self, header: Sequence[str], rows: Iterable[Sequence[str]],
+                 schema: Dict[str, str], version: int = 0) -> None:
+        self.version = version
+        self.schema = dict(schema)
+        pos = {str(h).strip(): i for i, h in enumerate(header)}
+        self._strs: Dict[str, List[str]] = {}
+        self._ints: Dict[str, array] = {}
+        self._dates: Dict[str, array] = {}
+        self._lookups: Dict[Tuple[str, str], Dict[str, str]] = {}
+        self._derived: Dict[str, Tuple[Any, Any]] = {}
+        # listener(tabla, "set" | "append", índice) tras cada cambio en el lugar
+        self._listeners: List[Callable[["ColumnarTable", str, int], None]] = []
+
+        self._pos = {name: pos.get(name) for name in schema}
+        self.n = 0
+        rows = rows if isinstance(rows, list) else list(rows)
+        for name, kind in schema.items():
+            idx = self._pos[name]
+            # Columna por columna (list comprehension): mucho más rápido que fila por fila
+            if idx is None:
+                raw = [""] * len(rows)
+            else:
+                raw = [r[idx].strip() if idx < len(r) else "" for r in rows]
+            self._set_column(name, kind, raw)
+        self.n = len(rows)
+
+    def _set_column(self, name: str, kind: str, raw: List[str]) -> None:
+        if kind == "str":
+            self._strs[name] = raw
+            return
+        intern = sys.intern
+        vals = [intern(v) if v else _EMPTY for v in raw]
+        if kind == "int":
+            self._ints[name] = array("q", [parse_int(v) for v in vals])
+            return
+        if kind == "date":
+            # Pocas fechas distintas: se parsea cada una una sola vez
+            memo = {v: parse_date_ordinal(v) for v in set(vals)}
+            self._dates[name] = array("l", [memo[v] for v in vals])
+        self._strs[name] = vals
+
+    def _cell(self, name: str, kind: str, row: Sequence[str]) -> Any:
+        idx = self._pos[name]
+        v = row[idx].strip() if idx is not None and idx < len(row) else ""
+        if kind == "str":
+            return v
+        return sys.intern(v) if v else _EMPTY
+
+    def set_row(self, i: int, row: Sequence[str], version: int) -> None:
+        """Refleja en el lugar una fila modificada (patch de la réplica)."""
+        for name, kind in self.schema.items():
+            v = self._cell(name, kind, row)
+            if kind == "int":
+                self._ints[name][i] = parse_int(v)
+                continue
+            if kind == "date":
+                self._dates[name][i] = parse_date_ordinal(v)
+            self._strs[name][i] = v
+        self._lookups.clear()
+        self._derived.clear()
+        self.version = version
+        self._notify("set", i)
+
+    def append_row(self, row: Sequence[str], version: int) -> None:
+        """Refleja en el lugar una fila agregada al final."""
+        for name, kind in self.schema.items():
+            v = self._cell(name, kind, row)
+            if kind == "int":
+                self._ints[name].append(parse_int(v))
+                continue
+            if kind == "date":
+                self._dates[name].append(parse_date_ordinal(v))
+            self._strs[name].append(v)
+        self.n += 1
+        for (key_col, val_col), found in self._lookups.items():
+            k, v = self._strs[key_col][-1], self._strs[val_col][-1]
+            if k and v:
+                found[k] = v
+        self._derived.clear()
+        self.version = version
+        self._notify("append", self.n - 1)
+
+    def add_listener(self, fn: Callable[["ColumnarTable", str, int], None]) -> None:
+        if fn not in self._listeners:
+            self._listeners.append(fn)
+
+    def remove_listener(self, fn: Callable[["ColumnarTable", str, int], None]) -> None:
+        if fn in self._listeners:
+            self._listeners.remove(fn)
+
+    def _notify(self, event: str, i: int) -> None:
+        for fn in list(self._listeners):
+            fn(self, event, i)
+
+    def __len__(self) -> int:
+        return self.n
+
+    def strs(self, name: str) -> List[str]:
+        return self._strs[name]
+
+    def ints(self, name: str) -> array:
+        return self._ints[name]
+
+    def dates(self, name: str) -> array:
+        return self._dates[name]
+
+    def lookup(self, key_col: str, val_col: str) -> Dict[str, str]:
+        """{key: val} (la última fila gana), cacheado en la tabla."""
+        key = (key_col, val_col)
+        found = self._lookups.get(key)
+        if found is None:
+            found = {k: v for k, v in zip(self._strs[key_col], self._strs[val_col]) if k and v}
+            self._lookups[key] = found
+        return found
+
+    def derived(self, name: str, token: Any, build: Callable[[], Any]) -> Any:
+        """
+        Columna calculada (p.ej. user_id por fila cruzando con RAW_LOGS),
+        cacheada mientras `token` no cambie (p.ej. la versión de la otra tabla).
+        """
+        hit = self._derived.get(name)
+        if hit is not None and hit[0] == token:
+            return hit[1]
+        value = build()
+        self._derived[name] = (token, value)
+        return value
+
+
+def ordinal_to_date(o: int) -> Optional[date]:
+    return date.fromordinal(o) if o > 0 else None
@@ -54,10 +54,12 @@ _setup_sys_path()
 try:
     from sheets_manager import SheetsManager
     from config_manager import ConfigManager
+    from rate_limiter import LANE_SYNC, api_lane
 except Exception:
     try:
         from src.sheets_manager import SheetsManager
         from CONFIG_GLOBAL.config_manager import ConfigManager
+        from src.rate_limiter import LANE_SYNC, api_lane
     except Exception:
         SheetsManager = ConfigManager = None
 
@@ -560,7 +562,8 @@ def _resolve_image_src(
     if cached:
         return cached
 
-    link = _get(row, "LINK_FOTO", "FOTO", "URL_FOTO", d="").strip()
+    # LINK_WEB: versión liviana (si existe); si no, el original
+    link = _get(row, "LINK_WEB", "LINK_FOTO", "FOTO", "URL_FOTO", d="").strip()
 
     if not link or not link.startswith("http"):
         return ""
@@ -1127,7 +1130,9 @@ def main(page: ft.Page) -> None:
             ws = sheets._get_ws("STATS")
             if not ws:
                 return "ERROR: No STATS"
-            raw = ws.get_all_records()
+            # El dashboard refresca solo: que no le gane cuota al bot
+            with api_lane(LANE_SYNC):
+                raw = ws.get_all_records()
             if not raw:
                 return "ERROR: Empty"
             cache = _upper(raw)
@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+# file: drive_uploader.py
+"""
+Servicio de subidas a Drive: cola acotada + N hilos worker.
+
+Cada subida (carpetas + files().create) corre en un worker dedicado, con
+reintentos y backoff con jitter dentro del worker; quien la pide recibe un
+concurrent.futures.Future (en async: asyncio.wrap_future, sin ocupar el event
+loop ni los workers de Sheets).
+
+La cola tiene tope: si a las 10:00 llegan más fotos de las que Drive absorbe,
+submit() espera a que haya lugar (o levanta DriveQueueFull con block=False) y
+la presión queda visible en stats()/summary(): profundidad, esperas por cola
+llena, subidas/min y latencias.
+
+    fut = uploads.submit(lambda: subir(...), label="1234_KIOSCO.jpg", nbytes=len(data))
+    link = fut.result()
+"""
+
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+try:
+    from logger_config import get_logger
+    logger = get_logger(__name__)
+except ImportError:
+    logger = logging.getLogger("DriveUploader")
+
+
+DRIVE_UPLOAD_WORKERS = int(os.getenv("DRIVE_UPLOAD_WORKERS", "3"))
+# Subidas aceptadas que todavía no tomó ningún worker
+DRIVE_UPLOAD_QUEUE_SIZE = int(os.getenv("DRIVE_UPLOAD_QUEUE_SIZE", "50"))
+DRIVE_UPLOAD_MAX_RETRIES = int(os.getenv("DRIVE_UPLOAD_MAX_RETRIES", "3"))
+DRIVE_UPLOAD_BACKOFF_BASE = float(os.getenv("DRIVE_UPLOAD_BACKOFF_BASE", "1.0"))
+# Hasta este tamaño se sube en un solo request multipart (sin sesión resumable)
+DRIVE_MULTIPART_MAX_BYTES = int(os.getenv("DRIVE_MULTIPART_MAX_BYTES", str(5 * 1024 * 1024)))
+
+_STOP = object()
+
+
+class DriveQueueFull(RuntimeError):
+    """La cola de subidas está llena (backpressure)."""
+
+
+class DriveUploadResult:
+    """Resultado de upload_image_to_drive: original + versiones livianas (pueden faltar)."""
+
+    def __init__(self, drive_link: str, web_link: str = "", thumb_link: str = "") -> None:
+        self.drive_link = drive_link
+        self.web_link = web_link
+        self.thumb_link = thumb_link
+
+
+class _Job:
+    __slots__ = ("fn", "label", "nbytes", "future", "queued_at")
+
+    def __init__(self, fn: Callable[[], str], label: str, nbytes: int) -> None:
+        self.fn = fn
+        self.label = label
+        self.nbytes = nbytes
+        self.future: Future = Future()
+        self.queued_at = time.monotonic()
+
+
+class DriveUploadService:
+    """
+    `fn` devuelve el link (o "" si no hay nada que reintentar, p.ej. falta
+    la carpeta base) y levanta excepción si la subida falló y vale reintentar.
+    Los workers arrancan con la primera subida.
+    """
+
+    def __init__(self, workers: int = DRIVE_UPLOAD_WORKERS, queue_size: int = DRIVE_UPLOAD_QUEUE_SIZE,
+                 max_retries: int = DRIVE_UPLOAD_MAX_RETRIES,
+                 backoff_base: float = DRIVE_UPLOAD_BACKOFF_BASE) -> None:
+        self.workers = max(1, workers)
+        self.max_retries = max(1, max_retries)
+        self.backoff_base = backoff_base
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, queue_size))
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+        self._in_flight = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._retries = 0
+        self._bytes = 0
+        self._full_waits = 0
+        self._max_depth = 0
+        self._wait_s_total = 0.0
+        self._upload_s_total = 0.0
+        self._done_at: Deque[float] = deque(maxlen=1000)
+
+    # ============================================================================
+    # COLA
+    # ============================================================================
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                t = threading.Thread(target=self._worker, name=f"drive-upload-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def submit(self, fn: Callable[[], str], *, label: str = "", nbytes: int = 0,
+               block: bool = True, timeout: Optional[float] = None) -> Future:
+        """
+        Encola una subida. Con la cola llena espera hasta `timeout` (None =
+        sin límite); con block=False, o vencido el timeout, levanta DriveQueueFull.
+        """
+        if self._closed:
+            raise RuntimeError("DriveUploadService cerrado")
+        self._start()
+        job = _Job(fn, label, nbytes)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            if not block:
+                raise DriveQueueFull(f"cola de subidas llena ({self._queue.maxsize})")
+            self.record_full_wait()
+            logger.warning(f"⏳ Cola de subidas a Drive llena ({self._queue.maxsize}), esperando lugar: {label}")
+            try:
+                self._queue.put(job, timeout=timeout)
+            except queue.Full:
+                raise DriveQueueFull(f"cola de subidas llena ({self._queue.maxsize})") from None
+        with self._lock:
+            self._submitted += 1
+            self._max_depth = max(self._max_depth, self._queue.qsize())
+        return job.future
+
+    def record_full_wait(self) -> None:
+        """Una subida tuvo que esperar lugar en la cola (quien reintenta con block=False lo anota una vez)."""
+        with self._lock:
+            self._full_waits += 1
+
+    def _worker(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is _STOP:
+                return
+            if not job.future.set_running_or_notify_cancel():
+                continue
+            started = time.monotonic()
+            with self._lock:
+                self._in_flight += 1
+                self._wait_s_total += started - job.queued_at
+            link = ""
+            error: Optional[BaseException] = None
+            try:
+                link = self._run_with_retries(job)
+            except BaseException as e:  # noqa: BLE001 — se entrega al Future
+                error = e
+            finally:
+                now = time.monotonic()
+                with self._lock:
+                    self._in_flight -= 1
+                    self._upload_s_total += now - started
+                    if link:
+                        self._completed += 1
+                        self._bytes += job.nbytes
+                        self._done_at.append(now)
+                    else:
+                        self._failed += 1
+            if error is not None:
+                job.future.set_exception(error)
+            else:
+                job.future.set_result(link)
+
+    def _run_with_retries(self, job: _Job) -> str:
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                return job.fn()
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    logger.error(f"❌ Falló definitivamente la subida a Drive ({job.label}): {e}")
+                    return ""
+                # Backoff exponencial con jitter: los workers no reintentan en fila
+                wait_s = self.backoff_base * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+                with self._lock:
+                    self._retries += 1
+                logger.warning(
+                    f"⚠️ Falló subida Drive ({job.label}, intento {attempt}/{self.max_retries}): {e}. "
+                    f"Reintentando en {wait_s:.1f}s..."
+                )
+                time.sleep(wait_s)
+        return ""
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Deja terminar lo encolado y frena los workers."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            threads = list(self._threads)
+        for _ in threads:
+            self._queue.put(_STOP)
+        if wait:
+            for t in threads:
+                t.join()
+
+    # ============================================================================
+    # MÉTRICAS
+    # ============================================================================
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            finished = self._completed + self._failed
+            return {
+                "workers": self.workers,
+                "queued": self._queue.qsize(),
+                "queue_size": self._queue.maxsize,
+                "max_queued": self._max_depth,
+                "in_flight": self._in_flight,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "retries": self._retries,
+                "full_waits": self._full_waits,
+                "per_min": sum(1 for t in self._done_at if now - t <= 60),
+                "kb": round(self._bytes / 1024, 1),
+                "avg_wait_s": round(self._wait_s_total / finished, 2) if finished else 0.0,
+                "avg_upload_s": round(self._upload_s_total / finished, 2) if finished else 0.0,
+            }
+
+    def summary(self) -> str:
+        s = self.stats()
+        return (
+            f"drive cola={s['queued']}/{s['queue_size']} activas={s['in_flight']} "
+            f"{s['per_min']}/min ok={s['completed']} err={s['failed']} reint={s['retries']} "
+            f"llena={s['full_waits']} espera={s['avg_wait_s']}s subida={s['avg_upload_s']}s"
+        )
@@ -0,0 +1,708 @@
+# -*- coding: utf-8 -*-
+# file: fake_google.py
+"""
+Fake en memoria de gspread (Spreadsheet/Worksheet) y del servicio Drive v3
+para correr SheetsManager sin credenciales y medir llamadas a la API.
+
+Simula lo que importa para rendimiento:
+- latencia por llamada (base + jitter + costo por celda leída/escrita)
+- cuota por minuto de Sheets (lecturas y escrituras por separado, ventana
+  deslizante de 60 s) → error 429 igual que la API real
+- inyección aleatoria de 429
+- límites de grilla (leer más allá de row_count falla como en Sheets)
+
+Uso:
+    google = FakeGoogle(FakeGoogleConfig(latency_s=0.15))
+    google.seed_stats(5000)
+    sm = SheetsManager(storage=google.spreadsheet, drive_service=google.drive)
+    res = google.bench(sm.get_ranking_report)
+    print(res.summary())
+
+`python fake_google.py [filas...]` corre un benchmark de los métodos
+principales de SheetsManager para distintos tamaños de STATS.
+"""
+
+import logging
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from logger_config import get_logger
+    logger = get_logger(__name__)
+except ImportError:
+    logger = logging.getLogger("FakeGoogle")
+
+try:
+    from storage_backend import Cell, index_to_col, numericise, parse_a1_range, trim_values
+except ImportError:
+    from src.storage_backend import Cell, index_to_col, numericise, parse_a1_range, trim_values
+
+try:
+    from gspread.exceptions import WorksheetNotFound
+except Exception:  # gspread no instalado
+    class WorksheetNotFound(Exception):  # type: ignore
+        pass
+
+
+# ============================================================================
+# CONFIGURACIÓN / ERRORES
+# ============================================================================
+
+@dataclass
+class FakeGoogleConfig:
+    latency_s: float = 0.0
+    latency_jitter_s: float = 0.0
+    latency_per_kcell_s: float = 0.0
+    read_quota_per_min: int = 60
+    write_quota_per_min: int = 60
+    drive_quota_per_min: int = 12000
+    error_429_rate: float = 0.0
+    enforce_quota: bool = True
+    seed: Optional[int] = None
+
+
+class _FakeResponse:
+    def __init__(self, status_code: int) -> None:
+        self.status_code = status_code
+        self.status = status_code
+
+
+class FakeAPIError(Exception):
+    """Error con la forma de gspread APIError / HttpError (response.status_code)."""
+
+    def __init__(self, status_code: int, message: str) -> None:
+        super().__init__(f"APIError: [{status_code}]: {message}")
+        self.response = _FakeResponse(status_code)
+        self.code = status_code
+
+
+# ============================================================================
+# CONTABILIDAD DE LLAMADAS
+# ============================================================================
+
+@dataclass
+class ApiCall:
+    at: float
+    api: str        # "sheets" | "drive"
+    kind: str       # "read" | "write"
+    op: str
+    cells: int = 0
+    error: str = ""
+
+
+class ApiLedger:
+    """Registro de llamadas + ventanas de cuota por minuto."""
+
+    def __init__(self, config: FakeGoogleConfig) -> None:
+        self.config = config
+        self.calls: List[ApiCall] = []
+        self._windows: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+        self._rng = random.Random(config.seed)
+
+    def _quota_for(self, bucket: str) -> int:
+        return {
+            "sheets:read": self.config.read_quota_per_min,
+            "sheets:write": self.config.write_quota_per_min,
+        }.get(bucket, self.config.drive_quota_per_min)
+
+    def record(self, api: str, kind: str, op: str, cells: int = 0) -> None:
+        """Cuenta la llamada, aplica latencia y levanta 429 si corresponde."""
+        now = time.time()
+        bucket = f"{api}:{kind}" if api == "sheets" else api
+        error = ""
+        with self._lock:
+            win = self._windows.setdefault(bucket, deque())
+            while win and now - win[0] >= 60.0:
+                win.popleft()
+            win.append(now)
+            if self.config.enforce_quota and len(win) > self._quota_for(bucket):
+                error = f"Quota exceeded for quota metric '{bucket}' per minute (429 RESOURCE_EXHAUSTED)"
+            elif self.config.error_429_rate and self._rng.random() < self.config.error_429_rate:
+                error = "Injected 429 RESOURCE_EXHAUSTED"
+            self.calls.append(ApiCall(now, api, kind, op, cells, error))
+            delay = self.config.latency_s + cells / 1000.0 * self.config.latency_per_kcell_s
+            if self.config.latency_jitter_s:
+                delay += self._rng.uniform(0, self.config.latency_jitter_s)
+        if delay > 0:
+            time.sleep(delay)
+        if error:
+            raise FakeAPIError(429, error)
+
+    def counts(self, since: int = 0) -> Counter:
+        c: Counter = Counter()
+        for call in self.calls[since:]:
+            c[f"{call.api}:{call.kind}"] += 1
+            if call.error:
+                c["429"] += 1
+        return c
+
+    def by_op(self, since: int = 0) -> Counter:
+        return Counter(call.op for call in self.calls[since:])
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls.clear()
+            self._windows.clear()
+
+
+@dataclass
+class BenchResult:
+    name: str
+    wall_s: float
+    counts: Counter
+    by_op: Counter
+    result: Any = None
+    error: str = ""
+
+    @property
+    def api_calls(self) -> int:
+        return sum(v for k, v in self.counts.items() if k != "429")
+
+    def summary(self) -> str:
+        ops = ", ".join(f"{k}×{v}" for k, v in sorted(self.by_op.items()))
+        err = f" ERROR={self.error}" if self.error else ""
+        return f"{self.name}: {self.wall_s * 1000:.0f} ms, {self.api_calls} llamadas ({ops}){err}"
+
+
+# ============================================================================
+# SHEETS
+# ============================================================================
+
+class FakeWorksheet:
+    """Worksheet en memoria con la API de gspread que usa el bot."""
+
+    def __init__(self, spreadsheet: "FakeSpreadsheet", title: str, rows: int, cols: int, gid: int) -> None:
+        self._ss = spreadsheet
+        self.title = title
+        self.id = gid
+        self._data: List[List[str]] = []
+        self._rows = rows
+        self._cols = cols
+        self._lock = threading.RLock()
+
+    # --- helpers ------------------------------------------------------------
+
+    def _api(self, kind: str, op: str, cells: int = 0) -> None:
+        self._ss.ledger.record("sheets", kind, f"{self.title}:{op}", cells)
+
+    @property
+    def row_count(self) -> int:
+        return self._rows
+
+    @property
+    def col_count(self) -> int:
+        return self._cols
+
+    def _last_row(self) -> int:
+        n = len(self._data)
+        while n and not any(self._data[n - 1]):
+            n -= 1
+        return n
+
+    def _read(self, a1: str) -> List[List[str]]:
+        r1, c1, r2, c2 = parse_a1_range(a1)
+        if r1 > self._rows:
+            raise FakeAPIError(400, f"Range ({self.title}!{a1}) exceeds grid limits. Max rows: {self._rows}")
+        r2 = min(r2 or self._rows, len(self._data))
+        c2 = c2 or self._cols
+        out = []
+        for r in range(r1, r2 + 1):
+            row = self._data[r - 1]
+            out.append([row[c - 1] if c - 1 < len(row) else "" for c in range(c1, c2 + 1)])
+        return trim_values(out)
+
+    def _write(self, r1: int, c1: int, values: Sequence[Sequence[Any]]) -> int:
+        cells = 0
+        for i, row in enumerate(values):
+            r = r1 + i
+            while len(self._data) < r:
+                self._data.append([])
+            target = self._data[r - 1]
+            for j, v in enumerate(row):
+                c = c1 + j
+                while len(target) < c:
+                    target.append("")
+                target[c - 1] = "" if v is None else (("TRUE" if v else "FALSE") if isinstance(v, bool) else str(v))
+                cells += 1
+        self._rows = max(self._rows, len(self._data))
+        self._cols = max([self._cols] + [len(r) for r in self._data[r1 - 1:r1 - 1 + len(values)]])
+        return cells
+
+    def _all(self) -> List[List[str]]:
+        return trim_values([list(r) for r in self._data])
+
+    # --- lecturas -----------------------------------------------------------
+
+    def get_all_values(self, **kwargs: Any) -> List[List[str]]:
+        with self._lock:
+            vals = self._all()
+            self._api("read", "get_all_values", sum(len(r) for r in vals))
+            return vals
+
+    def get_all_records(self, head: int = 1, **kwargs: Any) -> List[Dict[str, Any]]:
+        with self._lock:
+            vals = self._all()
+            self._api("read", "get_all_records", sum(len(r) for r in vals))
+        if len(vals) < head:
+            return []
+        keys = vals[head - 1]
+        out = []
+        for row in vals[head:]:
+            row = row + [""] * (len(keys) - len(row))
+            out.append({k: numericise(row[i]) for i, k in enumerate(keys)})
+        return out
+
+    def get(self, range_name: Optional[str] = None, **kwargs: Any) -> List[List[str]]:
+        with self._lock:
+            vals = self._read(range_name) if range_name else self._all()
+            self._api("read", "get", sum(len(r) for r in vals))
+            return vals
+
+    def batch_get(self, ranges: Sequence[str], **kwargs: Any) -> List[List[List[str]]]:
+        with self._lock:
+            out = [self._read(r) for r in ranges]
+            self._api("read", "batch_get", sum(len(r) for v in out for r in v))
+            return out
+
+    def row_values(self, row: int, **kwargs: Any) -> List[str]:
+        with self._lock:
+            self._api("read", "row_values")
+            vals = trim_values([list(self._data[row - 1])]) if row <= len(self._data) else []
+            return vals[0] if vals else []
+
+    def col_values(self, col: int, **kwargs: Any) -> List[str]:
+        with self._lock:
+            out = [r[col - 1] if col - 1 < len(r) else "" for r in self._data]
+            while out and out[-1] == "":
+                out.pop()
+            self._api("read", "col_values", len(out))
+            return out
+
+    def cell(self, row: int, col: int, **kwargs: Any) -> Cell:
+        with self._lock:
+            self._api("read", "cell", 1)
+            value = ""
+            if row <= len(self._data) and col <= len(self._data[row - 1]):
+                value = self._data[row - 1][col - 1]
+            return Cell(row, col, value or None)
+
+    def acell(self, label: str, **kwargs: Any) -> Cell:
+        r1, c1, _, _ = parse_a1_range(label)
+        return self.cell(r1, c1)
+
+    def find(self, query: Any, in_row: Optional[int] = None, in_column: Optional[int] = None, **kwargs: Any) -> Optional[Cell]:
+        # gspread.find descarga toda la hoja y busca en el cliente
+        query = str(query)
+        with self._lock:
+            self._api("read", "find", sum(len(r) for r in self._data))
+            for i, row in enumerate(self._data):
+                if in_row and i + 1 != in_row:
+                    continue
+                for j, v in enumerate(row):
+                    if in_column and j + 1 != in_column:
+                        continue
+                    if v == query:
+                        return Cell(i + 1, j + 1, v)
+        return None
+
+    # --- escrituras ---------------------------------------------------------
+
+    def append_row(self, values: Sequence[Any], **kwargs: Any) -> Dict[str, Any]:
+        return self.append_rows([values], **kwargs)
+
+    def append_rows(self, values: Sequence[Sequence[Any]], **kwargs: Any) -> Dict[str, Any]:
+        with self._lock:
+            start = self._last_row() + 1
+            del self._data[start - 1:]
+            cells = self._write(start, 1, values)
+            self._api("write", "append_rows", cells)
+        end = start + len(values) - 1
+        width = max((len(r) for r in values), default=1)
+        return {"updates": {"updatedRange": f"{self.title}!A{start}:{index_to_col(width)}{end}", "updatedRows": len(values)}}
+
+    def update_cell(self, row: int, col: int, value: Any) -> None:
+        with self._lock:
+            self._write(row, col, [[value]])
+            self._api("write", "update_cell", 1)
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        a = args[0] if len(args) > 0 else None
+        b = args[1] if len(args) > 1 else None
+        if isinstance(a, str):
+            range_name, values = a, b
+        else:
+            values, range_name = a, b
+        range_name = kwargs.get("range_name", range_name) or "A1"
+        values = kwargs.get("values", values) or []
+        r1, c1, _, _ = parse_a1_range(range_name)
+        with self._lock:
+            cells = self._write(r1, c1, values)
+            self._api("write", "update", cells)
+
+    def batch_update(self, data: Sequence[Dict[str, Any]], **kwargs: Any) -> None:
+        with self._lock:
+            cells = 0
+            for item in data:
+                r1, c1, _, _ = parse_a1_range(item["range"])
+                cells += self._write(r1, c1, item.get("values") or [])
+            self._api("write", "batch_update", cells)
+
+    def insert_row(self, values: Sequence[Any], index: int = 1, **kwargs: Any) -> None:
+        with self._lock:
+            while len(self._data) < index - 1:
+                self._data.append([])
+            self._data.insert(index - 1, [])
+            self._rows += 1
+            cells = self._write(index, 1, [values])
+            self._api("write", "insert_row", cells)
+
+    def delete_rows(self, start_index: int, end_index: Optional[int] = None) -> None:
+        end_index = end_index or start_index
+        with self._lock:
+            del self._data[start_index - 1:end_index]
+            self._rows = max(1, self._rows - (end_index - start_index + 1))
+            self._api("write", "delete_rows")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data = []
+            self._api("write", "clear")
+
+    def format(self, *args: Any, **kwargs: Any) -> None:
+        self._api("write", "format")
+
+    # --- sin costo de API (para sembrar datos / inspeccionar en tests) -----
+
+    def load(self, values: Sequence[Sequence[Any]]) -> None:
+        with self._lock:
+            self._data = []
+            self._write(1, 1, values)
+
+    def snapshot(self) -> List[List[str]]:
+        with self._lock:
+            return self._all()
+
+
+class FakeSpreadsheet:
+    """Spreadsheet en memoria (interfaz de storage_backend.StorageBackend)."""
+
+    def __init__(self, ledger: Optional[ApiLedger] = None, title: str = "FAKE") -> None:
+        self.ledger = ledger or ApiLedger(FakeGoogleConfig())
+        self.title = title
+        self.id = uuid.uuid4().hex
+        self._sheets: Dict[str, FakeWorksheet] = {}
+        self._lock = threading.Lock()
+
+    def worksheets(self) -> List[FakeWorksheet]:
+        self.ledger.record("sheets", "read", "spreadsheet:fetch_metadata")
+        return list(self._sheets.values())
+
+    def worksheet(self, title: str) -> FakeWorksheet:
+        self.ledger.record("sheets", "read", f"spreadsheet:worksheet:{title}")
+        for name, ws in self._sheets.items():
+            if name == title:
+                return ws
+        raise WorksheetNotFound(title)
+
+    def add_worksheet(self, title: str, rows: int = 100, cols: int = 26, index: Optional[int] = None) -> FakeWorksheet:
+        self.ledger.record("sheets", "write", f"spreadsheet:add_worksheet:{title}")
+        with self._lock:
+            if title in self._sheets:
+                raise FakeAPIError(400, f'A sheet with the name "{title}" already exists.')
+            ws = FakeWorksheet(self, title, int(rows), int(cols), len(self._sheets) + 1)
+            self._sheets[title] = ws
+            return ws
+
+    def sheet(self, title: str) -> FakeWorksheet:
+        """Acceso directo sin contar llamadas (tests/seed)."""
+        return self._sheets[title]
+
+
+# ============================================================================
+# DRIVE
+# ============================================================================
+
+class _FakeHttpResponse(dict):
+    def __init__(self, status: int, headers: Dict[str, str]) -> None:
+        super().__init__(headers)
+        self.status = status
+
+
+class _FakeHttp:
+    """Transporte para MediaIoBaseDownload (http.request → (resp, content))."""
+
+    def __init__(self, drive: "FakeDriveService", file_id: str) -> None:
+        self._drive = drive
+        self._file_id = file_id
+
+    def request(self, uri: str, method: str = "GET", headers: Optional[Dict[str, str]] = None, **kwargs: Any):
+        content = self._drive._files[self._file_id]["_content"]
+        start, end = 0, len(content) - 1
+        rng = (headers or {}).get("range", "")
+        m = re.match(r"bytes=(\d+)-(\d+)", rng)
+        if m:
+            start, end = int(m.group(1)), min(int(m.group(2)), len(content) - 1)
+        chunk = content[start:end + 1]
+        self._drive.ledger.record("drive", "read", "files.get_media:chunk", len(chunk) // 1024)
+        return _FakeHttpResponse(206, {"content-range": f"bytes {start}-{end}/{len(content)}"}), chunk
+
+
+class _FakeRequest:
+    """Equivalente de googleapiclient.http.HttpRequest: .execute()."""
+
+    def __init__(self, drive: "FakeDriveService", op: str, kind: str, fn: Callable[[], Any],
+                 uri: str = "", http: Any = None, size_kb: int = 0) -> None:
+        self._drive = drive
+        self._op = op
+        self._kind = kind
+        self._fn = fn
+        self._size_kb = size_kb
+        self.uri = uri
+        self.http = http
+        self.headers: Dict[str, str] = {}
+
+    def execute(self, num_retries: int = 0) -> Any:
+        self._drive.ledger.record("drive", self._kind, self._op, self._size_kb)
+        return self._fn()
+
+
+class _FakeFiles:
+    def __init__(self, drive: "FakeDriveService") -> None:
+        self._drive = drive
+
+    def list(self, q: str = "", fields: str = "", pageSize: int = 100, **kwargs: Any) -> _FakeRequest:
+        return _FakeRequest(self._drive, "files.list", "read", lambda: {"files": self._drive._query(q)[:pageSize]})
+
+    def create(self, body: Optional[Dict[str, Any]] = None, media_body: Any = None, fields: str = "", **kwargs: Any) -> _FakeRequest:
+        content = b""
+        if media_body is not None:
+            if hasattr(media_body, "getbytes"):
+                content = media_body.getbytes(0, media_body.size())
+            elif hasattr(media_body, "read"):
+                content = media_body.read()
+        return _FakeRequest(
+            self._drive, "files.create", "write",
+            lambda: self._drive._create(dict(body or {}), bytes(content)),
+            size_kb=len(content) // 1024,
+        )
+
+    def get(self, fileId: str, fields: str = "", **kwargs: Any) -> _FakeRequest:
+        return _FakeRequest(self._drive, "files.get", "read", lambda: self._drive._public(self._drive._get(fileId)))
+
+    def get_media(self, fileId: str, **kwargs: Any) -> _FakeRequest:
+        self._drive._get(fileId)
+        return _FakeRequest(
+            self._drive, "files.get_media", "read",
+            lambda: self._drive._files[fileId]["_content"],
+            uri=f"https://fake.drive/files/{fileId}?alt=media",
+            http=_FakeHttp(self._drive, fileId),
+        )
+
+    def update(self, fileId: str, body: Optional[Dict[str, Any]] = None, **kwargs: Any) -> _FakeRequest:
+        def _do():
+            f = self._drive._get(fileId)
+            f.update(body or {})
+            return self._drive._public(f)
+        return _FakeRequest(self._drive, "files.update", "write", _do)
+
+    def delete(self, fileId: str, **kwargs: Any) -> _FakeRequest:
+        return _FakeRequest(self._drive, "files.delete", "write", lambda: self._drive._files.pop(fileId, None) and None)
+
+
+class FakeDriveService:
+    """Servicio Drive v3 en memoria: drive.files().list/create/get/get_media/update/delete."""
+
+    FOLDER_MIME = "application/vnd.google-apps.folder"
+
+    def __init__(self, ledger: Optional[ApiLedger] = None) -> None:
+        self.ledger = ledger or ApiLedger(FakeGoogleConfig())
+        self._files: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def files(self) -> _FakeFiles:
+        return _FakeFiles(self)
+
+    def _get(self, file_id: str) -> Dict[str, Any]:
+        f = self._files.get(file_id)
+        if f is None:
+            raise FakeAPIError(404, f"File not found: {file_id}")
+        return f
+
+    @staticmethod
+    def _public(f: Dict[str, Any]) -> Dict[str, Any]:
+        return {k: v for k, v in f.items() if not k.startswith("_")}
+
+    def _create(self, body: Dict[str, Any], content: bytes) -> Dict[str, Any]:
+        fid = uuid.uuid4().hex[:28]
+        f = {
+            "id": fid,
+            "name": body.get("name", ""),
+            "mimeType": body.get("mimeType", "image/jpeg" if content else "application/octet-stream"),
+            "parents": list(body.get("parents") or []),
+            "trashed": False,
+            "size": str(len(content)),
+            "webViewLink": f"https://drive.google.com/file/d/{fid}/view?usp=drivesdk",
+            "_content": content,
+        }
+        with self._lock:
+            self._files[fid] = f
+        return self._public(f)
+
+    def _query(self, q: str) -> List[Dict[str, Any]]:
+        """Soporta las cláusulas que arma el bot: name=, 'x' in parents, mimeType=, trashed=."""
+        def _unq(s: str) -> str:
+            return s.replace("\\'", "'").replace("\\\\", "\\")
+
+        clauses = [c.strip() for c in re.split(r"\s+and\s+", q or "") if c.strip()]
+        preds: List[Callable[[Dict[str, Any]], bool]] = []
+        for c in clauses:
+            m = re.fullmatch(r"name\s*=\s*'((?:[^'\\]|\\.)*)'", c)
+            if m:
+                name = _unq(m.group(1))
+                preds.append(lambda f, name=name: f["name"] == name)
+                continue
+            m = re.fullmatch(r"'((?:[^'\\]|\\.)*)'\s+in\s+parents", c)
+            if m:
+                parent = _unq(m.group(1))
+                preds.append(lambda f, parent=parent: parent in f["parents"])
+                continue
+            m = re.fullmatch(r"mimeType\s*(!?=)\s*'([^']*)'", c)
+            if m:
+                neg, mime = m.group(1) == "!=", m.group(2)
+                preds.append(lambda f, mime=mime, neg=neg: (f["mimeType"] == mime) != neg)
+                continue
+            m = re.fullmatch(r"trashed\s*=\s*(true|false)", c)
+            if m:
+                val = m.group(1) == "true"
+                preds.append(lambda f, val=val: f["trashed"] == val)
+                continue
+        with self._lock:
+            files = list(self._files.values())
+        return [self._public(f) for f in files if all(p(f) for p in preds)]
+
+
+# ============================================================================
+# ENTORNO COMPLETO + BENCHMARK
+# ============================================================================
+
+class FakeGoogle:
+    """Spreadsheet + Drive fake compartiendo el mismo registro de llamadas."""
+
+    def __init__(self, config: Optional[FakeGoogleConfig] = None) -> None:
+        self.config = config or FakeGoogleConfig()
+        self.ledger = ApiLedger(self.config)
+        self.spreadsheet = FakeSpreadsheet(self.ledger)
+        self.drive = FakeDriveService(self.ledger)
+        self._rng = random.Random(self.config.seed)
+
+    def _tab(self, title: str, cols: int) -> FakeWorksheet:
+        if title not in self.spreadsheet._sheets:
+            self.spreadsheet._sheets[title] = FakeWorksheet(
+                self.spreadsheet, title, 1000, cols, len(self.spreadsheet._sheets) + 1
+            )
+        return self.spreadsheet._sheets[title]
+
+    def seed_stats(self, n_rows: int, n_vendors: int = 40, n_groups: int = 8, n_clients: int = 600, days: int = 120) -> None:
+        """Llena STATS y RAW_LOGS con `n_rows` exhibiciones con distribución realista."""
+        try:
+            from sheets_manager import STATS_HEADERS
+        except ImportError:
+            from src.sheets_manager import STATS_HEADERS
+
+        raw_headers = ["UUID", "TIMESTAMP", "ID_USER", "USER_NAME", "TYPE", "FILE_ID",
+                       "URL_DRIVE", "RAW_JSON", "CLIENT_INPUT", "STATUS", "HASH", "IS_FRAUD"]
+        estados = ["Aprobado"] * 6 + ["Rechazado"] * 2 + ["Destacado", "Pendiente"]
+        tipos = ["Kiosco", "Almacén", "Supermercado", "Autoservicio"]
+        now = datetime.now()
+        stats = [list(STATS_HEADERS)]
+        raw = [raw_headers]
+        for i in range(n_rows):
+            vend = self._rng.randrange(n_vendors)
+            grp = self._rng.randrange(n_groups)
+            chat_id = -1000000000000 - grp
+            dt = now - timedelta(days=days * (n_rows - i) / max(n_rows, 1), minutes=self._rng.randrange(600))
+            uid = str(uuid.UUID(int=self._rng.getrandbits(128)))
+            link = f"https://drive.google.com/file/d/{uid[:28]}/view"
+            estado = estados[self._rng.randrange(len(estados))]
+            cliente = str(self._rng.randrange(n_clients) + 1000)
+            stats.append([
+                dt.strftime("%d/%m/%Y"), dt.strftime("%H:%M"), f"Vendedor {vend}", f"Grupo {grp}",
+                cliente, tipos[self._rng.randrange(len(tipos))], link, estado,
+                "" if estado == "Pendiente" else "Evaluado por Sup", uid, "", "", str(chat_id),
+                "" if estado == "Pendiente" else "OK",
+            ])
+            raw.append([
+                uid, dt.strftime("%d/%m/%Y %H:%M:%S"), str(500000 + vend), f"Vendedor {vend}", "Foto",
+                f"DRIVE_{int(dt.timestamp())}", link, "", cliente, "OK", "MANUAL_UPLOAD", "NO",
+            ])
+        self._tab("STATS", len(STATS_HEADERS)).load(stats)
+        self._tab("RAW_LOGS", len(raw_headers)).load(raw)
+
+    def bench(self, fn: Callable[..., Any], *args: Any, name: Optional[str] = None, **kwargs: Any) -> BenchResult:
+        """Ejecuta fn y devuelve tiempo de reloj + llamadas a la API que generó."""
+        since = len(self.ledger.calls)
+        t0 = time.perf_counter()
+        result, error = None, ""
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            error = str(e)
+        wall = time.perf_counter() - t0
+        return BenchResult(
+            name=name or getattr(fn, "__name__", "fn"),
+            wall_s=wall,
+            counts=self.ledger.counts(since),
+            by_op=self.ledger.by_op(since),
+            result=result,
+            error=error,
+        )
+
+
+def run_benchmark(sizes: Sequence[int] = (1000, 10000), latency_s: float = 0.0) -> List[BenchResult]:
+    """Mide los métodos calientes de SheetsManager contra STATS de distintos tamaños."""
+    try:
+        from sheets_manager import SheetsManager
+    except ImportError:
+        from src.sheets_manager import SheetsManager
+
+    results: List[BenchResult] = []
+    for n in sizes:
+        google = FakeGoogle(FakeGoogleConfig(latency_s=latency_s, enforce_quota=False, seed=n))
+        google.seed_stats(n)
+        sm = SheetsManager(storage=google.spreadsheet, drive_service=google.drive)
+        stats = google.spreadsheet.sheet("STATS").snapshot()
+        some_uuid = stats[len(stats) // 2][9] if len(stats) > 1 else ""
+        some_client = stats[-1][4] if len(stats) > 1 else ""
+        some_chat = int(stats[-1][12]) if len(stats) > 1 else 0
+
+        cases: List[Tuple[str, Callable[[], Any]]] = [
+            ("get_pending_evaluations", sm.get_pending_evaluations),
+            ("get_pending_evaluations (2ª)", sm.get_pending_evaluations),
+            ("get_stats_report", lambda: sm.get_stats_report(user_id=500001)),
+            ("get_ranking_report", sm.get_ranking_report),
+            ("get_client_history_in_group", lambda: sm.get_client_history_in_group(some_client, some_chat, 5)),
+            ("update_status_by_uuid", lambda: sm.update_status_by_uuid(some_uuid, "Aprobado", "Bench")),
+            ("log_raw ×5 + flush", lambda: ([sm.log_raw(1, "bench", "1", "Kiosco", "https://x", "Grupo 0", -1)
+                                              for _ in range(5)], sm.flush_appends())),
+            ("upload_image_to_drive", lambda: sm.upload_image_to_drive(b"\xff\xd8" + b"0" * 2048, "bench.jpg", 1, "bench", group_title="Grupo 0")),
+        ]
+        for label, fn in cases:
+            res = google.bench(fn, name=f"[{n}] {label}")
+            results.append(res)
+            print(res.summary())
+    return results
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    sizes = [int(a) for a in sys.argv[1:]] or [1000, 10000]
+    run_benchmark(sizes)
@@ -25,7 +25,7 @@ from telegram.ext import (
     filters,
 )
 
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple
 from pathlib import Path
 
 # --- PARCHE CRÍTICO PARA WINDOWS ---
@@ -76,9 +76,24 @@ except ImportError:
 
 # ✅ Imports robustos
 try:
-    from src.sheets_manager import SheetsManager
+    from src.sheets_manager import SheetsManager, get_config_manager
 except ImportError:
-    from sheets_manager import SheetsManager
+    from sheets_manager import SheetsManager, get_config_manager
+
+try:
+    from src.async_sheets_manager import AsyncSheetsManager
+except ImportError:
+    from async_sheets_manager import AsyncSheetsManager
+
+try:
+    from src.rate_limiter import LANE_EVALUATION, LANE_HOST, LANE_HOUSEKEEPING, LANE_SYNC, api_lane, lane_api
+except ImportError:
+    from rate_limiter import LANE_EVALUATION, LANE_HOST, LANE_HOUSEKEEPING, LANE_SYNC, api_lane, lane_api
+
+try:
+    from src.upload_journal import UploadJournal
+except ImportError:
+    from upload_journal import UploadJournal
 
 try:
     from src.anti_fraud import AntiFraudSystem
@@ -129,8 +144,10 @@ logger.info("🤖 BOT HOST INICIANDO...")
 logger.info("=" * 80)
 
 
-cfg = ConfigManager()
+cfg = get_config_manager()
 sheets = SheetsManager()
+# Fachada async: los handlers usan asheets para no bloquear el event loop
+asheets = AsyncSheetsManager(sheets)
 semaforo = SemaforoMonitor(sheets, intervalo_segundos=15)
 
 def log_and_print(message: str, level: str = "info"):
@@ -154,32 +171,77 @@ BOT_OWNER_ID = str(cfg.get_telegram_config().get("admin_id") or "").strip()
 # ============================================================================
 
 role_cache: Dict[Tuple[int, int], str] = {}  # (chat_id, user_id) -> rol
+# Índice secundario: user_id -> (chat_id, rol) de su primera asignación en
+# GROUP_ROLES (el "rol previo global" que se respeta al entrar a otro grupo)
+role_by_user: Dict[int, Tuple[int, str]] = {}
 role_cache_loaded_at: Optional[float] = None
+role_cache_epoch = 0  # época de GROUP_ROLES (BOT_CONTROL!E2) con la que se cargó
 ROLE_CACHE_TTL = 86400  # 24 horas en segundos
+ROLE_EPOCH_CHECK_SECONDS = int(os.getenv("ROLE_EPOCH_CHECK_SECONDS", "60"))
 
+_role_reload_task: Optional[asyncio.Task] = None
+# Escrituras hechas mientras corre una recarga: se re-aplican sobre los dicts nuevos
+_role_writes_during_reload: Optional[List[Tuple[int, int, str]]] = None
 
-def load_roles_cache() -> None:
-    """Carga todos los roles desde Sheets al cache en memoria."""
-    global role_cache, role_cache_loaded_at
+
+async def load_roles_cache(fresh: bool = False) -> None:
+    """
+    Carga todos los roles desde Sheets y reemplaza el cache de una vez (los
+    handlers nunca ven un cache a medio armar). Ante error conserva el cache
+    anterior.
+    """
+    global role_cache, role_by_user, role_cache_loaded_at, role_cache_epoch, _role_writes_during_reload
     
     logger.info("🔄 Cargando cache de roles desde GROUP_ROLES...")
+    _role_writes_during_reload = []
     try:
-        all_roles = sheets.get_all_group_roles()
+        # La época se lee ANTES: un cambio durante la lectura dispara otra recarga
+        epoch = await asheets.get_roles_epoch()
+        all_roles = await asheets.get_all_group_roles(fresh=fresh)
         
-        # Convertir lista a dict para búsqueda rápida
-        role_cache = {}
+        # Convertir lista a dicts para búsqueda rápida
+        new_cache: Dict[Tuple[int, int], str] = {}
+        new_by_user: Dict[int, Tuple[int, str]] = {}
         for role_info in all_roles:
             chat_id = role_info["chat_id"]
             user_id = role_info["user_id"]
             rol = role_info["rol"]
-            role_cache[(chat_id, user_id)] = rol
+            new_cache[(chat_id, user_id)] = rol
+            new_by_user.setdefault(user_id, (chat_id, rol))
+        for chat_id, user_id, rol in _role_writes_during_reload:
+            _apply_role(new_cache, new_by_user, chat_id, user_id, rol)
         
+        role_cache, role_by_user = new_cache, new_by_user
+        role_cache_epoch = epoch
         role_cache_loaded_at = time.time()
         logger.info(f"✅ Cache cargado: {len(role_cache)} asignaciones de roles")
     except Exception as e:
         logger.error(f"❌ Error cargando cache de roles: {e}")
-        role_cache = {}
         role_cache_loaded_at = time.time()
+    finally:
+        _role_writes_during_reload = None
+
+
+def _apply_role(cache: Dict[Tuple[int, int], str], by_user: Dict[int, Tuple[int, str]],
+                chat_id: int, user_id: int, rol: str) -> None:
+    cache[(chat_id, user_id)] = rol
+    prev = by_user.get(user_id)
+    if prev is None or prev[0] == chat_id:
+        by_user[user_id] = (chat_id, rol)
+
+
+def remember_role(chat_id: int, user_id: int, rol: str) -> None:
+    """Refleja en el cache (y en el índice por usuario) un rol recién guardado en GROUP_ROLES."""
+    rol = rol.lower()
+    _apply_role(role_cache, role_by_user, chat_id, user_id, rol)
+    if _role_writes_during_reload is not None:
+        _role_writes_during_reload.append((chat_id, user_id, rol))
+
+
+def existing_role_for_user(user_id: int) -> Optional[str]:
+    """Rol previo del usuario en cualquier grupo (sin I/O); None si no tiene ninguno."""
+    entry = role_by_user.get(user_id)
+    return entry[1] if entry else None
 
 
 def should_reload_role_cache() -> bool:
@@ -190,10 +252,24 @@ def should_reload_role_cache() -> bool:
     return elapsed >= ROLE_CACHE_TTL
 
 
-def get_cached_role(chat_id: int, user_id: int) -> str:
+@lane_api(LANE_SYNC)
+async def _reload_roles_background() -> None:
+    await load_roles_cache(fresh=True)
+
+
+def schedule_roles_reload(reason: str) -> None:
+    """Recarga completa en segundo plano (una a la vez); mientras tanto se sirve el cache actual."""
+    global _role_reload_task
+    if _role_reload_task is not None and not _role_reload_task.done():
+        return
+    logger.info(f"🔄 Recarga de roles en segundo plano ({reason})")
+    _role_reload_task = asyncio.get_running_loop().create_task(_reload_roles_background())
+
+
+async def get_cached_role(chat_id: int, user_id: int) -> str:
     """
     Obtiene el rol de un usuario desde el cache en memoria.
-    Si el cache expiró, lo recarga automáticamente.
+    Si el cache expiró, lo recarga en segundo plano (sin demorar al handler).
     Incluye fallback global: si no tiene rol en este grupo,
     busca rol previo en cualquier otro grupo del sistema.
 
@@ -204,32 +280,38 @@ def get_cached_role(chat_id: int, user_id: int) -> str:
     if str(user_id) == BOT_OWNER_ID:
         return "supervisor"  # Superusuario actúa como supervisor global
 
-    if should_reload_role_cache():
-        load_roles_cache()
+    if role_cache_loaded_at is None:
+        await load_roles_cache(fresh=True)
+    elif should_reload_role_cache():
+        schedule_roles_reload("cache de 24hs vencido")
 
     # 1. Buscar en cache del grupo específico (igual que antes)
     cached = role_cache.get((chat_id, user_id))
     if cached:
         return cached
 
-    # 2. Fallback: consultar rol previo global
-    #    sin I/O adicional, usa cache en memoria de get_all_group_roles()
-    try:
-        existing = sheets.get_existing_role_for_user(user_id)
-        if existing is not None:
-            return existing
-    except Exception:
-        pass
+    # 2. Fallback: rol previo global (índice por user_id, sin I/O)
+    existing = existing_role_for_user(user_id)
+    if existing is not None:
+        return existing
 
     # 3. Default final: sin rol previo = observador
     return "observador"
 
 
-def invalidate_role_cache() -> None:
-    """Invalida el cache forzando recarga en próxima consulta."""
-    global role_cache_loaded_at
-    logger.info("🔄 Cache de roles invalidado - se recargará en próxima consulta")
-    role_cache_loaded_at = None
+@lane_api(LANE_HOUSEKEEPING)
+async def check_roles_epoch_job(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Recarga el cache de roles si otro proceso (u otra instancia) escribió GROUP_ROLES."""
+    if role_cache_loaded_at is None:
+        return
+    try:
+        epoch = await asheets.get_roles_epoch()
+    except Exception:
+        return
+    if epoch > role_cache_epoch:
+        schedule_roles_reload(f"época {role_cache_epoch} → {epoch}")
+    elif should_reload_role_cache():
+        schedule_roles_reload("cache de 24hs vencido")
 
 
 # ============================================================================
@@ -246,6 +328,7 @@ def is_hibernation_time() -> bool:
     return hour >= 22 or hour < 6
 
 
+@lane_api(LANE_HOUSEKEEPING)
 async def take_hibernation_snapshot(context: ContextTypes.DEFAULT_TYPE) -> None:
     """Toma snapshot de datos antes de hibernar (para /stats y /ranking)."""
     global hibernation_snapshot
@@ -254,7 +337,7 @@ async def take_hibernation_snapshot(context: ContextTypes.DEFAULT_TYPE) -> None:
     
     try:
         # Cargar ranking y dejarlo en memoria
-        ranking = sheets.get_ranking_report()
+        ranking = await asheets.get_ranking_report()
         
         hibernation_snapshot = {
             "timestamp": datetime.now(AR_TZ).strftime("%d/%m/%Y %H:%M:%S"),
@@ -323,8 +406,8 @@ async def handle_hibernation_end(context: ContextTypes.DEFAULT_TYPE) -> None:
     hibernation_snapshot = {}
     logger.info("☀️ ======== HIBERNACIÓN FINALIZADA (06:00) ========")
     
-    # Forzar recarga de cache de roles
-    invalidate_role_cache()
+    # Recargar cache de roles (en segundo plano; mientras tanto sirve el actual)
+    schedule_roles_reload("fin de hibernación")
     
     # Notificar superusuario
     try:
@@ -343,7 +426,7 @@ async def handle_hibernation_end(context: ContextTypes.DEFAULT_TYPE) -> None:
 # REGISTRO AUTOMÁTICO DE KNOWN USERS
 # ============================================================================
 
-def register_user_interaction(chat_id: int, user_id: int, username: str, full_name: str) -> None:
+async def register_user_interaction(chat_id: int, user_id: int, username: str, full_name: str) -> None:
     """
     Registra que un usuario interactuó en un grupo (auto-registro en KNOWN_USERS).
     Llamar en TODOS los handlers de mensajes, fotos, y comandos.
@@ -360,7 +443,7 @@ def register_user_interaction(chat_id: int, user_id: int, username: str, full_na
     
     try:
         # Registrar en KNOWN_USERS (actualiza LAST_SEEN si ya existe)
-        sheets.register_known_user(
+        await asheets.register_known_user(
             chat_id=chat_id,
             user_id=user_id,
             username=username or "",
@@ -382,8 +465,9 @@ async def post_init_extensions(application: Application) -> None:
     """
     logger.info("🔧 Inicializando extensiones del bot...")
     
-    # 1. Cargar cache de roles
-    load_roles_cache()
+    # 1. Cargar cache de roles (lectura real: la época se lee fresca y lo que
+    #    haya quedado en la cache de disco puede ser de antes de un cambio)
+    await load_roles_cache(fresh=True)
     
     # 2. Verificar si estamos en horario de hibernación al iniciar
     if is_hibernation_time():
@@ -503,6 +587,11 @@ async def host_event_callback(event_type: str, message: str):
 
 
 upload_sessions: Dict[int, Dict[str, Any]] = {}
+# Cada paso de las sesiones queda en disco: tras un crash se retoman al arrancar
+upload_journal = UploadJournal()
+# Descargas de Telegram simultáneas (entre todas las ráfagas en curso)
+TELEGRAM_DOWNLOAD_CONCURRENCY = int(os.getenv("TELEGRAM_DOWNLOAD_CONCURRENCY", "4"))
+_telegram_downloads = asyncio.Semaphore(TELEGRAM_DOWNLOAD_CONCURRENCY)
 active_transactions: Dict[int, Dict[str, Any]] = {}
 
 STAGE_WAITING_ID = "WAITING_ID"
@@ -520,8 +609,8 @@ async def get_pos_types_cached(*, force: bool = False) -> List[str]:
     Devuelve la lista de tipos de PDV, cacheada por TTL.
 
     Motivo:
-        sheets.get_pos_types() es síncrono (Google Sheets) y puede demorar varios segundos.
-        En handlers async (PTB), eso bloquea el event loop y provoca timeouts HTTP hacia Telegram.
+        get_pos_types() lee Google Sheets y puede demorar varios segundos; aunque corre
+        en el executor de asheets, no tiene sentido repetirlo en cada foto.
     """
     now = time.time()
     cached: List[str] = _pos_types_cache.get("types") or []
@@ -535,7 +624,7 @@ async def get_pos_types_cached(*, force: bool = False) -> List[str]:
             return cached
 
         try:
-            tipos: List[str] = await asyncio.to_thread(sheets.get_pos_types)
+            tipos: List[str] = await asheets.get_pos_types()
         except Exception as e:
             logger.error(f"❌ Error refrescando tipos de PDV: {e}", exc_info=True)
             return cached
@@ -547,6 +636,7 @@ async def get_pos_types_cached(*, force: bool = False) -> List[str]:
 
         return cached
 
+@lane_api(LANE_HOUSEKEEPING)
 async def refresh_pos_types_job(context: ContextTypes.DEFAULT_TYPE) -> None:
     # Warm-up / refresh periódico
     await get_pos_types_cached(force=True)
@@ -625,7 +715,7 @@ async def cmd_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     user_id = update.message.from_user.id
     username = update.message.from_user.username or ""
     full_name = update.message.from_user.first_name or "Usuario"
-    register_user_interaction(chat_id, user_id, username, full_name)
+    await register_user_interaction(chat_id, user_id, username, full_name)
     
     await update.message.reply_text(
         "¡Hola! Soy el bot de auditoría de PDV.\n"
@@ -715,7 +805,7 @@ async def cmd_mirol(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     
     try:
         # Obtener todos los roles (puede retornar [] si la hoja está vacía)
-        all_roles = sheets.get_all_group_roles()
+        all_roles = await asheets.get_all_group_roles()
         
         # Caso especial: Si no hay NINGÚN rol en el sistema
         if not all_roles:
@@ -855,6 +945,40 @@ async def cmd_status(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None
         f"   • Rechazadas: {session_stats['rechazadas']}"
     )
     
+    if is_su:
+        api = sheets.get_api_metrics()
+        tot = api["totals"]
+        top_ops = list(api["ops"].items())[:5]
+        msg += (
+            f"\n\n📈 <b>API Google ({api['backend']}):</b>\n"
+            f"   • Lecturas: {tot['reads']} (último min: {tot['reads_last_min']})\n"
+            f"   • Escrituras: {tot['writes']} (último min: {tot['writes_last_min']})\n"
+            f"   • 429: {tot['quota_errors']} | Errores: {tot['errors']} | Reintentos: {tot['retries']}\n"
+            f"   • Cache hits: {tot['cache_hits']} | {tot['bytes'] / 1024:.0f} KB"
+        )
+        if api["quota_cooldown_remaining_s"] > 0:
+            msg += f"\n   • ⏳ Cooldown: {api['quota_cooldown_remaining_s']:.0f}s"
+        for name, o in top_ops:
+            msg += f"\n   · <code>{name}</code> ×{o['calls']} ~{o['latency_avg_ms']:.0f}ms (p95≤{o['latency_p95_ms']}ms)"
+        lanes = api.get("rate_limiter", {}).get("lanes", {})
+        depths = asheets.lane_depths()
+        if lanes:
+            msg += "\n\n🚦 <b>Carriles</b> (cola / ok / diferidas / descartadas):"
+            for lane, st in lanes.items():
+                msg += (
+                    f"\n   • {lane}: {depths.get(lane, 0) + st.get('waiting', 0)} / {st.get('admitted', 0)}"
+                    f" / {st.get('deferred', 0)} / {st.get('dropped', 0)}"
+                )
+        up = api.get("drive_uploads")
+        if up:
+            msg += (
+                f"\n\n☁️ <b>Subidas Drive:</b> cola {up['queued']}/{up['queue_size']}"
+                f" (máx {up['max_queued']}) · activas {up['in_flight']} · {up['per_min']}/min\n"
+                f"   • OK: {up['completed']} | Fallidas: {up['failed']} | Reintentos: {up['retries']}"
+                f" | Cola llena: {up['full_waits']}\n"
+                f"   • Espera media {up['avg_wait_s']}s | subida media {up['avg_upload_s']}s"
+            )
+
     await update.message.reply_text(msg, parse_mode=ParseMode.HTML)
 
 async def cmd_id(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -876,7 +1000,7 @@ async def cmd_stats(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     uid = update.message.from_user.id
     username = update.message.from_user.username or ""
     full_name = update.message.from_user.first_name or "Usuario"
-    register_user_interaction(chat_id, uid, username, full_name)
+    await register_user_interaction(chat_id, uid, username, full_name)
     
     # Durante hibernación, usar snapshot si está disponible
     if bot_hibernating and hibernation_snapshot and uid in hibernation_snapshot.get("stats_cache", {}):
@@ -890,7 +1014,7 @@ async def cmd_stats(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     
     # Modo normal o primera consulta en hibernación
     try:
-        report = sheets.get_stats_report(user_id=uid)
+        report = await asheets.get_stats_report(user_id=uid)
         hist = report["historico"]
         mes = report["ultimo_mes"]
         
@@ -924,7 +1048,8 @@ async def cmd_reset(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         await update.message.reply_text("❌ Solo el superusuario puede ejecutar /reset")
         return
     
-    upload_sessions.clear()
+    for session_user_id in list(upload_sessions):
+        _drop_session(session_user_id)
     active_transactions.clear()
     active_last_prompt.clear()
     
@@ -945,6 +1070,13 @@ async def cmd_hardreset(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         logger.info("Liberando host antes de reiniciar...")
         host_lock.release_host()
     
+    # os._exit no corre los timers de flush: escribir lo encolado antes
+    try:
+        await asyncio.to_thread(asheets.shutdown)
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudieron flushear escrituras pendientes: {e}")
+    await asyncio.to_thread(upload_journal.close)
+    
     await asyncio.sleep(1)
     os._exit(0)
 
@@ -985,7 +1117,7 @@ async def cmd_ranking(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
     user_id = update.message.from_user.id
     username = update.message.from_user.username or ""
     full_name = update.message.from_user.first_name or "Usuario"
-    register_user_interaction(chat_id, user_id, username, full_name)
+    await register_user_interaction(chat_id, user_id, username, full_name)
     
     # Durante hibernación, usar snapshot
     if bot_hibernating and hibernation_snapshot:
@@ -1000,7 +1132,7 @@ async def cmd_ranking(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
     else:
         # Modo normal
         try:
-            ranking = sheets.get_ranking_report()
+            ranking = await asheets.get_ranking_report()
         except Exception as e:
             logger.error(f"Error en cmd_ranking: {e}")
             await update.message.reply_text("❌ Error al obtener ranking")
@@ -1064,7 +1196,7 @@ async def cmd_set_role(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     supervisor_name = update.message.from_user.first_name or "Superusuario"
 
     try:
-        success = sheets.set_user_role_in_group(
+        success = await asheets.set_user_role_in_group(
             chat_id=chat_id,
             user_id=target_id,
             username=target_username,
@@ -1075,8 +1207,7 @@ async def cmd_set_role(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
 
         if success:
             # Actualizar cache local inmediatamente
-            role_cache[(chat_id, target_id)] = role
-            invalidate_role_cache()
+            remember_role(chat_id, target_id, role)
 
             emoji = {"vendedor": "🛒", "supervisor": "👁️", "observador": "📋"}.get(role, "❓")
             await update.message.reply_text(
@@ -1156,7 +1287,7 @@ async def cmd_setall_rol(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     
     try:
         # Obtener usuarios conocidos del grupo
-        known_users = sheets.get_known_users_in_group(chat_id)
+        known_users = await asheets.get_known_users_in_group(chat_id)
         
         if not known_users or len(known_users) == 0:
             await update.message.reply_text(
@@ -1175,7 +1306,7 @@ async def cmd_setall_rol(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             return
         
         # Obtener roles actuales (puede ser [] si la hoja está vacía)
-        all_roles = sheets.get_all_group_roles()
+        all_roles = await asheets.get_all_group_roles()
         roles_map = {}
         
         if all_roles:
@@ -1463,22 +1594,28 @@ async def save_role_changes(
     success_count = 0
     for change in changes:
         try:
-            result = sheets.set_user_role_in_group(
+            result = await asheets.set_user_role_in_group(
                 chat_id=chat_id,
                 user_id=change["user_id"],
                 username=change["username"],
                 full_name=change["full_name"],
                 rol=change["new_rol"],
-                asignado_por=supervisor_name
+                asignado_por=supervisor_name,
+                bump_epoch=False
             )
             
             if result:
                 success_count += 1
+                remember_role(chat_id, change["user_id"], change["new_rol"])
         except Exception as e:
             logger.error(f"Error guardando rol: {e}")
     
-    # Invalidar cache de roles (forzar recarga)
-    invalidate_role_cache()
+    # El cache ya quedó actualizado en el lugar; se publica la época una sola vez
+    if success_count:
+        try:
+            await asheets.bump_roles_epoch()
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo publicar la época de roles: {e}")
     
     # Mensaje final
     msg_text = (
@@ -1652,6 +1789,11 @@ async def cmd_test_horarios(update: Update, context: ContextTypes.DEFAULT_TYPE)
 # =============================================================================
 TIMEOUT_WAITING_ID_SECONDS = 600   # 10 min para enviar nro_cliente
 TIMEOUT_WAITING_TYPE_SECONDS = 300  # 5 min para elegir tipo PDV
+# Sesión con fotos sin registrar: se reintenta (espera creciente); agotados los
+# intentos queda en el journal y se retoma en el próximo arranque
+UPLOAD_SESSION_RETRY_SECONDS = float(os.getenv("UPLOAD_SESSION_RETRY_SECONDS", "60"))
+UPLOAD_SESSION_MAX_RETRIES = int(os.getenv("UPLOAD_SESSION_MAX_RETRIES", "3"))
+_session_retry_tasks: Set[asyncio.Task] = set()
 
 
 def _cancel_session_timeout(session: dict) -> None:
@@ -1662,75 +1804,146 @@ def _cancel_session_timeout(session: dict) -> None:
         session["timeout_job"] = None
 
 
+def _drop_session(user_id: int) -> None:
+    """Saca la sesión de upload_sessions (timeout incluido) y la cierra en el journal."""
+    session = upload_sessions.pop(user_id, None)
+    if not session:
+        return
+    _cancel_session_timeout(session)
+    upload_journal.finish(session.get("journal_id"), "closed")
+
+
+async def _store_session_photo(bot, user_id: int, session: dict, index: int) -> Optional[Dict[str, Any]]:
+    """
+    Una foto de la ráfaga: descarga de Telegram → Drive (pool de subidas) →
+    filas en RAW_LOGS/STATS. Devuelve la referencia recién cuando las filas
+    quedaron escritas en Sheets, o None si algún paso falló.
+
+    Cada paso queda en el journal; una sesión retomada tras un reinicio salta
+    los pasos ya hechos (no vuelve a subir a Drive ni duplica la fila).
+    """
+    photo_data = session["photos"][index]
+    journal_id = session.get("journal_id")
+    nro_cliente = session["nro_cliente"]
+    uploader_name = session.get("vendor_name", "Usuario")
+    group_title = session.get("chat_title") or str(session["chat_id"])
+    clean_code = "".join(c for c in session["tipo_pdv"] if c.isalnum()).upper()
+    suffix = f"_{index + 1}" if len(session["photos"]) > 1 else ""
+
+    try:
+        drive_link = photo_data.get("drive_link")
+        if not drive_link:
+            file_bytes = await asyncio.to_thread(upload_journal.read_spool, photo_data.get("spool_path", ""))
+            if file_bytes is None:
+                async with _telegram_downloads:
+                    file = await bot.get_file(photo_data["file_id"])
+                    file_bytes = bytes(await file.download_as_bytearray())
+                photo_data["spool_path"] = await asyncio.to_thread(
+                    upload_journal.spool, journal_id, index, file_bytes
+                )
+
+            result = await asheets.upload_image_to_drive(
+                file_bytes=file_bytes,
+                filename=f"{nro_cliente}_{clean_code}_{int(time.time())}{suffix}.jpg",
+                user_id=user_id,
+                username=uploader_name
+                , group_title=group_title
+            )
+            if not (result and result.drive_link):
+                return None
+            drive_link = photo_data["drive_link"] = result.drive_link
+            photo_data["web_link"] = result.web_link
+            photo_data["thumb_link"] = result.thumb_link
+            upload_journal.record(
+                journal_id, "drive", idx=index, link=drive_link,
+                web=result.web_link, thumb=result.thumb_link,
+            )
+            upload_journal.discard_spool(photo_data.pop("spool_path", ""))
+
+        # El UUID se anota ANTES de encolar la fila: si el proceso muere en el
+        # medio, al retomar se consulta STATS en vez de escribirla de nuevo
+        uuid_ref = photo_data.get("uuid")
+        if not (uuid_ref and await asheets.stats_row_exists(uuid_ref)):
+            uuid_ref = uuid_ref or sheets.get_next_id()
+            upload_journal.record(journal_id, "row", idx=index, uuid=uuid_ref)
+            uuid_ref = await asheets.log_raw(
+                user_id=user_id,
+                username=uploader_name,
+                nro_cliente=nro_cliente,
+                tipo_pdv=session["tipo_pdv"],
+                drive_link=drive_link
+                , group_title=group_title
+                , chat_id=session["chat_id"]
+                , uuid_ref=uuid_ref
+                , web_link=photo_data.get("web_link", "")
+                , thumb_link=photo_data.get("thumb_link", "")
+            )
+            if not uuid_ref:
+                return None
+        photo_data["uuid"] = uuid_ref
+        # Guardada = filas escritas (no solo encoladas): si el append falla, el
+        # supervisor no recibe botones que apunten a una fila inexistente
+        if not await asheets.wait_for_append(uuid_ref):
+            logger.error(f"❌ Filas de {uuid_ref[:8]} no registradas en Sheets")
+            return None
+        return {
+            "uuid": uuid_ref,
+            "message_id": photo_data["message_id"],
+            "drive_link": drive_link
+        }
+    except Exception as e:
+        logger.error(f"Error procesando subida inmediata: {e}")
+        return None
+
+
 async def _process_upload_session(bot, user_id: int, session: dict) -> bool:
     """
     Procesa la subida de una sesión completa: descarga fotos de Telegram,
     sube a Drive, registra en Sheets, y envía el mensaje de evaluación.
-    Limpia la sesión de upload_sessions al finalizar.
+    La sesión sale de upload_sessions al empezar (una foto nueva del vendedor
+    abre otra sesión sin pisar esta) y se cierra en el journal al terminar.
     Returns True si se procesaron fotos correctamente.
+
+    Las fotos avanzan en paralelo (descargas concurrentes, subidas acotadas
+    por DRIVE_UPLOAD_WORKERS, filas por la cola de appends). El mensaje de
+    evaluación sale apenas queda guardada la primera foto (en orden) y el
+    resto se le asocia al terminar.
     """
     tipo_pdv_display = session["tipo_pdv"]
     nro_cliente = session["nro_cliente"]
     photos = session["photos"]
     chat_id = session["chat_id"]
     uploader_name = session.get("vendor_name", "Usuario")
-    group_title = session.get("chat_title") or str(chat_id)
-
-    clean_code = "".join(c for c in tipo_pdv_display if c.isalnum()).upper()
-
-    procesadas_count = 0
-    referencias_subidas = []
+    journal_id = session.get("journal_id")
+    # Sesión retomada del journal cuyo mensaje de evaluación ya había salido
+    eval_msg = session.get("eval_msg")
 
-    for photo_data in photos:
-        file_id = photo_data["file_id"]
-        message_id = photo_data["message_id"]
-
-        try:
-            file = await bot.get_file(file_id)
-            file_bytes = await file.download_as_bytearray()
-
-            result = sheets.upload_image_to_drive(
-                file_bytes=bytes(file_bytes),
-                filename=f"{nro_cliente}_{clean_code}_{int(time.time())}.jpg",
-                user_id=user_id,
-                username=uploader_name
-                , group_title=group_title
-            )
+    if upload_sessions.get(user_id) is session:
+        del upload_sessions[user_id]
+    upload_journal.record(journal_id, "processing", tipo_pdv=tipo_pdv_display)
 
-            if result and result.drive_link:
-                uuid_ref = sheets.log_raw(
-                    user_id=user_id,
-                    username=uploader_name,
-                    nro_cliente=nro_cliente,
-                    tipo_pdv=tipo_pdv_display,
-                    drive_link=result.drive_link
-                    , group_title=group_title
-                    , chat_id=chat_id
-                )
+    tasks = [
+        asyncio.create_task(_store_session_photo(bot, user_id, session, i))
+        for i in range(len(photos))
+    ]
 
-                if uuid_ref:
-                    referencias_subidas.append({
-                        "uuid": uuid_ref,
-                        "message_id": message_id,
-                        "drive_link": result.drive_link
-                    })
-                    procesadas_count += 1
-        except Exception as e:
-            logger.error(f"Error procesando subida inmediata: {e}")
+    # La primera foto guardada (en orden) ancla los botones de evaluación
+    primera_ref = None
+    sent_msg_id = None
+    if eval_msg:
+        primera_ref = {"uuid": eval_msg["uuid"], "message_id": eval_msg["ref_msg"]}
+        sent_msg_id = eval_msg["message_id"]
+    else:
+        for task in tasks:
+            primera_ref = await task
+            if primera_ref:
+                break
 
-    if procesadas_count > 0:
+    if primera_ref and sent_msg_id is None:
         try:
-            primera_ref = referencias_subidas[0]
-
-            if procesadas_count > 1:
-                fotos_text = f"📸 <b>{procesadas_count} fotos subidas</b>\n\n"
-            else:
-                fotos_text = ""
-
             historial = []
             try:
-                historial = await asyncio.to_thread(
-                    sheets.get_client_history_in_group,
+                historial = await asheets.get_client_history_in_group(
                     nro_cliente,
                     chat_id,
                     5
@@ -1770,33 +1983,62 @@ async def _process_upload_session(bot, user_id: int, session: dict) -> bool:
 
             reply_markup = InlineKeyboardMarkup(keyboard)
 
-            msg_text = (
-                f"📋 <b>Nueva exhibición</b>\n\n"
-                f"{fotos_text}"
-                f"👤 <b>Vendedor:</b> {uploader_name}\n"
-                f"🏪 <b>Cliente:</b> {nro_cliente}\n"
-                f"📍 <b>Tipo:</b> {tipo_pdv_display}\n"
-                f"🔗 <a href='{primera_ref['drive_link']}'>Ver en Drive</a>"
-                f"{historial_text}\n\n"
-                f"<b>Evaluar:</b>"
-            )
+            def _texto(n_fotos: int) -> str:
+                fotos_text = f"📸 <b>{n_fotos} fotos subidas</b>\n\n" if n_fotos > 1 else ""
+                return (
+                    f"📋 <b>Nueva exhibición</b>\n\n"
+                    f"{fotos_text}"
+                    f"👤 <b>Vendedor:</b> {uploader_name}\n"
+                    f"🏪 <b>Cliente:</b> {nro_cliente}\n"
+                    f"📍 <b>Tipo:</b> {tipo_pdv_display}\n"
+                    f"🔗 <a href='{primera_ref['drive_link']}'>Ver en Drive</a>"
+                    f"{historial_text}\n\n"
+                    f"<b>Evaluar:</b>"
+                )
 
+            # Se anuncia la ráfaga completa; si alguna foto falla se corrige abajo
             sent_msg = await bot.send_message(
                 chat_id=chat_id,
-                text=msg_text,
+                text=_texto(len(photos)),
                 parse_mode=ParseMode.HTML,
                 reply_markup=reply_markup,
                 reply_to_message_id=primera_ref["message_id"]
             )
+            sent_msg_id = sent_msg.message_id
+            session["eval_msg"] = {
+                "message_id": sent_msg_id, "uuid": primera_ref["uuid"], "ref_msg": primera_ref["message_id"],
+            }
+            upload_journal.record(
+                journal_id, "eval_msg",
+                message_id=sent_msg_id, uuid=primera_ref["uuid"], ref_msg=primera_ref["message_id"]
+            )
+        except Exception as e:
+            logger.error(f"Error en post-procesamiento: {e}")
 
-            for ref_data in referencias_subidas:
-                sheets.update_telegram_refs(
-                    uuid_ref=ref_data["uuid"],
-                    chat_id=int(chat_id),
-                    msg_id=int(sent_msg.message_id)
-                )
+    referencias_subidas = [ref for ref in await asyncio.gather(*tasks) if ref]
+    procesadas_count = len(referencias_subidas)
 
-            active_transactions[sent_msg.message_id] = {
+    if sent_msg_id is not None:
+        try:
+            if procesadas_count != len(photos) and not eval_msg:
+                try:
+                    await bot.edit_message_text(
+                        chat_id=chat_id,
+                        message_id=sent_msg_id,
+                        text=_texto(procesadas_count),
+                        parse_mode=ParseMode.HTML,
+                        reply_markup=reply_markup
+                    )
+                except Exception as e:
+                    logger.debug(f"No se pudo corregir el conteo de fotos: {e}")
+
+            await asheets.update_telegram_refs_many(
+                uuid_refs=[ref_data["uuid"] for ref_data in referencias_subidas],
+                chat_id=int(chat_id),
+                msg_id=int(sent_msg_id)
+            )
+
+            active_transactions[sent_msg_id] = {
                 "uuid": primera_ref["uuid"],
                 "uploader_id": user_id,
                 "ref_msg": primera_ref["message_id"],
@@ -1805,22 +2047,64 @@ async def _process_upload_session(bot, user_id: int, session: dict) -> bool:
 
         except Exception as e:
             logger.error(f"Error en post-procesamiento: {e}")
+
+    fallidas = len(photos) - procesadas_count
+    if fallidas:
+        # El journal se conserva: nada se da por terminado sin sus filas
+        await _retry_incomplete_session(bot, user_id, session, fallidas)
     else:
-        try:
-            first_photo_msg = photos[0]["message_id"] if photos else None
-            await bot.send_message(
-                chat_id=chat_id,
-                text="❌ Error al subir las fotos a Drive.",
-                reply_to_message_id=first_photo_msg
-            )
-        except:
-            pass
+        if session.get("_retry"):
+            await _notify_vendor(bot, session, f"✅ Se guardaron las {len(photos)} foto(s) pendientes.")
+        upload_journal.finish(journal_id)
+    return procesadas_count > 0
 
-    # Limpiar sesión
-    if user_id in upload_sessions:
-        del upload_sessions[user_id]
 
-    return procesadas_count > 0
+async def _notify_vendor(bot, session: dict, text: str) -> None:
+    photos = session.get("photos") or []
+    try:
+        await bot.send_message(
+            chat_id=session["chat_id"],
+            text=text,
+            reply_to_message_id=photos[0]["message_id"] if photos else None
+        )
+    except Exception as e:
+        logger.debug(f"No se pudo avisar al vendedor: {e}")
+
+
+async def _retry_incomplete_session(bot, user_id: int, session: dict, fallidas: int) -> None:
+    """
+    Fotos que no quedaron registradas (Drive o Sheets): se avisa al vendedor y
+    se reprocesa la sesión más tarde; retoma desde lo ya hecho (mismos UUID,
+    sin volver a subir a Drive). Agotados los intentos, la sesión sigue en el
+    journal y replay_upload_journal la retoma al arrancar.
+    """
+    attempt = session.get("_retry", 0)
+    total = len(session["photos"])
+    if attempt >= UPLOAD_SESSION_MAX_RETRIES:
+        logger.error(f"❌ Sesión de {user_id}: {fallidas}/{total} foto(s) sin registrar tras {attempt} reintentos")
+        await _notify_vendor(
+            bot, session,
+            f"❌ {fallidas} de {total} foto(s) no se pudieron guardar. "
+            f"Quedan pendientes y se reintentan cuando se reinicie el bot."
+        )
+        return
+
+    session["_retry"] = attempt + 1
+    delay = UPLOAD_SESSION_RETRY_SECONDS * (attempt + 1)
+    logger.warning(f"⚠️ Sesión de {user_id}: {fallidas}/{total} foto(s) sin registrar, reintento en {delay:.0f}s")
+    if attempt == 0:
+        await _notify_vendor(
+            bot, session,
+            f"⚠️ {fallidas} de {total} foto(s) no se pudieron guardar todavía. Se reintenta automáticamente."
+        )
+
+    async def _retry() -> None:
+        await asyncio.sleep(delay)
+        await _process_upload_session(bot, user_id, session)
+
+    task = asyncio.get_running_loop().create_task(_retry())
+    _session_retry_tasks.add(task)
+    task.add_done_callback(_session_retry_tasks.discard)
 
 
 async def _timeout_waiting_id(context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -1852,8 +2136,7 @@ async def _timeout_waiting_id(context: ContextTypes.DEFAULT_TYPE) -> None:
     except Exception as e:
         logger.error(f"Error enviando mensaje de timeout WAITING_ID: {e}")
 
-    if user_id in upload_sessions:
-        del upload_sessions[user_id]
+    _drop_session(user_id)
     logger.info(f"⏱ Timeout WAITING_ID: sesión cancelada para user_id={user_id}")
 
 
@@ -1875,8 +2158,7 @@ async def _timeout_waiting_type(context: ContextTypes.DEFAULT_TYPE) -> None:
         tipos = await get_pos_types_cached()
         if not tipos:
             logger.error("⏱ Timeout WAITING_TYPE: no hay tipos de PDV disponibles")
-            if user_id in upload_sessions:
-                del upload_sessions[user_id]
+            _drop_session(user_id)
             return
 
         tipo_default = tipos[0]
@@ -1904,8 +2186,65 @@ async def _timeout_waiting_type(context: ContextTypes.DEFAULT_TYPE) -> None:
 
     except Exception as e:
         logger.error(f"Error en timeout WAITING_TYPE: {e}")
-        if user_id in upload_sessions:
-            del upload_sessions[user_id]
+        if upload_sessions.get(user_id) is session:
+            _drop_session(user_id)
+
+
+async def replay_upload_journal(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Al arrancar el host: retoma las sesiones que el journal tiene sin terminar
+    (crash, /hardreset, takeover). Las que ya estaban procesándose siguen desde
+    el último paso registrado; las que esperaban nro de cliente o tipo de PDV
+    vuelven a upload_sessions con el tiempo que les quedaba.
+    """
+    if host_lock and not host_lock.is_host:
+        return
+    application = context.application
+    pending = await asyncio.to_thread(upload_journal.unfinished)
+    if not pending:
+        return
+    logger.warning(f"📒 Journal: retomando {len(pending)} sesión(es) de subida sin terminar")
+
+    now = time.time()
+    for js in pending:
+        session = {
+            "chat_id": js.fields.get("chat_id"),
+            "chat_title": js.fields.get("chat_title"),
+            "vendor_id": js.user_id,
+            "vendor_name": js.fields.get("vendor_name") or "Usuario",
+            "vendor_username": js.fields.get("vendor_username") or "",
+            "stage": STAGE_WAITING_TYPE if js.stage == "PROCESSING" else js.stage,
+            "photos": js.photos,
+            "nro_cliente": js.fields.get("nro_cliente"),
+            "tipo_pdv": js.fields.get("tipo_pdv"),
+            "created_at": js.created_at,
+            "last_photo_time": js.updated_at,
+            "timeout_job": None,
+            "buttons_message_id": js.fields.get("buttons_message_id"),
+            "journal_id": js.session_id,
+        }
+
+        if js.stage == "PROCESSING":
+            session["_processing"] = True
+            if js.eval_msg:
+                session["eval_msg"] = js.eval_msg
+            application.create_task(_process_upload_session(application.bot, js.user_id, session))
+            continue
+
+        if js.user_id in upload_sessions or not session["chat_id"]:
+            upload_journal.finish(js.session_id, "closed")
+            continue
+
+        upload_sessions[js.user_id] = session
+        if js.stage == STAGE_WAITING_ID:
+            timeout_cb, timeout_s = _timeout_waiting_id, TIMEOUT_WAITING_ID_SECONDS
+        else:
+            timeout_cb, timeout_s = _timeout_waiting_type, TIMEOUT_WAITING_TYPE_SECONDS
+        session["timeout_job"] = application.job_queue.run_once(
+            timeout_cb,
+            max(5.0, timeout_s - (now - js.updated_at)),
+            data={"user_id": js.user_id}
+        )
 
 
 async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -1921,21 +2260,21 @@ async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     username = update.message.from_user.username or ""
     full_name = update.message.from_user.first_name or "Usuario"
 
-    register_user_interaction(chat_id, user_id, username, full_name)
+    await register_user_interaction(chat_id, user_id, username, full_name)
 
     if bot_hibernating:
         logger.debug(f"Foto ignorada durante hibernación de {username}")
         return
 
-    rol = get_cached_role(chat_id, user_id)
+    rol = await get_cached_role(chat_id, user_id)
     
     # LÓGICA DE JERARQUÍA GLOBAL: respetar rol previo en cualquier grupo
     if rol not in ["vendedor", "supervisor", "admin"]:
 
         # Consultar si el usuario tiene algún rol previo
         # en cualquier otro grupo del sistema.
-        # No genera lecturas a Sheets, usa cache en memoria.
-        existing_role = sheets.get_existing_role_for_user(user_id)
+        # No genera lecturas a Sheets, usa el índice en memoria.
+        existing_role = existing_role_for_user(user_id)
 
         if existing_role is not None:
             # El usuario ya existe en el sistema con un rol previo.
@@ -1954,7 +2293,7 @@ async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
                 f"Sin rol previo. Asignando 'vendedor'."
             )
 
-        success = sheets.set_user_role_in_group(
+        success = await asheets.set_user_role_in_group(
             chat_id=chat_id,
             user_id=user_id,
             username=username,
@@ -1964,7 +2303,7 @@ async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         )
 
         if success:
-            role_cache[(chat_id, user_id)] = role_to_assign
+            remember_role(chat_id, user_id, role_to_assign)
             rol = role_to_assign
             try:
                 await update.message.reply_text(
@@ -1986,9 +2325,9 @@ async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     file_id = update.message.photo[-1].file_id
     
     # Verificar semáforo
-    estado_sem = sheets.get_semaforo_estado()
+    estado_sem = await asheets.get_semaforo_estado()
     if estado_sem["estado"] == "DISTRIBUYENDO":
-        sheets.encolar_imagen_pendiente(
+        await asheets.encolar_imagen_pendiente(
             chat_id=chat_id,
             message_id=message_id,
             user_id=user_id,
@@ -2044,6 +2383,10 @@ async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
                 "message_id": message_id
             })
             session["last_photo_time"] = now
+            upload_journal.record(
+                session.get("journal_id"), "photo",
+                idx=photo_count, file_id=file_id, message_id=message_id
+            )
             logger.info(f"📸 Foto adicional agregada a ráfaga: {username} ({photo_count + 1} fotos)")
             return  # No pedir número, no enviar mensaje
         
@@ -2078,10 +2421,14 @@ async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
                     )
                 except Exception as e:
                     logger.error(f"Error respondiendo a foto anterior: {e}")
-        
+
+        if session_exists:
+            _drop_session(user_id)
+
+        chat_title = (getattr(update.message.chat, "title", None) or getattr(update.message.chat, "full_name", None) or getattr(update.message.chat, "username", None) or str(chat_id))
         upload_sessions[user_id] = {
             "chat_id": chat_id,
-            "chat_title": (getattr(update.message.chat, "title", None) or getattr(update.message.chat, "full_name", None) or getattr(update.message.chat, "username", None) or str(chat_id)),
+            "chat_title": chat_title,
             "vendor_id": user_id,
             "vendor_name": full_name,
             "vendor_username": username,
@@ -2093,12 +2440,20 @@ async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
             "last_photo_time": time.time(),  # ← Timestamp para ráfaga
             "timeout_job": None,
             "buttons_message_id": None,
+            "journal_id": upload_journal.open_session(
+                user_id, chat_id=chat_id, chat_title=chat_title,
+                vendor_name=full_name, vendor_username=username
+            ),
         }
     
     upload_sessions[user_id]["photos"].append({
         "file_id": file_id,
         "message_id": message_id
     })
+    upload_journal.record(
+        upload_sessions[user_id].get("journal_id"), "photo",
+        idx=len(upload_sessions[user_id]["photos"]) - 1, file_id=file_id, message_id=message_id
+    )
     
     # Actualizar timestamp de última foto
     upload_sessions[user_id]["last_photo_time"] = now
@@ -2140,7 +2495,7 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
     username = update.message.from_user.username or ""
     full_name = update.message.from_user.first_name or "Usuario"
 
-    register_user_interaction(chat_id, user_id, username, full_name)
+    await register_user_interaction(chat_id, user_id, username, full_name)
 
     if bot_hibernating:
         return
@@ -2176,6 +2531,7 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
         nro_cliente = clean_text
         session["nro_cliente"] = nro_cliente
         session["stage"] = STAGE_WAITING_TYPE
+        upload_journal.record(session.get("journal_id"), "client", nro_cliente=nro_cliente)
 
         # Cancelar timeout de 10 min (vendedor respondió a tiempo)
         _cancel_session_timeout(session)
@@ -2194,7 +2550,7 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
                     reply_to_message_id=message_id
                 )
                 # Limpiar sesión corrupta
-                del upload_sessions[user_id]
+                _drop_session(user_id)
                 return
             
             logger.info(f"📋 Tipos de PDV obtenidos: {len(tipos_disponibles)}")
@@ -2207,7 +2563,7 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
                 reply_to_message_id=message_id
             )
             # Limpiar sesión corrupta
-            del upload_sessions[user_id]
+            _drop_session(user_id)
             return
 
         botones_lista = []
@@ -2229,6 +2585,7 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
                 reply_markup=reply_markup
             )
             session["buttons_message_id"] = buttons_msg.message_id
+            upload_journal.record(session.get("journal_id"), "buttons", message_id=buttons_msg.message_id)
             logger.info(f"✅ Botones de tipo PDV enviados correctamente a {username}")
 
             # Programar timeout de 5 min para WAITING_TYPE
@@ -2247,7 +2604,7 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
                 reply_to_message_id=message_id
             )
             # Limpiar sesión corrupta
-            del upload_sessions[user_id]
+            _drop_session(user_id)
 
 
     # ==========================================
@@ -2309,14 +2666,28 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 
         session["tipo_pdv"] = tipo_pdv_display
 
-        # Borrar botones de selección
+        # Acuse inmediato (reemplaza los botones): la sesión está en el
+        # journal, la subida sigue aunque el bot se reinicie en el medio
+        n_fotos = len(session.get("photos", []))
         try:
-            await q.edit_message_reply_markup(reply_markup=None)
+            await q.edit_message_text(
+                f"✅ NRO CLIENTE: <code>{session.get('nro_cliente')}</code>\n"
+                f"📍 Tipo: <b>{tipo_pdv_display}</b>\n\n"
+                f"⏳ Recibido, subiendo {n_fotos} foto(s)...",
+                parse_mode=ParseMode.HTML
+            )
         except Exception:
-            pass
+            try:
+                await q.edit_message_reply_markup(reply_markup=None)
+            except Exception:
+                pass
 
-        # Procesar subida (Drive + Sheets + mensaje evaluación)
-        await _process_upload_session(context.bot, uploader_id, session)
+        # Procesar subida (Drive + Sheets + mensaje evaluación) en segundo plano:
+        # los updates de otros grupos no esperan a que termine la ráfaga
+        context.application.create_task(
+            _process_upload_session(context.bot, uploader_id, session),
+            update=update,
+        )
         return
     
     # Botones de aprobación/rechazo
@@ -2356,12 +2727,13 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             icon = "❌"
 
         # ✅ SOLO ACTUALIZAMOS EL ESTADO (La foto ya está en Drive)
-        result = sheets.update_status_by_uuid(
-            uuid_ref=uuid_ref,
-            new_status=status,
-            supervisor_name=q.from_user.first_name,
-            comments="" 
-        )
+        with api_lane(LANE_EVALUATION):
+            result = await asheets.update_status_by_uuid(
+                uuid_ref=uuid_ref,
+                new_status=status,
+                supervisor_name=q.from_user.first_name,
+                comments=""
+            )
         
         if result == "LOCKED":
             await q.answer("⚠️ Ya evaluado externamente.", show_alert=True)
@@ -2433,6 +2805,7 @@ async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
 # JOBS PERIÓDICOS
 # ==========================================
 
+@lane_api(LANE_SYNC)
 async def sync_telegram_job(context: ContextTypes.DEFAULT_TYPE) -> None:
     """Sincroniza datos con Sheets cada 30s."""
     if bot_hibernating:
@@ -2442,7 +2815,7 @@ async def sync_telegram_job(context: ContextTypes.DEFAULT_TYPE) -> None:
 
     try:
         # 1. Buscar acciones pendientes de sincronizar
-        actions = sheets.get_unsynced_actions()
+        actions = await asheets.get_unsynced_actions()
         if not actions:
             return
 
@@ -2509,27 +2882,29 @@ async def sync_telegram_job(context: ContextTypes.DEFAULT_TYPE) -> None:
 
         # 3. Marcar en Sheets como sincronizado
         if rows_to_mark:
-            sheets.mark_as_synced_rows(rows_to_mark)
+            await asheets.mark_as_synced_rows(rows_to_mark)
 
     except Exception as e:
         logger.error(f"Error general en sync_telegram_job: {e}")
 
+@lane_api(LANE_SYNC)
 async def procesar_cola_imagenes_pendientes(context: ContextTypes.DEFAULT_TYPE) -> None:
     """Procesa cola de imágenes cada 30s."""
     if bot_hibernating:
         return
     if host_lock and not host_lock.is_host: return
     try:
-        pendientes = sheets.get_imagenes_pendientes()
+        pendientes = await asheets.get_imagenes_pendientes()
         if not pendientes: return
         logger.info(f"📋 Procesando {len(pendientes)} imágenes pendientes...")
         for img in pendientes[:5]:
-            try: sheets.marcar_imagen_procesada(img["row_num"])
+            try: await asheets.marcar_imagen_procesada(img["row_num"])
             except Exception as e: logger.error(f"Error procesando imagen pendiente: {e}")
-        sheets.limpiar_cola_imagenes()
+        await asheets.limpiar_cola_imagenes()
     except Exception as e: logger.error(f"Error en procesar_cola_imagenes_pendientes: {e}")
 
 
+@lane_api(LANE_HOUSEKEEPING)
 async def cleanup_expired_sessions(context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Safety net: limpia sesiones que los timeouts explícitos no pudieron limpiar.
@@ -2555,8 +2930,7 @@ async def cleanup_expired_sessions(context: ContextTypes.DEFAULT_TYPE) -> None:
                 logger.info(f"🧹 Limpiando sesión expirada: user_id={user_id}, edad={int(age_seconds/60)} min")
 
         for user_id in to_delete:
-            _cancel_session_timeout(upload_sessions[user_id])
-            del upload_sessions[user_id]
+            _drop_session(user_id)
 
         if to_delete:
             logger.info(f"🧹 Total de sesiones expiradas limpiadas: {len(to_delete)}")
@@ -2564,6 +2938,43 @@ async def cleanup_expired_sessions(context: ContextTypes.DEFAULT_TYPE) -> None:
     except Exception as e:
         logger.error(f"Error en cleanup_expired_sessions: {e}")
 
+def _host_heartbeat_step() -> Tuple[List[str], Optional[str]]:
+    """
+    Parte bloqueante de update_host_heartbeat. Corre en un hilo: así el rate
+    limiter puede esperar token en vez de fallar dentro del event loop.
+    Devuelve los eventos ("lost", "transferred", "takeover") y el host actual.
+    """
+    info = host_lock.get_host_info()
+    current_host = info.get("current_host")
+    is_me_host = host_lock._is_same_machine(current_host) if current_host else False
+    events: List[str] = []
+
+    if host_lock.is_host and not is_me_host:
+        logger.warning("⚠️ ¡Host perdido! Cambiando a modo monitoreo...")
+        host_lock.is_host = False
+        events.append("lost")
+
+    if host_lock.is_host:
+        host_lock.check_and_takeover_if_dead()
+        if not host_lock.is_host:
+            logger.info("✅ Traspaso completado, pasando a modo monitoreo")
+            events.append("transferred")
+    elif bot_in_monitoring_mode or events:
+        ws = host_lock._get_or_create_host_control_sheet()
+        if ws:
+            data = ws.get_all_values()
+            for i in range(2, len(data)):
+                if len(data[i]) > 0 and host_lock._is_same_machine(data[i][0]):
+                    ws.update(f"G{i+1}", [[host_lock._get_timestamp()]])
+                    logger.debug(f"Heartbeat actualizado en cola (fila {i+1})")
+                    break
+        if host_lock.check_and_takeover_if_dead() and host_lock.is_host:
+            logger.info("👑 ¡Takeover exitoso! Ahora soy host")
+            events.append("takeover")
+    return events, current_host
+
+
+@lane_api(LANE_HOST)
 async def update_host_heartbeat(context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Actualiza heartbeat cada 60s y maneja takeovers.
@@ -2571,37 +2982,51 @@ async def update_host_heartbeat(context: ContextTypes.DEFAULT_TYPE) -> None:
     global bot_in_monitoring_mode
     if not host_lock: return
     try:
-        info = host_lock.get_host_info()
-        current_host = info.get("current_host")
-        is_me_host = host_lock._is_same_machine(current_host) if current_host else False
-        
-        if host_lock.is_host and not is_me_host:
-            logger.warning("⚠️ ¡Host perdido! Cambiando a modo monitoreo...")
-            host_lock.is_host = False
+        events, current_host = await asyncio.to_thread(_host_heartbeat_step)
+        if "lost" in events or "transferred" in events:
             bot_in_monitoring_mode = True
+        if "lost" in events:
             await notify_superuser(context, f"⚠️ <b>HOST PERDIDO</b>\n\n🔄 Bot pasó a modo monitoreo\nIs🖥️ {host_lock.identity}\nIs👑 Nuevo host: {current_host or 'Ninguno'}")
-        
-        if host_lock.is_host:
-            host_lock.check_and_takeover_if_dead()
-            if not host_lock.is_host:
-                logger.info("✅ Traspaso completado, pasando a modo monitoreo")
-                bot_in_monitoring_mode = True
-        elif bot_in_monitoring_mode:
-            ws = host_lock._get_or_create_host_control_sheet()
-            if ws:
-                data = ws.get_all_values()
-                for i in range(2, len(data)):
-                    if len(data[i]) > 0 and host_lock._is_same_machine(data[i][0]):
-                        ws.update(f"G{i+1}", [[host_lock._get_timestamp()]])
-                        logger.debug(f"Heartbeat actualizado en cola (fila {i+1})")
-                        break
-            if host_lock.check_and_takeover_if_dead() and host_lock.is_host:
-                logger.info("👑 ¡Takeover exitoso! Ahora soy host")
-                bot_in_monitoring_mode = False
-                await notify_superuser(context, f"👑 <b>TAKEOVER EXITOSO</b>\n\n✅ Este bot es ahora el host\nIs🖥️ {host_lock.identity}")
+        if "takeover" in events:
+            bot_in_monitoring_mode = False
+            await notify_superuser(context, f"👑 <b>TAKEOVER EXITOSO</b>\n\n✅ Este bot es ahora el host\nIs🖥️ {host_lock.identity}")
     except Exception as e:
         logger.error(f"Error en update_host_heartbeat: {e}")
 
+API_METRICS_LOG_INTERVAL_SECONDS = int(os.getenv("API_METRICS_LOG_INTERVAL_SECONDS", "600"))
+
+
+async def log_api_metrics_job(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Resumen periódico de consumo de API (lecturas/escrituras/429) en el log."""
+    logger.info(f"📈 {sheets.api_metrics_summary()}")
+
+
+@lane_api(LANE_SYNC)
+async def archive_closed_months_job(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Archiva los meses cerrados de STATS/RAW_LOGS (de madrugada, sin actividad)."""
+    if host_lock and not host_lock.is_host:
+        return
+    try:
+        res = await asheets.archive_closed_months()
+        if res.get("stats") or res.get("raw"):
+            logger.info(f"🗄️ Archivo mensual listo: {res}")
+    except Exception as e:
+        logger.error(f"❌ Error en archivo mensual: {e}")
+
+
+@lane_api(LANE_SYNC)
+async def prewarm_drive_folders_job(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Deja resueltas las carpetas Drive del día de cada grupo antes de las primeras fotos."""
+    if bot_hibernating or (host_lock and not host_lock.is_host):
+        return
+    try:
+        res = await asheets.prewarm_drive_folders()
+        logger.info(f"📁 Carpetas Drive del día listas: {res}")
+    except Exception as e:
+        logger.error(f"❌ Error precalentando carpetas Drive: {e}")
+
+
+@lane_api(LANE_HOUSEKEEPING)
 async def send_periodic_status(context: ContextTypes.DEFAULT_TYPE) -> None:
     if not host_lock or not host_lock.is_host: return
     msg = f"📊 <b>Status Periódico</b>\n\nIs⏱️ Uptime: {_uptime_hhmmss()}\nIs👑 Host: {host_lock.identity}\nIs✅ Funcionando correctamente"
@@ -2728,6 +3153,15 @@ if __name__ == "__main__":
         app.job_queue.run_repeating(update_host_heartbeat, interval=60, first=10)
     app.job_queue.run_repeating(send_periodic_status, interval=14400, first=60)
     app.job_queue.run_repeating(refresh_pos_types_job, interval=POS_TYPES_CACHE_TTL_SECONDS, first=10)
+    app.job_queue.run_repeating(log_api_metrics_job, interval=API_METRICS_LOG_INTERVAL_SECONDS, first=API_METRICS_LOG_INTERVAL_SECONDS)
+    app.job_queue.run_repeating(check_roles_epoch_job, interval=ROLE_EPOCH_CHECK_SECONDS, first=ROLE_EPOCH_CHECK_SECONDS)
+    # En plena hibernación: borrar filas corre los números de fila del visor
+    app.job_queue.run_daily(archive_closed_months_job, time=datetime.strptime("03:30", "%H:%M").time(),
+                            timezone=AR_TZ, name="archive_closed_months")
+    # Recién despierto (06:00) y al arrancar: la primera foto no busca carpetas
+    app.job_queue.run_daily(prewarm_drive_folders_job, time=datetime.strptime("06:05", "%H:%M").time(),
+                            timezone=AR_TZ, name="prewarm_drive_folders")
+    app.job_queue.run_once(prewarm_drive_folders_job, 30, name="prewarm_drive_folders_startup")
 
 
     print("🚀 BOT ONLINE (HOST)")
@@ -2750,6 +3184,8 @@ if __name__ == "__main__":
         )
         await setup_bot_commands(application)
         await post_init_extensions(application)
+        # Recién con la app corriendo (las sesiones retomadas usan job_queue)
+        application.job_queue.run_once(replay_upload_journal, 3, name="replay_upload_journal")
 
     app.post_init = post_init
 
@@ -2760,6 +3196,11 @@ if __name__ == "__main__":
                 await semaforo.stop()
             except Exception as e:
                 logger.warning(f"⚠️ No se pudo detener semáforo: {e}")
+        try:
+            await asyncio.to_thread(asheets.shutdown)
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudieron flushear escrituras pendientes: {e}")
+        await asyncio.to_thread(upload_journal.close)
         if host_lock and host_lock.is_host:
             logger.info("🔓 Liberando host lock...")
             host_lock.release_host()
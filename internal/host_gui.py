@@ -62,10 +62,10 @@ except ImportError:
 # IMPORTS PARA SISTEMA DE HOST
 try:
     from config_manager import ConfigManager
-    from sheets_manager import SheetsManager
+    from sheets_manager import SheetsManager, get_config_manager
     from host_lock import HostLock
     
-    cfg = ConfigManager()
+    cfg = get_config_manager()
     sheets = SheetsManager()
     host_lock = HostLock(sheets)
     HOST_SYSTEM_ENABLED = True
@@ -26,6 +26,11 @@ except ImportError:
     import logging
     logger = logging.getLogger("HostLock")
 
+try:
+    from rate_limiter import LANE_HOST, LANE_HOUSEKEEPING, RateLimitExceeded, lane_api
+except ImportError:
+    from src.rate_limiter import LANE_HOST, LANE_HOUSEKEEPING, RateLimitExceeded, lane_api
+
 try:
     from zoneinfo import ZoneInfo
     AR_TZ = ZoneInfo("America/Argentina/Buenos_Aires")
@@ -184,6 +189,7 @@ class HostLock:
             logger.error(f"Error en release_host: {e}")
             return False
     
+    @lane_api(LANE_HOST)
     def update_heartbeat(self) -> bool:
         """Actualiza heartbeat."""
         if not self.is_host:
@@ -200,6 +206,7 @@ class HostLock:
             logger.error(f"Error en update_heartbeat: {e}")
             return False
     
+    @lane_api(LANE_HOST)
     def check_and_takeover_if_dead(self) -> bool:
         """
         Verifica si el host está muerto y toma control.
@@ -419,6 +426,7 @@ class HostLock:
             logger.error(f"Error en remove_from_queue: {e}")
             return {"success": False, "message": f"❌ Error: {e}"}
     
+    @lane_api(LANE_HOUSEKEEPING)
     def cleanup_dead_bots(self) -> Dict[str, Any]:
         """
         Limpia bots sin heartbeat (offline).
@@ -1169,6 +1177,11 @@ class HostLock:
         for attempt in range(1, attempts + 1):
             try:
                 return fn()
+            except RateLimitExceeded:
+                # Sin token (prioridad de fondo): mejor el cache que esperar
+                if allow_cache and self._last_read_data:
+                    return None
+                raise
             except Exception as e:
                 if self._is_quota_error(e):
                     self._apply_quota_cooldown()
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+# file: image_renditions.py
+"""
+Versiones livianas de las fotos de exhibición, para que el visor y el
+dashboard no bajen el original completo solo para mostrarlo:
+
+- "web":   lado mayor IMAGE_WEB_MAX_PX (visor, carrusel del dashboard).
+           Se omite si el original ya entra en ese tamaño y recomprimirlo no
+           ahorra al menos un 20% (las fotos de Telegram suelen venir así).
+- "thumb": lado mayor IMAGE_THUMB_MAX_PX (miniaturas de la galería).
+
+El original se sube igual que siempre. Requiere Pillow; sin Pillow (o si la
+imagen no se puede leer) make_renditions() devuelve {} y los visores siguen
+usando LINK_FOTO.
+"""
+
+import io
+import logging
+import os
+from typing import Dict
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow es opcional
+    Image = None  # type: ignore
+    ImageOps = None  # type: ignore
+
+try:
+    from logger_config import get_logger
+    logger = get_logger(__name__)
+except ImportError:
+    logger = logging.getLogger("ImageRenditions")
+
+
+IMAGE_RENDITIONS_ENABLED = os.getenv("IMAGE_RENDITIONS_ENABLED", "1").strip().lower() not in ("0", "false", "no")
+IMAGE_WEB_MAX_PX = int(os.getenv("IMAGE_WEB_MAX_PX", "1280"))
+IMAGE_WEB_QUALITY = int(os.getenv("IMAGE_WEB_QUALITY", "80"))
+IMAGE_THUMB_MAX_PX = int(os.getenv("IMAGE_THUMB_MAX_PX", "320"))
+IMAGE_THUMB_QUALITY = int(os.getenv("IMAGE_THUMB_QUALITY", "70"))
+
+# "web" de una foto que ya entra en IMAGE_WEB_MAX_PX solo vale si pesa menos que esto del original
+_WEB_MIN_SAVING = 0.8
+
+
+def renditions_available() -> bool:
+    return Image is not None and IMAGE_RENDITIONS_ENABLED
+
+
+def _encode(im, max_px: int, quality: int) -> bytes:
+    copy = im.copy()
+    copy.thumbnail((max_px, max_px), Image.LANCZOS)
+    buf = io.BytesIO()
+    copy.save(buf, format="JPEG", quality=quality, optimize=True, progressive=True)
+    return buf.getvalue()
+
+
+def make_renditions(data: bytes) -> Dict[str, bytes]:
+    """{"web": jpeg, "thumb": jpeg} (cualquiera puede faltar). CPU: llamar fuera del event loop."""
+    if not data or not renditions_available():
+        return {}
+    try:
+        with Image.open(io.BytesIO(data)) as src:
+            im = ImageOps.exif_transpose(src)
+            if im.mode not in ("RGB", "L"):
+                im = im.convert("RGB")
+            out: Dict[str, bytes] = {}
+            web = _encode(im, IMAGE_WEB_MAX_PX, IMAGE_WEB_QUALITY)
+            if max(im.size) > IMAGE_WEB_MAX_PX or len(web) < len(data) * _WEB_MIN_SAVING:
+                out["web"] = web
+            out["thumb"] = _encode(im, IMAGE_THUMB_MAX_PX, IMAGE_THUMB_QUALITY)
+            return out
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudieron generar versiones livianas de la foto: {e}")
+        return {}
+
+
+def rendition_filename(filename: str, kind: str) -> str:
+    """'1234_KIOSCO_1700000000_2.jpg' → '1234_KIOSCO_1700000000_2_thumb.jpg'."""
+    stem = filename.rsplit(".", 1)[0] if "." in filename else filename
+    return f"{stem}_{kind}.jpg"
@@ -0,0 +1,386 @@
+# -*- coding: utf-8 -*-
+# file: local_cache.py
+"""
+Cache local de SheetsManager (reemplaza el dict `_local_cache`).
+
+- LRU con tope de entradas y de memoria aproximada (api_metrics.estimate_bytes).
+- TTL por clave.
+- Persistencia opcional en SQLite: los valores serializables a JSON (records,
+  roles, configuración) sobreviven a reinicios (/hardreset, takeover con
+  os.execv), así el bot arranca sirviendo datos en vez de releer todo.
+- Stale-while-revalidate (opcional, por clave): una entrada vencida hace
+  menos de LOCAL_CACHE_SWR_MAX_STALE_SECONDS se devuelve al instante y se
+  refresca en segundo plano (ver get_or_load). Lo cargado de disco nunca se
+  sirve vencido sin revalidar antes.
+- Generación por clave: pop()/set() la incrementan, así un refresco que
+  arrancó antes de una invalidación no vuelve a poner el valor viejo.
+
+La persistencia se activa con attach(namespace) (el sheet_id) una vez conectado:
+así dos spreadsheets distintos nunca comparten entradas.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+try:
+    from logger_config import get_logger
+    logger = get_logger(__name__)
+except ImportError:
+    logger = logging.getLogger("LocalCache")
+
+try:
+    from api_metrics import estimate_bytes
+except ImportError:
+    from src.api_metrics import estimate_bytes
+
+
+LOCAL_CACHE_PATH = os.getenv(
+    "LOCAL_CACHE_PATH",
+    str(Path(__file__).resolve().parent.parent / "data" / "local_cache.sqlite3"),
+)
+LOCAL_CACHE_MAX_ENTRIES = int(os.getenv("LOCAL_CACHE_MAX_ENTRIES", "5000"))
+LOCAL_CACHE_MAX_MB = float(os.getenv("LOCAL_CACHE_MAX_MB", "64"))
+# Entradas vencidas hace más de esto no se sirven ni se cargan del disco
+# (solo como respaldo ante error o cooldown de cuota)
+LOCAL_CACHE_MAX_STALE_SECONDS = float(os.getenv("LOCAL_CACHE_MAX_STALE_SECONDS", "86400"))
+# Stale-while-revalidate: cuánto tiempo vencida se puede servir una entrada
+LOCAL_CACHE_SWR_MAX_STALE_SECONDS = float(os.getenv("LOCAL_CACHE_SWR_MAX_STALE_SECONDS", "300"))
+
+
+class _Entry:
+    __slots__ = ("expires", "value", "size", "persist", "from_disk")
+
+    def __init__(self, expires: float, value: Any, size: int, persist: bool,
+                 from_disk: bool = False) -> None:
+        self.expires = expires
+        self.value = value
+        self.size = size
+        self.persist = persist
+        self.from_disk = from_disk
+
+
+class LocalCache:
+    """
+    Uso:
+        cache.set("config:records", records, ttl=300)
+        cache.get("config:records")                     → None si no está o venció
+        cache.get("config:records", allow_expired=True) → aunque haya vencido
+        cache.get_or_load(key, loader, ttl, stale_while_revalidate=True)
+        cache.pop(key)                                  → invalidar
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_entries: int = LOCAL_CACHE_MAX_ENTRIES,
+        max_bytes: int = int(LOCAL_CACHE_MAX_MB * 1024 * 1024),
+        max_stale_seconds: float = LOCAL_CACHE_MAX_STALE_SECONDS,
+    ) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_stale = max_stale_seconds
+        self._lock = threading.RLock()
+        self._data: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._db: Optional[sqlite3.Connection] = None
+        self._namespace = ""
+        self._refreshing: Dict[str, threading.Thread] = {}
+        # clave → generación (sube en cada set/pop)
+        self._gen: Dict[str, int] = {}
+        self.stats: Dict[str, int] = {
+            "hits": 0, "misses": 0, "stale_served": 0, "evictions": 0,
+            "refreshes": 0, "refresh_errors": 0, "refresh_discarded": 0, "loaded_from_disk": 0,
+        }
+
+    # ============================================================================
+    # PERSISTENCIA
+    # ============================================================================
+
+    def attach(self, namespace: str) -> int:
+        """
+        Activa la persistencia para `namespace` y carga lo guardado (incluso
+        vencido, hasta max_stale). Devuelve cuántas entradas se cargaron.
+        """
+        if not self.path or not namespace:
+            return 0
+        with self._lock:
+            if self._namespace == namespace and self._db is not None:
+                return 0
+            try:
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+                db = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS cache ("
+                    " ns TEXT NOT NULL, key TEXT NOT NULL, expires REAL NOT NULL, value TEXT NOT NULL,"
+                    " PRIMARY KEY (ns, key))"
+                )
+                db.execute("DELETE FROM cache WHERE expires < ?", (time.time() - self.max_stale,))
+                db.commit()
+                rows = db.execute(
+                    "SELECT key, expires, value FROM cache WHERE ns = ? ORDER BY expires", (namespace,)
+                ).fetchall()
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"⚠️ Cache local sin persistencia ({self.path}): {e}")
+                return 0
+            self._db = db
+            self._namespace = namespace
+            loaded = 0
+            for key, expires, raw in rows:
+                if key in self._data:
+                    continue
+                try:
+                    value = json.loads(raw)
+                except ValueError:
+                    continue
+                self._store(key, _Entry(expires, value, estimate_bytes(value), True, from_disk=True))
+                loaded += 1
+            self.stats["loaded_from_disk"] += loaded
+        if loaded:
+            logger.info(f"💾 Cache local: {loaded} entradas recuperadas de disco")
+        return loaded
+
+    def _persist(self, key: str, entry: _Entry) -> None:
+        if self._db is None or not entry.persist:
+            return
+        try:
+            raw = json.dumps(entry.value, ensure_ascii=False, default=str)
+            with self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO cache (ns, key, expires, value) VALUES (?, ?, ?, ?)",
+                    (self._namespace, key, entry.expires, raw),
+                )
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.debug(f"Cache local: no se pudo persistir {key}: {e}")
+
+    def _unpersist(self, key: str) -> None:
+        if self._db is None:
+            return
+        try:
+            with self._db:
+                self._db.execute("DELETE FROM cache WHERE ns = ? AND key = ?", (self._namespace, key))
+        except sqlite3.Error:
+            pass
+
+    @staticmethod
+    def _persistable(value: Any) -> bool:
+        if value is None or isinstance(value, (str, int, float, bool)):
+            return True
+        if isinstance(value, (list, tuple, dict)):
+            try:
+                json.dumps(value)
+                return True
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    # ============================================================================
+    # LRU
+    # ============================================================================
+
+    def _store(self, key: str, entry: _Entry) -> None:
+        old = self._data.pop(key, None)
+        if old is not None:
+            self._bytes -= old.size
+        self._data[key] = entry
+        self._bytes += entry.size
+        self._evict()
+
+    def _evict(self) -> None:
+        while self._data and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+            key, old = self._data.popitem(last=False)
+            self._bytes -= old.size
+            self.stats["evictions"] += 1
+            self._unpersist(key)
+
+    def generation(self, key: str) -> int:
+        with self._lock:
+            return self._gen.get(key, 0)
+
+    def set(self, key: str, value: Any, ttl: float, *, persist: bool = True,
+            generation: Optional[int] = None) -> bool:
+        """
+        Guarda `value`. Con `generation` (tomada con generation() antes de leer)
+        no guarda nada si la clave se invalidó o se escribió mientras tanto.
+        """
+        entry = _Entry(time.time() + float(ttl), value, estimate_bytes(value),
+                       persist and self._persistable(value))
+        with self._lock:
+            if generation is not None and self._gen.get(key, 0) != generation:
+                return False
+            self._gen[key] = self._gen.get(key, 0) + 1
+            self._store(key, entry)
+            self._persist(key, entry)
+        return True
+
+    def get_entry(self, key: str) -> Optional[Tuple[Any, bool]]:
+        """(valor, vigente) o None. Las vencidas de más de max_stale no cuentan."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            now = time.time()
+            if now - entry.expires > self.max_stale:
+                self._drop(key)
+                return None
+            self._data.move_to_end(key)
+            return entry.value, now <= entry.expires
+
+    def get_stale(self, key: str, max_stale: float = LOCAL_CACHE_SWR_MAX_STALE_SECONDS) -> Optional[Any]:
+        """
+        Valor vencido que se puede servir mientras se revalida: vencido hace
+        menos de `max_stale` y no recuperado de disco. None si no hay.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry.from_disk:
+                return None
+            if not 0 < time.time() - entry.expires <= max_stale:
+                return None
+            self._data.move_to_end(key)
+            return entry.value
+
+    def get(self, key: str, *, allow_expired: bool = False) -> Optional[Any]:
+        item = self.get_entry(key)
+        if item is None:
+            self.stats["misses"] += 1
+            return None
+        value, fresh = item
+        if fresh:
+            self.stats["hits"] += 1
+            return value
+        if allow_expired:
+            self.stats["stale_served"] += 1
+            return value
+        self.stats["misses"] += 1
+        return None
+
+    def _drop(self, key: str) -> Optional[_Entry]:
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+            if entry.persist:
+                self._unpersist(key)
+        return entry
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        """Invalida una clave (misma firma que dict.pop)."""
+        with self._lock:
+            self._gen[key] = self._gen.get(key, 0) + 1
+            entry = self._drop(key)
+        return default if entry is None else entry.value
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._data):
+                self._gen[key] = self._gen.get(key, 0) + 1
+                self._drop(key)
+
+    def __contains__(self, key: object) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            return iter(list(self._data))
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    # ============================================================================
+    # STALE-WHILE-REVALIDATE
+    # ============================================================================
+
+    def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        ttl: float,
+        *,
+        stale_while_revalidate: bool = False,
+        max_stale: float = LOCAL_CACHE_SWR_MAX_STALE_SECONDS,
+        refresh_wrapper: Optional[Callable[[Callable[[], Any]], Any]] = None,
+    ) -> Any:
+        """
+        Vigente → se devuelve. Vencida hace menos de `max_stale` (y swr) → se
+        devuelve igual y se refresca en un hilo aparte (una sola recarga en
+        vuelo por clave). Si no → se carga en línea. `refresh_wrapper` envuelve
+        la recarga de fondo (p.ej. para correrla en otro carril del rate limiter).
+        """
+        item = self.get_entry(key)
+        if item is not None and item[1]:
+            self.stats["hits"] += 1
+            return item[0]
+        if stale_while_revalidate:
+            stale = self.get_stale(key, max_stale)
+            if stale is not None:
+                self.stats["stale_served"] += 1
+                self.refresh_async(key, loader, ttl, refresh_wrapper)
+                return stale
+        self.stats["misses"] += 1
+        gen = self.generation(key)
+        value = loader()
+        self.set(key, value, ttl, generation=gen)
+        return value
+
+    def refresh_async(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        ttl: float,
+        wrapper: Optional[Callable[[Callable[[], Any]], Any]] = None,
+    ) -> bool:
+        with self._lock:
+            running = self._refreshing.get(key)
+            if running is not None and running.is_alive():
+                return False
+            gen = self._gen.get(key, 0)
+
+            def _run() -> None:
+                try:
+                    value = wrapper(loader) if wrapper else loader()
+                    # Invalidada (o reescrita) durante la lectura: se descarta
+                    if self.set(key, value, ttl, generation=gen):
+                        self.stats["refreshes"] += 1
+                    else:
+                        self.stats["refresh_discarded"] += 1
+                except Exception as e:
+                    self.stats["refresh_errors"] += 1
+                    logger.debug(f"Cache local: refresco de {key} falló: {e}")
+                finally:
+                    with self._lock:
+                        if self._refreshing.get(key) is threading.current_thread():
+                            del self._refreshing[key]
+
+            t = threading.Thread(target=_run, name=f"cache-refresh:{key[:24]}", daemon=True)
+            self._refreshing[key] = t
+        t.start()
+        return True
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self.stats)
+            out.update({
+                "entries": len(self._data),
+                "kb": round(self._bytes / 1024, 1),
+                "persistent": self._db is not None,
+                "refreshing": len(self._refreshing),
+            })
+            return out
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                try:
+                    self._db.close()
+                except sqlite3.Error:
+                    pass
+                self._db = None
@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+# file: rate_limiter.py
+"""
+Rate limiter proactivo (token bucket) y carriles de prioridad para la API de
+Google Sheets.
+
+La cuota de Sheets es por usuario y por minuto, separada para lecturas y
+escrituras (60/min por defecto). En vez de reaccionar al 429 con cooldowns
+largos, cada llamada toma antes un token del balde correspondiente; el
+limiter es único por proceso y lo comparten SheetsManager y HostLock (ambos
+pasan por los proxies de api_metrics).
+
+Carriles (de mayor a menor prioridad):
+- "host": heartbeat y takeover de HostLock. Sin reserva y nunca se difiere:
+  si el host deja de latir más de HOST_DEAD_TIMEOUT, el standby toma control.
+- "interactive" (default): subidas de fotos, comandos, botones de vendedores.
+- "evaluation": aprobar/rechazar/destacar (supervisores, visor).
+- "sync": jobs que tienen que correr pero pueden esperar (sync de Telegram,
+  cola de imágenes). Bajo presión se DIFIEREN.
+- "housekeeping": polling y mantenimiento (semáforo, limpiezas, reportes,
+  espejo, escrituras diferidas). Bajo presión se DESCARTAN sin esperar.
+
+Cada carril tiene una reserva: solo toma tokens por encima de ese piso, así
+siempre queda margen para los carriles de arriba. Además, un carril no toma
+token mientras haya llamadas esperando en un carril más prioritario.
+
+El carril viaja en un contextvar: `with api_lane(LANE_SYNC):`, el decorador
+`@lane_api(LANE_SYNC)` o `call_in_lane()` para run_in_executor.
+AsyncSheetsManager copia el contexto al executor, así que marcar el job alcanza.
+
+Dimensionamiento: con ráfaga B y recarga r tokens/s, en cualquier ventana de
+60 s se consumen como máximo B + 60·r; se elige r para que eso no supere
+cuota·RATE_LIMIT_SAFETY.
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+try:
+    from logger_config import get_logger
+    logger = get_logger(__name__)
+except ImportError:
+    logger = logging.getLogger("RateLimiter")
+
+
+SHEETS_READ_QUOTA_PER_MIN = int(os.getenv("SHEETS_READ_QUOTA_PER_MIN", "60"))
+SHEETS_WRITE_QUOTA_PER_MIN = int(os.getenv("SHEETS_WRITE_QUOTA_PER_MIN", "60"))
+RATE_LIMIT_SAFETY = float(os.getenv("RATE_LIMIT_SAFETY", "0.9"))
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "12"))
+INTERACTIVE_MAX_WAIT_SECONDS = float(os.getenv("RATE_LIMIT_INTERACTIVE_MAX_WAIT", "20"))
+SYNC_MAX_WAIT_SECONDS = float(os.getenv("RATE_LIMIT_SYNC_MAX_WAIT", "30"))
+
+LANE_HOST = "host"
+LANE_INTERACTIVE = "interactive"
+LANE_EVALUATION = "evaluation"
+LANE_SYNC = "sync"
+LANE_HOUSEKEEPING = "housekeeping"
+LANES: Tuple[str, ...] = (LANE_HOST, LANE_INTERACTIVE, LANE_EVALUATION, LANE_SYNC, LANE_HOUSEKEEPING)
+
+# carril → (fracción del balde reservada para carriles superiores, espera máx. en s)
+# Sin token al vencer la espera: host/interactive/evaluation pasan igual (dejan
+# deuda), sync y housekeeping levantan RateLimitExceeded.
+LANE_POLICIES: Dict[str, Tuple[float, float]] = {
+    LANE_HOST: (0.0, SYNC_MAX_WAIT_SECONDS),
+    LANE_INTERACTIVE: (0.0, INTERACTIVE_MAX_WAIT_SECONDS),
+    LANE_EVALUATION: (float(os.getenv("RATE_LIMIT_EVALUATION_RESERVE", "0.15")), INTERACTIVE_MAX_WAIT_SECONDS),
+    LANE_SYNC: (float(os.getenv("RATE_LIMIT_SYNC_RESERVE", "0.4")), SYNC_MAX_WAIT_SECONDS),
+    LANE_HOUSEKEEPING: (float(os.getenv("RATE_LIMIT_HOUSEKEEPING_RESERVE", "0.6")), 0.0),
+}
+_BLOCKING_LANES = frozenset({LANE_HOST, LANE_INTERACTIVE, LANE_EVALUATION})
+
+_current_lane: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "sheets_api_lane", default=LANE_INTERACTIVE
+)
+
+
+class RateLimitExceeded(RuntimeError):
+    """Llamada diferida/descartada por falta de token (no es un 429 de Google)."""
+
+
+# ============================================================================
+# CARRIL (contextvar)
+# ============================================================================
+
+def current_lane() -> str:
+    return _current_lane.get()
+
+
+@contextmanager
+def api_lane(lane: str) -> Iterator[None]:
+    token = _current_lane.set(lane)
+    try:
+        yield
+    finally:
+        _current_lane.reset(token)
+
+
+def lane_api(lane: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorador: las llamadas a la API dentro de la función van por `lane`."""
+    def deco(fn: Callable[..., Any]) -> Callable[..., Any]:
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def _async(*args: Any, **kwargs: Any) -> Any:
+                with api_lane(lane):
+                    return await fn(*args, **kwargs)
+            return _async
+
+        @functools.wraps(fn)
+        def _sync(*args: Any, **kwargs: Any) -> Any:
+            with api_lane(lane):
+                return fn(*args, **kwargs)
+        return _sync
+    return deco
+
+
+def call_in_lane(lane: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Para run_in_executor, que no propaga contextvars."""
+    with api_lane(lane):
+        return fn(*args, **kwargs)
+
+
+# ============================================================================
+# TOKEN BUCKET
+# ============================================================================
+
+class TokenBucket:
+    def __init__(self, name: str, quota_per_min: int, burst: int = RATE_LIMIT_BURST,
+                 safety: float = RATE_LIMIT_SAFETY) -> None:
+        budget = max(1.0, quota_per_min * safety)
+        self.name = name
+        self.capacity = float(max(1, min(burst, int(budget) // 2)))
+        self.rate = max(0.01, (budget - self.capacity) / 60.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.waits = 0
+        self.rejections = 0
+        # Llamadas esperando token, por carril (profundidad de cola)
+        self.waiting: Dict[str, int] = {lane: 0 for lane in LANES}
+        self._cond = threading.Condition()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _higher_lane_waiting(self, lane: str) -> bool:
+        rank = LANES.index(lane) if lane in LANES else len(LANES)
+        return any(self.waiting[l] for l in LANES[:rank])
+
+    def acquire(self, lane: str = LANE_INTERACTIVE, reserve: float = 0.0,
+                timeout: Optional[float] = None) -> bool:
+        """
+        Toma un token dejando al menos `reserve` en el balde y cediendo el paso
+        a carriles superiores que estén esperando. Bloquea hasta `timeout`
+        segundos (None = sin límite). False si no se consiguió.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waiting = False
+        with self._cond:
+            try:
+                while True:
+                    self._refill()
+                    if self.tokens - 1.0 >= reserve and not self._higher_lane_waiting(lane):
+                        self.tokens -= 1.0
+                        if waiting:
+                            self.waits += 1
+                        return True
+                    need = max((reserve + 1.0 - self.tokens) / self.rate, 0.05)
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.rejections += 1
+                            return False
+                        need = min(need, remaining)
+                    if not waiting:
+                        waiting = True
+                        self.waiting[lane] = self.waiting.get(lane, 0) + 1
+                    self._cond.wait(need)
+            finally:
+                if waiting:
+                    self.waiting[lane] -= 1
+                    self._cond.notify_all()
+
+    def take_debt(self) -> None:
+        """Consume un token aunque no haya (queda negativo: los siguientes esperan)."""
+        with self._cond:
+            self._refill()
+            self.tokens -= 1.0
+
+    def drain(self) -> None:
+        """Tras un 429: vaciar el balde para que todos frenen hasta recargar."""
+        with self._cond:
+            self._refill()
+            self.tokens = min(self.tokens, 0.0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            self._refill()
+            return {
+                "tokens": round(self.tokens, 2),
+                "capacity": self.capacity,
+                "rate_per_min": round(self.rate * 60.0, 1),
+                "waits": self.waits,
+                "rejections": self.rejections,
+                "waiting": dict(self.waiting),
+            }
+
+
+class RateLimiter:
+    """Baldes de lectura y escritura + política de carriles."""
+
+    def __init__(self, read_quota_per_min: int = SHEETS_READ_QUOTA_PER_MIN,
+                 write_quota_per_min: int = SHEETS_WRITE_QUOTA_PER_MIN) -> None:
+        self.buckets = {
+            "read": TokenBucket("read", read_quota_per_min),
+            "write": TokenBucket("write", write_quota_per_min),
+        }
+        self._stats_lock = threading.Lock()
+        # carril → contadores (admitidas, diferidas, descartadas, con deuda)
+        self.lane_stats: Dict[str, Dict[str, int]] = {
+            lane: {"admitted": 0, "deferred": 0, "dropped": 0, "debt": 0} for lane in LANES
+        }
+
+    def _count(self, lane: str, key: str) -> None:
+        with self._stats_lock:
+            self.lane_stats.setdefault(lane, {"admitted": 0, "deferred": 0, "dropped": 0, "debt": 0})[key] += 1
+
+    def acquire(self, kind: str, lane: Optional[str] = None) -> None:
+        bucket = self.buckets["write" if kind == "write" else "read"]
+        lane = lane or current_lane()
+        reserve_fraction, timeout = LANE_POLICIES.get(lane, LANE_POLICIES[LANE_HOUSEKEEPING])
+
+        # Nunca bloquear el hilo del event loop (p.ej. HostLock llamado desde un job)
+        try:
+            asyncio.get_running_loop()
+            timeout = 0.0
+        except RuntimeError:
+            pass
+
+        if bucket.acquire(lane, reserve=bucket.capacity * reserve_fraction, timeout=timeout):
+            self._count(lane, "admitted")
+            return
+        if lane in _BLOCKING_LANES:
+            # Lo que hace un usuario no se descarta: pasa y deja deuda en el balde
+            bucket.take_debt()
+            self._count(lane, "debt")
+            logger.warning(f"⏱️ Rate limit {bucket.name}: llamada {lane} sin token (deuda)")
+            return
+        if lane == LANE_HOUSEKEEPING:
+            self._count(lane, "dropped")
+            raise RateLimitExceeded(f"Rate limit {bucket.name}: llamada {lane} descartada")
+        self._count(lane, "deferred")
+        raise RateLimitExceeded(f"Rate limit {bucket.name}: llamada {lane} diferida")
+
+    def on_quota_error(self, kind: str) -> None:
+        self.buckets["write" if kind == "write" else "read"].drain()
+
+    def queue_depths(self) -> Dict[str, int]:
+        """Llamadas esperando token ahora mismo, por carril."""
+        depths = {lane: 0 for lane in LANES}
+        for bucket in self.buckets.values():
+            with bucket._cond:
+                for lane, n in bucket.waiting.items():
+                    depths[lane] = depths.get(lane, 0) + n
+        return depths
+
+    def snapshot(self) -> Dict[str, Any]:
+        snap: Dict[str, Any] = {name: b.snapshot() for name, b in self.buckets.items()}
+        with self._stats_lock:
+            snap["lanes"] = {lane: dict(st) for lane, st in self.lane_stats.items()}
+        for lane, depth in self.queue_depths().items():
+            snap["lanes"].setdefault(lane, {})["waiting"] = depth
+        return snap
+
+
+_shared_limiter: Optional[RateLimiter] = None
+_shared_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Limiter único por proceso (la cuota es por usuario, no por instancia)."""
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = RateLimiter()
+            r, w = _shared_limiter.buckets["read"], _shared_limiter.buckets["write"]
+            logger.info(
+                f"🪣 Rate limiter Sheets: lectura {r.rate * 60:.0f}/min (ráfaga {r.capacity:.0f}), "
+                f"escritura {w.rate * 60:.0f}/min (ráfaga {w.capacity:.0f})"
+            )
+        return _shared_limiter
@@ -0,0 +1,401 @@
+# -*- coding: utf-8 -*-
+# file: report_aggregates.py
+"""
+Agregados e índices incrementales sobre STATS para /stats, /ranking y el
+historial de clientes.
+
+Sobre las vistas columnares de STATS y RAW_LOGS (ver columnar_store) se
+mantienen contadores por estado:
+
+- (user_id, día)             → /stats (histórico y últimos 30 días)
+- (mes, user_id, vendedor)   → /ranking del mes en curso
+
+Se arman una vez por carga de las réplicas y después se actualizan fila a
+fila: cada cambio de estado (patch) y cada fila nueva (append) llega por los
+listeners de ColumnarTable. Un RAW_LOGS nuevo que asocia un UUID a un usuario
+reasigna solo las filas de STATS con ese UUID. Si alguna tabla se reconstruye
+(resincronización completa), el próximo sync() rearma todo.
+
+El vendedor se guarda como (user_id, VENDEDOR) y el nombre se resuelve al
+consultar (USER_NAME más reciente de RAW_LOGS), igual que antes.
+
+ClientHistoryIndex sigue el mismo esquema para (cliente, chat_id) → filas.
+
+Los meses archivados (ver SheetsManager.archive_closed_months) ya no están en
+las réplicas: entran como línea de base desde los resúmenes compactos
+(set_baseline / set_archived), sin leer las pestañas de archivo.
+"""
+
+import threading
+from array import array
+from bisect import insort
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from columnar_store import (
+        ESTADO_APROBADO, ESTADO_DESTACADO, ESTADO_RECHAZADO, ColumnarTable, ordinal_to_date,
+        parse_date_ordinal,
+    )
+except ImportError:
+    from src.columnar_store import (
+        ESTADO_APROBADO, ESTADO_DESTACADO, ESTADO_RECHAZADO, ColumnarTable, ordinal_to_date,
+        parse_date_ordinal,
+    )
+
+# Índices de los contadores
+APR, DES, REC, OTRO = 0, 1, 2, 3
+_CODES = {ESTADO_APROBADO: APR, ESTADO_DESTACADO: DES, ESTADO_RECHAZADO: REC}
+
+# Clave de "todos los usuarios" en los agregados por día
+ALL_USERS = "*"
+
+
+def _month_key(d: date) -> int:
+    return d.year * 12 + d.month - 1
+
+
+def counts_dict(c: List[int]) -> Dict[str, int]:
+    """Contadores crudos → formato de get_stats_report."""
+    return {
+        "aprobadas": c[APR] + c[DES],
+        "destacadas": c[DES],
+        "rechazadas": c[REC],
+        "pendientes": c[OTRO],
+        "total": c[APR] + c[DES] + c[REC] + c[OTRO],
+        "puntos": c[APR] + 2 * c[DES],
+    }
+
+
+class StatsAggregates:
+    def __init__(self) -> None:
+        self.lock = threading.RLock()
+        self._stats: Optional[ColumnarTable] = None
+        self._raw: Optional[ColumnarTable] = None
+        self._stats_ver = -1
+        self._raw_ver = -1
+        self.rebuilds = 0
+        # Línea de base de meses archivados: user → [(primer día, último día, contadores)]
+        self._base: Dict[str, List[Tuple[int, int, List[int]]]] = {}
+        self._base_months: Dict[int, Dict[Tuple[str, str], List[int]]] = {}
+        self._reset()
+
+    def set_baseline(self, summaries: List[Dict[str, Any]]) -> None:
+        """
+        Resúmenes mensuales archivados (filas de RESUMEN_MENSUAL). Reemplaza la
+        línea de base anterior; no toca lo que viene de las réplicas.
+        """
+        base: Dict[str, List[Tuple[int, int, List[int]]]] = {}
+        months: Dict[int, Dict[Tuple[str, str], List[int]]] = {}
+        for r in summaries:
+            try:
+                y, m = (int(x) for x in str(r.get("MES", "")).strip().split("-"))
+                first = parse_date_ordinal(str(r.get("PRIMERA_FECHA", "")).strip())
+                last = parse_date_ordinal(str(r.get("ULTIMA_FECHA", "")).strip())
+                des = int(r.get("DESTACADAS") or 0)
+                c = [int(r.get("APROBADAS") or 0) - des, des,
+                     int(r.get("RECHAZADAS") or 0), int(r.get("PENDIENTES") or 0)]
+            except (TypeError, ValueError):
+                continue
+            if not first or not last:
+                continue
+            user = str(r.get("ID_USER", "")).strip()
+            vend = str(r.get("VENDEDOR", "")).strip()
+            for key in (user, ALL_USERS):
+                base.setdefault(key, []).append((first, last, c))
+            acc = months.setdefault(y * 12 + m - 1, {}).setdefault((user, vend), [0, 0, 0, 0])
+            for k in range(4):
+                acc[k] += c[k]
+        with self.lock:
+            self._base = base
+            self._base_months = months
+
+    def _reset(self) -> None:
+        # user → día (ordinal) → [APR, DES, REC, OTRO]
+        self._days: Dict[str, Dict[int, List[int]]] = {}
+        # mes → (user, vendedor) → [APR, DES, REC, OTRO]
+        self._months: Dict[int, Dict[Tuple[str, str], List[int]]] = {}
+        # Aporte actual de cada fila de STATS (para restarlo al cambiar)
+        self._row_code = array("b")
+        self._row_day = array("l")
+        self._row_user: List[str] = []
+        self._row_vend: List[str] = []
+        self._rows_by_uuid: Dict[str, List[int]] = {}
+        self._month_of_day: Dict[int, int] = {}
+
+    # ============================================================================
+    # CONSTRUCCIÓN / MANTENIMIENTO
+    # ============================================================================
+
+    def sync(self, stats: ColumnarTable, raw: Optional[ColumnarTable]) -> "StatsAggregates":
+        """Rearma si las tablas no son las que se vienen siguiendo (O(1) si lo son)."""
+        with self.lock:
+            if (
+                stats is self._stats and stats.version == self._stats_ver
+                and raw is self._raw and (raw is None or raw.version == self._raw_ver)
+            ):
+                return self
+            self._rebuild(stats, raw)
+            return self
+
+    def _rebuild(self, stats: ColumnarTable, raw: Optional[ColumnarTable]) -> None:
+        for old in (self._stats, self._raw):
+            if old is not None:
+                old.remove_listener(self._on_change)
+        self._reset()
+        self._stats, self._raw = stats, raw
+        uuid_to_user = raw.lookup("UUID", "ID_USER") if raw is not None else {}
+        if raw is not None:
+            raw.lookup("ID_USER", "USER_NAME")  # se mantiene en los appends
+
+        n = len(stats)
+        self._row_code = array("b", [-1]) * n
+        self._row_day = array("l", [0]) * n
+        self._row_user = [""] * n
+        self._row_vend = list(stats.strs("VENDEDOR"))
+        for i, u in enumerate(stats.strs("UUID_REF")):
+            if u:
+                self._rows_by_uuid.setdefault(u, []).append(i)
+                self._row_user[i] = uuid_to_user.get(u, "")
+        estados = stats.strs("ESTADO_AUDITORIA")
+        for i, o in enumerate(stats.dates("FECHA")):
+            if o:
+                self._row_day[i] = o
+                self._row_code[i] = _CODES.get(estados[i], OTRO)
+                self._add(i, 1)
+
+        stats.add_listener(self._on_change)
+        if raw is not None:
+            raw.add_listener(self._on_change)
+        self._stats_ver = stats.version
+        self._raw_ver = raw.version if raw is not None else -1
+        self.rebuilds += 1
+
+    def _bucket(self, i: int) -> Tuple[List[int], List[int], List[int]]:
+        day = self._row_day[i]
+        user = self._row_user[i]
+        mk = self._month_of_day.get(day)
+        if mk is None:
+            mk = self._month_of_day[day] = _month_key(date.fromordinal(day))
+        by_day = self._days.setdefault(user, {})
+        all_day = self._days.setdefault(ALL_USERS, {})
+        by_month = self._months.setdefault(mk, {})
+        return (
+            by_day.setdefault(day, [0, 0, 0, 0]),
+            all_day.setdefault(day, [0, 0, 0, 0]),
+            by_month.setdefault((user, self._row_vend[i]), [0, 0, 0, 0]),
+        )
+
+    def _add(self, i: int, sign: int) -> None:
+        code = self._row_code[i]
+        if code < 0:
+            return
+        for c in self._bucket(i):
+            c[code] += sign
+
+    def _recompute_row(self, i: int) -> None:
+        """Resta el aporte viejo de la fila i y suma el actual."""
+        stats = self._stats
+        self._add(i, -1)
+        o = stats.dates("FECHA")[i]
+        self._row_day[i] = o
+        self._row_code[i] = _CODES.get(stats.strs("ESTADO_AUDITORIA")[i], OTRO) if o else -1
+        self._row_vend[i] = stats.strs("VENDEDOR")[i]
+        self._add(i, 1)
+
+    def _on_change(self, tbl: ColumnarTable, event: str, i: int) -> None:
+        with self.lock:
+            # Las tablas solo cambian en el lugar a través de estos eventos; si
+            # se reemplazan (resincronización), sync() detecta el objeto nuevo.
+            if tbl is self._stats:
+                if event == "append":
+                    self._row_code.append(-1)
+                    self._row_day.append(0)
+                    u = tbl.strs("UUID_REF")[i]
+                    uuid_to_user = self._raw.lookup("UUID", "ID_USER") if self._raw is not None else {}
+                    self._row_user.append(uuid_to_user.get(u, "") if u else "")
+                    self._row_vend.append("")
+                    if u:
+                        self._rows_by_uuid.setdefault(u, []).append(i)
+                self._recompute_row(i)
+                self._stats_ver = tbl.version
+            elif tbl is self._raw:
+                if event == "append":
+                    u = tbl.strs("UUID")[i]
+                    user = tbl.strs("ID_USER")[i]
+                    if u and user:
+                        for row in self._rows_by_uuid.get(u, ()):
+                            if self._row_user[row] != user:
+                                self._add(row, -1)
+                                self._row_user[row] = user
+                                self._add(row, 1)
+                self._raw_ver = tbl.version
+
+    # ============================================================================
+    # CONSULTAS
+    # ============================================================================
+
+    def user_report(self, user_id: Optional[int], start_d: Optional[date],
+                    end_d: Optional[date]) -> Dict[str, Any]:
+        """Contadores de un usuario (o de todos si user_id es None) entre dos fechas."""
+        key = ALL_USERS if user_id is None else str(user_id)
+        total = [0, 0, 0, 0]
+        min_o = max_o = 0
+        with self.lock:
+            days = self._days.get(key, {})
+            if start_d is not None and end_d is not None and (end_d - start_d).days < len(days):
+                lo = start_d.toordinal()
+                items = [(o, days.get(o)) for o in range(lo, end_d.toordinal() + 1)]
+            else:
+                lo = start_d.toordinal() if start_d else 0
+                hi = end_d.toordinal() if end_d else date.max.toordinal()
+                items = [(o, c) for o, c in days.items() if lo <= o <= hi]
+            for o, c in items:
+                if not c or not any(c):
+                    continue
+                for k in range(4):
+                    total[k] += c[k]
+                min_o = o if not min_o else min(min_o, o)
+                max_o = max(max_o, o)
+            # Meses archivados: solo si caen enteros dentro del rango pedido
+            lo = start_d.toordinal() if start_d else 0
+            hi = end_d.toordinal() if end_d else date.max.toordinal()
+            for first, last, c in self._base.get(key, ()):
+                if first < lo or last > hi or not any(c):
+                    continue
+                for k in range(4):
+                    total[k] += c[k]
+                min_o = first if not min_o else min(min_o, first)
+                max_o = max(max_o, last)
+        return {"counts": counts_dict(total), "min_date": ordinal_to_date(min_o), "max_date": ordinal_to_date(max_o)}
+
+    def month_ranking(self, month_start: date, today: date) -> Dict[str, List[int]]:
+        """
+        Contadores del mes por vendedor (nombre resuelto). Si `today` no es el
+        último día del mes se suman solo los días hasta hoy (fechas futuras
+        cargadas a mano quedan afuera, como antes).
+        """
+        mk = _month_key(month_start)
+        with self.lock:
+            user_to_name = self._raw.lookup("ID_USER", "USER_NAME") if self._raw is not None else {}
+            future = self._future_in_month(mk, today)
+            out: Dict[str, List[int]] = {}
+            for (user, vend), c in self._months.get(mk, {}).items():
+                name = user_to_name.get(user, vend or "Sin nombre")
+                acc = out.setdefault(name, [0, 0, 0, 0])
+                for k in range(4):
+                    acc[k] += c[k]
+            for (user, vend), c in self._base_months.get(mk, {}).items():
+                name = user_to_name.get(user, vend or "Sin nombre")
+                acc = out.setdefault(name, [0, 0, 0, 0])
+                for k in range(4):
+                    acc[k] += c[k]
+            for (user, vend), c in future.items():
+                name = user_to_name.get(user, vend or "Sin nombre")
+                acc = out[name]
+                for k in range(4):
+                    acc[k] -= c[k]
+            return out
+
+    def _future_in_month(self, mk: int, today: date) -> Dict[Tuple[str, str], List[int]]:
+        """Aportes de filas del mes con fecha posterior a hoy (normalmente ninguna)."""
+        all_days = self._days.get(ALL_USERS, {})
+        t = today.toordinal()
+        end = date(mk // 12 + (mk % 12 + 1) // 12, (mk % 12 + 1) % 12 + 1, 1).toordinal()
+        if not any(any(all_days.get(o) or ()) for o in range(t + 1, end)):
+            return {}
+        out: Dict[Tuple[str, str], List[int]] = {}
+        for i, o in enumerate(self._row_day):
+            if t < o < end and self._row_code[i] >= 0:
+                c = out.setdefault((self._row_user[i], self._row_vend[i]), [0, 0, 0, 0])
+                c[self._row_code[i]] += 1
+        return out
+
+
+# ============================================================================
+# HISTORIAL DE CLIENTES
+# ============================================================================
+
+class ClientHistoryIndex:
+    """
+    (CLIENTE, CHAT_ID_REF) → [(-fecha, fila)] ordenado (más nueva primero; a
+    igual fecha, en orden de fila). Tipo y estado se leen de la vista columnar
+    al consultar, así un cambio de estado no toca el índice.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.RLock()
+        self._stats: Optional[ColumnarTable] = None
+        self._stats_ver = -1
+        self.rebuilds = 0
+        self._by_key: Dict[Tuple[str, int], List[Tuple[int, int]]] = {}
+        self._row_entry: List[Optional[Tuple[Tuple[str, int], int]]] = []
+        # Últimas visitas ya archivadas: (cliente, chat) → [(fecha, tipo, estado)] más nuevas primero
+        self._archived: Dict[Tuple[str, int], List[Tuple[str, str, str]]] = {}
+
+    def set_archived(self, archived: Dict[Tuple[str, int], List[Tuple[str, str, str]]]) -> None:
+        with self.lock:
+            self._archived = archived
+
+    def archived(self, cliente: str, chat_id: int, limit: int) -> List[Tuple[str, str, str]]:
+        with self.lock:
+            return list(self._archived.get((cliente, chat_id), ())[:limit])
+
+    def sync(self, stats: ColumnarTable) -> "ClientHistoryIndex":
+        with self.lock:
+            if stats is self._stats and stats.version == self._stats_ver:
+                return self
+            if self._stats is not None:
+                self._stats.remove_listener(self._on_change)
+            self._by_key = {}
+            self._row_entry = []
+            self._stats = stats
+            clientes = stats.strs("CLIENTE")
+            chats = stats.ints("CHAT_ID_REF")
+            dates = stats.dates("FECHA")
+            for i in range(len(stats)):
+                self._row_entry.append(None)
+                self._index_row(i, clientes[i], chats[i], dates[i])
+            stats.add_listener(self._on_change)
+            self._stats_ver = stats.version
+            self.rebuilds += 1
+            return self
+
+    def _index_row(self, i: int, cliente: str, chat: int, o: int) -> None:
+        if not cliente or not chat:
+            return
+        key = (cliente, chat)
+        # Filas en orden ascendente: append en vez de insort en la carga
+        entries = self._by_key.setdefault(key, [])
+        entry = (-o, i)
+        if not entries or entries[-1] < entry:
+            entries.append(entry)
+        else:
+            insort(entries, entry)
+        self._row_entry[i] = (key, -o)
+
+    def _on_change(self, tbl: ColumnarTable, event: str, i: int) -> None:
+        with self.lock:
+            if tbl is not self._stats:
+                return
+            if event == "append":
+                self._row_entry.append(None)
+            new = (tbl.strs("CLIENTE")[i], tbl.ints("CHAT_ID_REF")[i], tbl.dates("FECHA")[i])
+            old = self._row_entry[i]
+            if old is not None:
+                (cliente, chat), neg_o = old
+                if (cliente, chat, -neg_o) == new:
+                    self._stats_ver = tbl.version
+                    return  # solo cambió estado/sync: el índice no cambia
+                entries = self._by_key.get((cliente, chat), [])
+                if (neg_o, i) in entries:
+                    entries.remove((neg_o, i))
+                self._row_entry[i] = None
+            self._index_row(i, *new)
+            self._stats_ver = tbl.version
+
+    def lookup(self, cliente: str, chat_id: int, limit: int) -> List[int]:
+        """Filas (índices de la vista) del cliente en el grupo, más nuevas primero."""
+        with self.lock:
+            entries = self._by_key.get((cliente, chat_id), ())
+            return [i for _, i in entries[:limit]]
@@ -16,6 +16,11 @@ try:
 except ImportError:
     logger = logging.getLogger("SemaforoMonitor")
 
+try:
+    from rate_limiter import LANE_HOUSEKEEPING, LANE_SYNC, call_in_lane
+except ImportError:
+    from src.rate_limiter import LANE_HOUSEKEEPING, LANE_SYNC, call_in_lane
+
 
 class SemaforoMonitor:
     """
@@ -81,7 +86,9 @@ class SemaforoMonitor:
         try:
             # Ejecutar en thread pool para no bloquear el event loop
             loop = asyncio.get_event_loop()
-            estado_info = await loop.run_in_executor(None, self.sheets.get_semaforo_estado)
+            estado_info = await loop.run_in_executor(
+                None, call_in_lane, LANE_HOUSEKEEPING, self.sheets.get_semaforo_estado
+            )
             
             nuevo_estado = estado_info.get("estado", "LIBRE")
             self.ultimo_chequeo = datetime.now()
@@ -134,7 +141,9 @@ class SemaforoMonitor:
         """Procesa imágenes que llegaron durante la distribución."""
         try:
             loop = asyncio.get_event_loop()
-            pendientes = await loop.run_in_executor(None, self.sheets.get_imagenes_pendientes)
+            pendientes = await loop.run_in_executor(
+                None, call_in_lane, LANE_SYNC, self.sheets.get_imagenes_pendientes
+            )
             
             if not pendientes:
                 logger.info("📭 No hay imágenes pendientes")
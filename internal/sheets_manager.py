@@ -1,6 +1,7 @@
 # file: src/sheets_manager.py
 import base64
 import io
+import json
 import logging
 import os
 import ssl
@@ -8,16 +9,20 @@ import sys
 import uuid
 import time
 import random
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
+import google_auth_httplib2
 import gspread
+import httplib2
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseDownload, MediaIoBaseUpload
+from googleapiclient.http import HttpRequest, MediaIoBaseDownload, MediaIoBaseUpload
 
 try:
     from zoneinfo import ZoneInfo
@@ -115,6 +120,67 @@ except Exception as e:
         f"No se pudo importar ConfigManager. Revisá la carpeta CONFIG_GLOBAL. Detalle: {e}"
     )
 
+_shared_cfg: Optional[Any] = None
+_shared_cfg_lock = threading.Lock()
+
+
+def get_config_manager() -> Any:
+    """ConfigManager único por proceso (evita re-leer config.json en cada manager)."""
+    global _shared_cfg
+    with _shared_cfg_lock:
+        if _shared_cfg is None:
+            _shared_cfg = ConfigManager()
+        return _shared_cfg
+
+try:
+    from api_metrics import ApiMetrics, InstrumentedDrive, InstrumentedSpreadsheet, InstrumentedWorksheet, is_quota_error
+except ImportError:
+    from src.api_metrics import ApiMetrics, InstrumentedDrive, InstrumentedSpreadsheet, InstrumentedWorksheet, is_quota_error
+
+try:
+    from rate_limiter import LANE_HOUSEKEEPING, LANE_SYNC, RateLimitExceeded, call_in_lane, get_rate_limiter, lane_api
+except ImportError:
+    from src.rate_limiter import LANE_HOUSEKEEPING, LANE_SYNC, RateLimitExceeded, call_in_lane, get_rate_limiter, lane_api
+
+try:
+    from local_cache import LOCAL_CACHE_PATH, LOCAL_CACHE_SWR_MAX_STALE_SECONDS, LocalCache
+except ImportError:
+    from src.local_cache import LOCAL_CACHE_PATH, LOCAL_CACHE_SWR_MAX_STALE_SECONDS, LocalCache
+
+try:
+    from columnar_store import (
+        ESTADO_PENDIENTE, RAW_LOGS_SCHEMA, STATS_SCHEMA, ColumnarTable, parse_date_ordinal,
+    )
+except ImportError:
+    from src.columnar_store import (
+        ESTADO_PENDIENTE, RAW_LOGS_SCHEMA, STATS_SCHEMA, ColumnarTable, parse_date_ordinal,
+    )
+
+try:
+    from single_flight import SingleFlight
+except ImportError:
+    from src.single_flight import SingleFlight
+
+try:
+    from report_aggregates import ClientHistoryIndex, StatsAggregates, counts_dict
+except ImportError:
+    from src.report_aggregates import ClientHistoryIndex, StatsAggregates, counts_dict
+
+try:
+    from drive_uploader import DRIVE_MULTIPART_MAX_BYTES, DriveUploadResult, DriveUploadService
+except ImportError:
+    from src.drive_uploader import DRIVE_MULTIPART_MAX_BYTES, DriveUploadResult, DriveUploadService
+
+try:
+    from image_renditions import make_renditions, rendition_filename
+except ImportError:
+    from src.image_renditions import make_renditions, rendition_filename
+
+try:
+    from storage_backend import SQLITE_DB_PATH, STORAGE_BACKEND, SHEETS_MIRROR_INTERVAL_SECONDS, SheetsMirror, SqliteStorage
+except ImportError:
+    from src.storage_backend import SQLITE_DB_PATH, STORAGE_BACKEND, SHEETS_MIRROR_INTERVAL_SECONDS, SheetsMirror, SqliteStorage
+
 
 @dataclass
 class UploadInfo:
@@ -122,63 +188,836 @@ class UploadInfo:
     file_id: str
 
 
+STATS_HEADERS = [
+    "FECHA", "HORA", "VENDEDOR", "GRUPO", "CLIENTE", "TIPO_PDV",
+    "LINK_FOTO", "ESTADO_AUDITORIA", "COMENTARIOS", "UUID_REF",
+    "MSG_ID_SUPERVISOR", "CONTEO_GRUPO", "CHAT_ID_REF", "SYNC_TELEGRAM",
+    "LINK_WEB", "LINK_THUMB",
+]
+# Columnas que se copian a las pestañas STATS_AAAA_MM (+ ID_USER); las
+# versiones livianas de las fotos solo sirven para los visores de lo reciente
+ARCHIVE_STATS_HEADERS = STATS_HEADERS[:STATS_HEADERS.index("SYNC_TELEGRAM") + 1]
+
+RAW_LOGS_HEADERS = [
+    "UUID", "TIMESTAMP", "ID_USER", "USER_NAME", "TYPE", "FILE_ID",
+    "URL_DRIVE", "RAW_JSON", "CLIENT_INPUT", "STATUS", "HASH", "IS_FRAUD",
+]
+
+COLA_IMAGENES_HEADERS = ["UUID_MSG", "CHAT_ID", "USER_ID", "USERNAME", "FILE_ID", "TIMESTAMP", "MSG_ID", "PROCESADO"]
+
+# Réplicas locales de pestañas append-only: cada cuánto se reconcilian con Sheets.
+# - tail: filas nuevas (appends de otros procesos) + columnas mutables
+# - full: re-descarga completa (corrige borrados/ediciones fuera de las mutables)
+STATS_REPLICA_REFRESH_SECONDS = float(os.getenv("STATS_REPLICA_REFRESH_SECONDS", "20"))
+STATS_REPLICA_FULL_RESYNC_SECONDS = float(os.getenv("STATS_REPLICA_FULL_RESYNC_SECONDS", "1800"))
+TAIL_REPLICA_REFRESH_SECONDS = float(os.getenv("TAIL_REPLICA_REFRESH_SECONDS", "20"))
+TAIL_REPLICA_FULL_RESYNC_SECONDS = float(os.getenv("TAIL_REPLICA_FULL_RESYNC_SECONDS", "1800"))
+
+# Archivo mensual (ver archive_closed_months): STATS/RAW_LOGS conservan el mes
+# en curso + ARCHIVE_KEEP_MONTHS meses cerrados; lo anterior pasa a pestañas
+# STATS_AAAA_MM / RAW_LOGS_AAAA_MM (en ARCHIVE_SPREADSHEET_ID si está definido).
+# Apagado por defecto: el bot (/stats, /ranking, historial de PDV) suma los
+# resúmenes RESUMEN_*, pero el dashboard lee STATS entero con get_all_records
+# y deja de mostrar lo archivado (totales, rankings y filtros por fecha solo
+# cubren los meses que quedan en la hoja viva). El visor solo lista pendientes,
+# que nunca se archivan. Activar con ARCHIVE_ENABLED=1 asumiendo ese recorte.
+ARCHIVE_ENABLED = os.getenv("ARCHIVE_ENABLED", "0").strip().lower() in ("1", "true", "yes")
+ARCHIVE_KEEP_MONTHS = max(1, int(os.getenv("ARCHIVE_KEEP_MONTHS", "2")))
+ARCHIVE_SPREADSHEET_ID = os.getenv("ARCHIVE_SPREADSHEET_ID", "").strip()
+ARCHIVE_MAX_ROWS_PER_RUN = int(os.getenv("ARCHIVE_MAX_ROWS_PER_RUN", "20000"))
+ARCHIVE_SUMMARY_TTL_SECONDS = float(os.getenv("ARCHIVE_SUMMARY_TTL_SECONDS", str(6 * 3600)))
+ARCHIVE_CLIENT_HISTORY_KEEP = 5
+# Meses copiados al archivo cuyo resumen espera a que sus filas salgan de STATS:
+# se guardan en BOT_CONTROL (no en la cache local, que puede perderlos)
+ARCHIVE_PENDING_CELL = "F2"
+
+# IDs de carpetas Drive (grupo y grupo/dd-mm-yyyy), persistidos en la cache
+# local: sobreviven a reinicios. Las de fecha solo sirven un par de días.
+DRIVE_FOLDER_CACHE_TTL_SECONDS = float(os.getenv("DRIVE_FOLDER_CACHE_TTL_SECONDS", str(30 * 86400)))
+DRIVE_DATE_FOLDER_CACHE_TTL_SECONDS = float(os.getenv("DRIVE_DATE_FOLDER_CACHE_TTL_SECONDS", str(2 * 86400)))
+
+# Cada cuánto se relee BOT_CONTROL!E2 (época de roles) fuera del polling del semáforo
+ROLES_EPOCH_TTL_SECONDS = float(os.getenv("ROLES_EPOCH_TTL_SECONDS", "60"))
+
+RESUMEN_MENSUAL_HEADERS = [
+    "MES", "ID_USER", "VENDEDOR", "APROBADAS", "DESTACADAS", "RECHAZADAS",
+    "PENDIENTES", "TOTAL", "PUNTOS", "PRIMERA_FECHA", "ULTIMA_FECHA",
+]
+# ULTIMAS: JSON [[fecha, tipo, estado, uuid], ...] (más nueva primero)
+RESUMEN_CLIENTES_HEADERS = ["CLIENTE", "CHAT_ID", "ULTIMAS", "ACTUALIZADO"]
+
+
+class TailReplica:
+    """
+    Réplica en memoria de una pestaña que crece por appends.
+
+    - Se carga una vez con get_all_values().
+    - Nuestras escrituras (appends, patches, borrados) la actualizan en el
+      lugar (write-through).
+    - Se reconcilia con UNA llamada (batch_get): header + cola desde la última
+      fila conocida (+ columnas mutables, si las hay). La fila de solapamiento
+      se compara por `key_col`; header distinto, cola vacía o clave que no
+      coincide = borrados/ediciones → resincronización completa.
+
+    rows[i] corresponde a la fila i + 2 de la hoja (fila 1 = header).
+    Todos los valores se guardan como str (igual que get_all_values()).
+    """
+
+    def __init__(
+        self,
+        sheet: str,
+        headers: List[str],
+        key_col: int = 1,
+        mutable_first_col: Optional[int] = None,
+        refresh_seconds: float = TAIL_REPLICA_REFRESH_SECONDS,
+        full_resync_seconds: float = TAIL_REPLICA_FULL_RESYNC_SECONDS,
+        schema: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self.sheet = sheet
+        self.schema = dict(schema or {})
+        self.default_header = list(headers)
+        self.key_col = key_col
+        self.mutable_first_col = mutable_first_col
+        self.refresh_seconds = refresh_seconds
+        self.full_resync_seconds = full_resync_seconds
+        self.lock = threading.RLock()
+        self.header: List[str] = list(headers)
+        self.rows: List[List[str]] = []
+        self.loaded: bool = False
+        self.loaded_at: float = 0.0
+        self.refreshed_at: float = 0.0
+        self.version: int = 0
+        self._records_cache: Optional[Tuple[int, List[Dict[str, Any]]]] = None
+        self._columnar: Optional[ColumnarTable] = None
+
+    @property
+    def width(self) -> int:
+        return max(len(self.header), len(self.default_header))
+
+    def _norm(self, row: List[Any]) -> List[str]:
+        vals = ["" if v is None else str(v) for v in row]
+        if len(vals) < self.width:
+            vals.extend([""] * (self.width - len(vals)))
+        return vals
+
+    @staticmethod
+    def _trimmed(row: List[Any]) -> List[str]:
+        vals = ["" if v is None else str(v).strip() for v in row]
+        while vals and not vals[-1]:
+            vals.pop()
+        return vals
+
+    def _key(self, row: List[str]) -> str:
+        return row[self.key_col - 1].strip() if len(row) >= self.key_col else ""
+
+    def load(self, all_vals: List[List[Any]]) -> None:
+        with self.lock:
+            if all_vals:
+                self.header = [str(h).strip() for h in all_vals[0]] or list(self.default_header)
+            rows = [self._norm(r) for r in (all_vals[1:] if all_vals else [])]
+            # get_all_values() no trae filas vacías del final; las del medio sí
+            while rows and not any(v.strip() for v in rows[-1]):
+                rows.pop()
+            self.rows = rows
+            self.loaded = True
+            self.loaded_at = self.refreshed_at = time.time()
+            self.version += 1
+
+    def needs_full(self, now: float) -> bool:
+        return (not self.loaded) or (now - self.loaded_at) >= self.full_resync_seconds
+
+    def refresh_ranges(self, col_letter: Callable[[int], str]) -> List[str]:
+        """Rangos A1 de la lectura incremental: header, cola y (opcional) mutables."""
+        n = len(self.rows)
+        last_col = col_letter(self.width)
+        # Arrancamos en la última fila conocida (siempre existe en la grilla)
+        ranges = [f"A1:{last_col}1", f"A{n + 1 if n else 2}:{last_col}"]
+        if n and self.mutable_first_col:
+            ranges.append(f"{col_letter(self.mutable_first_col)}2:{last_col}{n + 1}")
+        return ranges
+
+    def append(self, sheet_row: Optional[int], values: List[Any]) -> bool:
+        """
+        Agrega una fila escrita por nosotros. Devuelve False si la fila no es
+        la siguiente esperada (hubo appends externos): la próxima lectura de
+        cola la va a traer.
+        """
+        with self.lock:
+            if not self.loaded:
+                return False
+            expected = len(self.rows) + 2
+            if sheet_row is not None and sheet_row != expected:
+                self.refreshed_at = 0.0  # forzar lectura de cola
+                return False
+            row = self._norm(values)
+            self.rows.append(row)
+            self.version += 1
+            tbl = self._columnar
+            if tbl is not None and tbl.version == self.version - 1:
+                tbl.append_row(row, self.version)
+            return True
+
+    def patch(self, sheet_row: int, updates: Dict[int, Any]) -> None:
+        """updates: {columna (1-based): valor}"""
+        with self.lock:
+            idx = sheet_row - 2
+            if not self.loaded or idx < 0 or idx >= len(self.rows):
+                return
+            row = self.rows[idx]
+            for col, val in updates.items():
+                if col - 1 < len(row):
+                    row[col - 1] = "" if val is None else str(val)
+            self.version += 1
+            tbl = self._columnar
+            if tbl is not None and tbl.version == self.version - 1:
+                tbl.set_row(idx, row, self.version)
+
+    def apply_refresh(self, header: List[Any], tail: List[List[Any]], mutable: List[List[Any]]) -> bool:
+        """
+        Aplica la lectura incremental. `tail` arranca en la última fila conocida
+        (solapamiento de 1 fila para verificar alineación). Devuelve False si
+        detecta desalineación (header cambiado, filas borradas) y hace falta
+        una resincronización completa.
+        """
+        with self.lock:
+            if self._trimmed(header) != self._trimmed(self.header):
+                return False
+            if self.rows:
+                if not tail or self._key(self._norm(tail[0])) != self._key(self.rows[-1]):
+                    return False
+                tail = tail[1:]
+            changed_rows: List[int] = []
+            appended: List[List[str]] = []
+            if self.mutable_first_col and mutable:
+                first = self.mutable_first_col - 1
+                key_off = self.key_col - 1 - first
+                for i, vals in enumerate(mutable):
+                    if i >= len(self.rows):
+                        break
+                    row = self.rows[i]
+                    vals = ["" if v is None else str(v) for v in vals]
+                    if key_off >= 0:
+                        new_key = vals[key_off].strip() if len(vals) > key_off else ""
+                        if new_key != self._key(row):
+                            return False
+                    row_changed = False
+                    for j in range(first, self.width):
+                        k = j - first
+                        v = vals[k] if k < len(vals) else ""
+                        if row[j] != v:
+                            row[j] = v
+                            row_changed = True
+                    if row_changed:
+                        changed_rows.append(i)
+            # Las filas vacías del medio se conservan (como en load()): rows[i]
+            # tiene que seguir siendo la fila i + 2 de la hoja
+            appended = [self._norm(r) for r in tail]
+            while appended and not any(v.strip() for v in appended[-1]):
+                appended.pop()
+            self.rows.extend(appended)
+            self.refreshed_at = time.time()
+            if changed_rows or appended:
+                # Sin cambios no se invalidan records()/columnar()
+                self.version += 1
+                tbl = self._columnar
+                if tbl is not None and tbl.version == self.version - 1:
+                    # Cambios externos chicos: se aplican a la vista columnar en el lugar
+                    for i in changed_rows:
+                        tbl.set_row(i, self.rows[i], self.version)
+                    for r in appended:
+                        tbl.append_row(r, self.version)
+            return True
+
+    def delete_rows(self, start: int, end: int) -> None:
+        """Refleja un ws.delete_rows(start, end) hecho por nosotros."""
+        with self.lock:
+            if not self.loaded:
+                return
+            del self.rows[max(start - 2, 0):max(end - 1, 0)]
+            self.version += 1
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Filas como dicts keyed por header (equivalente a get_all_records)."""
+        with self.lock:
+            cached = self._records_cache
+            if cached and cached[0] == self.version:
+                return cached[1]
+            hdr = self.header
+            out = [dict(zip(hdr, r)) for r in self.rows]
+            self._records_cache = (self.version, out)
+            return out
+
+    def columnar(self) -> ColumnarTable:
+        """Vista columnar de las columnas de `schema`, armada una vez por versión."""
+        with self.lock:
+            tbl = self._columnar
+            if tbl is None or tbl.version != self.version:
+                tbl = ColumnarTable(self.header, self.rows, self.schema, self.version)
+                self._columnar = tbl
+            return tbl
+
+    def column(self, col: int) -> List[str]:
+        """Valores de una columna (1-based), sin header."""
+        with self.lock:
+            return [r[col - 1] if len(r) >= col else "" for r in self.rows]
+
+
+class StatsReplica(TailReplica):
+    """Réplica de STATS: clave UUID_REF, columnas mutables ESTADO_AUDITORIA..SYNC_TELEGRAM."""
+
+    MUTABLE_FIRST_COL = STATS_HEADERS.index("ESTADO_AUDITORIA") + 1  # H
+    UUID_COL = STATS_HEADERS.index("UUID_REF") + 1                    # J
+
+    def __init__(self) -> None:
+        super().__init__(
+            "STATS",
+            STATS_HEADERS,
+            key_col=self.UUID_COL,
+            mutable_first_col=self.MUTABLE_FIRST_COL,
+            refresh_seconds=STATS_REPLICA_REFRESH_SECONDS,
+            full_resync_seconds=STATS_REPLICA_FULL_RESYNC_SECONDS,
+            schema=STATS_SCHEMA,
+        )
+
+
+# Un UUID que no está en el índice puede haber sido agregado por otro proceso:
+# se permite reconstruir el índice (1 lectura de columna) como mucho cada N seg.
+UUID_INDEX_MIN_RELOAD_SECONDS = 15.0
+
+
+class UuidRowIndex:
+    """
+    Índice UUID → número de fila (1-based) de una pestaña.
+
+    Se construye con UNA lectura de columna (col_values) y se mantiene con
+    cada append (fila devuelta por la API) y cada borrado de filas nuestro.
+    """
+
+    def __init__(self, sheet: str, col: int) -> None:
+        self.sheet = sheet
+        self.col = col
+        self.lock = threading.RLock()
+        self.rows: Dict[str, int] = {}
+        self.loaded: bool = False
+        self.loaded_at: float = 0.0
+
+    def load(self, col_vals: List[Any]) -> None:
+        """col_vals: columna completa incluyendo header (fila 1)."""
+        with self.lock:
+            self.rows = {}
+            for i, v in enumerate(col_vals[1:], start=2):
+                key = str(v).strip()
+                if key:
+                    self.rows[key] = i
+            self.loaded = True
+            self.loaded_at = time.time()
+
+    def get(self, uuid_ref: str) -> Optional[int]:
+        with self.lock:
+            return self.rows.get(str(uuid_ref).strip())
+
+    def add(self, uuid_ref: str, row: Optional[int]) -> None:
+        with self.lock:
+            if not self.loaded:
+                return
+            if row is None:
+                # No sabemos dónde quedó: la próxima búsqueda reconstruye.
+                self.loaded = False
+                return
+            self.rows[str(uuid_ref).strip()] = row
+
+    def invalidate(self) -> None:
+        with self.lock:
+            self.loaded = False
+            self.loaded_at = 0.0
+
+    def can_reload(self) -> bool:
+        return (time.time() - self.loaded_at) >= UUID_INDEX_MIN_RELOAD_SECONDS
+
+    def rows_deleted(self, start: int, end: int) -> None:
+        with self.lock:
+            n = end - start + 1
+            shifted: Dict[str, int] = {}
+            for key, row in self.rows.items():
+                if row < start:
+                    shifted[key] = row
+                elif row > end:
+                    shifted[key] = row - n
+            self.rows = shifted
+
+
+# Escrituras diferidas (no críticas): se juntan durante esta ventana y se
+# envían en un único batch_update por pestaña.
+WRITE_COALESCE_WINDOW_SECONDS = float(os.getenv("WRITE_COALESCE_WINDOW_SECONDS", "2.0"))
+# Intentos por rango diferido: pasado el tope se descarta (son escrituras no críticas)
+DEFERRED_WRITE_MAX_ATTEMPTS = int(os.getenv("DEFERRED_WRITE_MAX_ATTEMPTS", "3"))
+
+
+class WriteBatch:
+    """
+    Junta escrituras de celdas/rangos de UNA pestaña y las envía en un único
+    values.batchUpdate (pasando por _gspread_call: cooldown, reintentos).
+
+    Uso:
+        with self._write_batch("STATS", ws) as wb:
+            wb.set_cell(row, 8, "Aprobado")
+            wb.set_cell(row, 9, nota)
+        # flush automático al salir del with (si no hubo excepción)
+
+    Escrituras repetidas a la misma celda/rango: gana la última.
+    """
+
+    def __init__(self, manager: "SheetsManager", sheet: str, ws: Any, value_input_option: str = "USER_ENTERED") -> None:
+        self.manager = manager
+        self.sheet = sheet
+        self.ws = ws
+        self.value_input_option = value_input_option
+        self._data: Dict[str, List[List[Any]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def set_cell(self, row: int, col: int, value: Any) -> "WriteBatch":
+        self._data[f"{SheetsManager._col_letter(col)}{row}"] = [[value]]
+        return self
+
+    def set_range(self, a1_range: str, values: List[List[Any]]) -> "WriteBatch":
+        self._data[a1_range] = values
+        return self
+
+    def updates(self) -> Dict[str, List[List[Any]]]:
+        return dict(self._data)
+
+    def flush(self) -> bool:
+        """Envía lo acumulado. True si no había nada o se escribió OK."""
+        if not self._data:
+            return True
+        payload = [{"range": rng, "values": vals} for rng, vals in self._data.items()]
+        self.manager._gspread_call(
+            lambda: self.ws.batch_update(payload, value_input_option=self.value_input_option),
+            op=f"{self.sheet}:batch_update[{len(payload)}]",
+            retries=2,
+            allow_cache_on_error=False,
+        )
+        self._data = {}
+        return True
+
+    def __enter__(self) -> "WriteBatch":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc_type is None:
+            self.flush()
+        return False
+
+
+# Cola de appends (RAW_LOGS / STATS): las filas de register_image se juntan y
+# se escriben con un único append_rows por pestaña al llegar a
+# APPEND_QUEUE_MAX_ROWS o cuando vence APPEND_QUEUE_DEADLINE_SECONDS.
+APPEND_QUEUE_MAX_ROWS = int(os.getenv("APPEND_QUEUE_MAX_ROWS", "10"))
+APPEND_QUEUE_DEADLINE_SECONDS = float(os.getenv("APPEND_QUEUE_DEADLINE_SECONDS", "1.5"))
+# Tickets fallidos que se recuerdan para que wait_for_append(uuid) los reporte
+APPEND_FAILED_KEEP = 500
+
+
+class AppendTicket:
+    """
+    Handle de una fila encolada. `wait()` bloquea hasta que la fila fue
+    escrita en Sheets (o falló) y devuelve True si quedó registrada.
+    `rows` tiene la fila final en cada pestaña una vez escrita.
+    """
+
+    def __init__(self, uuid_ref: str, sheets: Tuple[str, ...]) -> None:
+        self.uuid = uuid_ref
+        self.rows: Dict[str, Optional[int]] = {}
+        self.errors: Dict[str, str] = {}
+        self._pending = set(sheets)
+        self._lock = threading.Lock()
+        self._event = threading.Event()
+        if not self._pending:
+            self._event.set()
+
+    @property
+    def done(self) -> bool:
+        return self._event.is_set()
+
+    @property
+    def ok(self) -> bool:
+        return self.done and not self.errors
+
+    def _resolve(self, sheet: str, row: Optional[int], error: str = "") -> None:
+        with self._lock:
+            if error:
+                self.errors[sheet] = error
+            else:
+                self.rows[sheet] = row
+            self._pending.discard(sheet)
+            if not self._pending:
+                self._event.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        self._event.wait(timeout)
+        return self.ok
+
+
+# Cooldown tras un 429. Con el rate limiter por delante un 429 es raro y la
+# cuota de Google es por minuto: no tiene sentido congelar el bot 15 minutos.
+QUOTA_COOLDOWN_BASE_SECONDS = float(os.getenv("QUOTA_COOLDOWN_BASE_SECONDS", "20"))
+QUOTA_COOLDOWN_MAX_SECONDS = float(os.getenv("QUOTA_COOLDOWN_MAX_SECONDS", "120"))
+
+# Conexión perezosa: __init__ no toca la red; se conecta en el primer uso.
+SHEETS_LAZY_CONNECT = os.getenv("SHEETS_LAZY_CONNECT", "1").strip().lower() not in ("0", "false", "no")
+SHEETS_CONNECT_RETRY_SECONDS = 60.0
+# Metadata del spreadsheet (pestañas → gid, chequeo de estructura) compartida
+# entre procesos (bot, visor, dashboard, GUI) en un JSON local.
+SHEETS_META_CACHE_PATH = os.getenv(
+    "SHEETS_META_CACHE_PATH",
+    str(Path(__file__).resolve().parent.parent / "data" / "sheets_meta_cache.json"),
+)
+SHEETS_META_CACHE_TTL_SECONDS = float(os.getenv("SHEETS_META_CACHE_TTL_SECONDS", str(6 * 3600)))
+
+
+class MetadataCache:
+    """
+    Cache en disco de la metadata de un spreadsheet:
+        {sheet_id: {"saved_at", "spreadsheet": props, "worksheets": {title: props},
+                    "sheet_map": {lógico: título}, "structure_ok": bool}}
+    Escritura atómica (tmp + replace) para que varios procesos la compartan.
+    """
+
+    def __init__(self, path: str = SHEETS_META_CACHE_PATH, ttl_seconds: float = SHEETS_META_CACHE_TTL_SECONDS) -> None:
+        self.path = Path(path)
+        self.ttl = ttl_seconds
+        self._lock = threading.Lock()
+
+    def _read_all(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def load(self, sheet_id: str) -> Optional[Dict[str, Any]]:
+        if self.ttl <= 0 or not sheet_id:
+            return None
+        entry = self._read_all().get(sheet_id)
+        if not isinstance(entry, dict):
+            return None
+        if time.time() - float(entry.get("saved_at") or 0) > self.ttl:
+            return None
+        return entry
+
+    def save(self, sheet_id: str, entry: Dict[str, Any]) -> None:
+        if self.ttl <= 0 or not sheet_id:
+            return
+        with self._lock:
+            data = self._read_all()
+            data[sheet_id] = dict(entry, saved_at=time.time())
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(tmp, self.path)
+            except OSError as e:
+                logger.warning(f"⚠️ No se pudo guardar cache de metadata: {e}")
+
+    def invalidate(self, sheet_id: str) -> None:
+        with self._lock:
+            data = self._read_all()
+            if data.pop(sheet_id, None) is None:
+                return
+            try:
+                tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(tmp, self.path)
+            except OSError:
+                pass
+
+
 class SheetsManager:
     """
     Google Sheets + Drive.
     """
 
-    def __init__(self):
+    def __init__(self, storage: Optional[Any] = None, drive_service: Optional[Any] = None):
+        """
+        Args:
+            storage: spreadsheet ya construido (SqliteStorage, fake_google.FakeSpreadsheet
+                u otro con la interfaz de storage_backend.StorageBackend). Si se pasa,
+                no se conecta a Google Sheets. Sin él, el backend sale de
+                SHEETS_BACKEND / google_cloud.storage_backend ("gspread" o "sqlite").
+            drive_service: servicio Drive v3 ya construido (o fake_google.FakeDriveService).
+
+        No toca la red: la conexión y el chequeo de estructura corren en el primer
+        acceso a `spreadsheet`/`drive_service` (o con connect()), salvo
+        SHEETS_LAZY_CONNECT=0.
+        """
         logger.info("="*60)
         logger.info("📊 Inicializando SheetsManager...")
         logger.info("="*60)
-        self.cfg = ConfigManager()
+        self.cfg = get_config_manager()
+
+        # Conexión perezosa (ver _ensure_connected): spreadsheet/drive_service
+        # son properties que conectan en el primer acceso.
+        self._connect_lock = threading.RLock()
+        self._connected = False
+        self._connecting = False
+        self._next_connect_at = 0.0
+        self._meta_cache = MetadataCache()
+        self._sheet_id = ""
 
         self.gc = None
-        self.drive_service = None
-        self.spreadsheet = None
+        self._drive_service = None
+        self._spreadsheet = None
+        self.storage_backend = "gspread"
+        self.mirror: Optional[SheetsMirror] = None
+        self._injected_storage = storage
+        self._injected_drive = drive_service
 
         self.sheet_map: Dict[str, str] = {}
         self._ws_cache: Dict[str, Any] = {}
         self._drive_folder_cache: Dict[Tuple[str, str], str] = {}
+        # Subidas a Drive: cola acotada + workers propios (ver drive_uploader)
+        self.drive_uploads = DriveUploadService()
 
         # Local cache (best-effort) to reduce Google API reads.
-        # Keys are small strings; values are (expires_epoch, payload).
-        self._local_cache: Dict[str, Tuple[float, Any]] = {}
+        # LRU con TTL por clave; persiste en disco al conectar (ver LocalCache.attach).
+        self._local_cache = LocalCache(path=LOCAL_CACHE_PATH if storage is None else None)
+        self._flights = SingleFlight()
         # Quota protection (Sheets/Drive are rate-limited per user).
         self._quota_cooldown_until: float = 0.0
         self._quota_strikes: int = 0
 
+        # Réplicas locales de pestañas append-only (ver TailReplica)
+        self._stats_replica = StatsReplica()
+        self._aggregates = StatsAggregates()
+        self._client_history = ClientHistoryIndex()
+        # Archivo mensual: pestañas de archivo/resumen y últimos resúmenes aplicados
+        self._archive_spreadsheet: Optional[Any] = None
+        self._archive_ws_cache: Dict[str, Any] = {}
+        self._archive_applied: Tuple[Any, Any] = (None, None)
+        # GROUP_ROLES parseada: (lectura cacheada de origen, índices); ver _group_roles_index
+        self._group_roles_parsed: Optional[Tuple[Any, Any]] = None
+        self.roles_epoch = 0
+        self._tails: Dict[str, TailReplica] = {
+            "STATS": self._stats_replica,
+            "RAW_LOGS": TailReplica("RAW_LOGS", RAW_LOGS_HEADERS, key_col=1, schema=RAW_LOGS_SCHEMA),
+            "COLA_IMAGENES": TailReplica(
+                "COLA_IMAGENES", COLA_IMAGENES_HEADERS, key_col=1,
+                mutable_first_col=COLA_IMAGENES_HEADERS.index("PROCESADO") + 1,
+            ),
+        }
+        # Escrituras diferidas por (pestaña, value_input_option), ver _defer_write
+        self._deferred_writes: Dict[Tuple[str, str], Dict[str, List[List[Any]]]] = {}
+        self._deferred_lock = threading.Lock()
+        self._deferred_timer: Optional[threading.Timer] = None
+        self._deferred_attempts: Dict[Tuple[str, str, str], int] = {}
+        # Cola de appends por pestaña: lista de (uuid, fila, ticket), ver _enqueue_append
+        self._append_queue: Dict[str, List[Tuple[str, List[Any], AppendTicket]]] = {}
+        self._append_tickets: Dict[str, AppendTicket] = {}
+        self._failed_appends: "OrderedDict[str, AppendTicket]" = OrderedDict()
+        self._append_lock = threading.Lock()
+        self._append_flush_lock = threading.Lock()
+        self._append_timer: Optional[threading.Timer] = None
+        # Índices UUID → fila (evitan ws.find() sobre toda la hoja)
+        self._uuid_index: Dict[str, UuidRowIndex] = {
+            "STATS": UuidRowIndex("STATS", STATS_HEADERS.index("UUID_REF") + 1),
+            "RAW_LOGS": UuidRowIndex("RAW_LOGS", 1),
+        }
+
         self.last_error: str = ""
+        # Contadores/latencias de toda llamada a Sheets/Drive (ver api_metrics)
+        self.api_metrics = ApiMetrics()
+        # Token bucket compartido con HostLock: se toma un token antes de cada llamada
+        self.rate_limiter = get_rate_limiter()
 
-        self._connect()
-        self._check_structure_safe()
+        if not SHEETS_LAZY_CONNECT:
+            self.connect()
 
     def is_connected(self) -> bool:
         return self.spreadsheet is not None
 
+    # ============================================================================
+    # CONEXIÓN PEREZOSA
+    # ============================================================================
 
-    def _cache_get(self, key: str, *, allow_expired: bool = False) -> Optional[Any]:
-        item = self._local_cache.get(key)
-        if not item:
+    @property
+    def spreadsheet(self) -> Any:
+        if not self._connected:
+            self._ensure_connected()
+        return self._spreadsheet
+
+    @spreadsheet.setter
+    def spreadsheet(self, value: Any) -> None:
+        self._spreadsheet = value
+
+    @property
+    def drive_service(self) -> Any:
+        if not self._connected:
+            self._ensure_connected()
+        return self._drive_service
+
+    @drive_service.setter
+    def drive_service(self, value: Any) -> None:
+        self._drive_service = value
+
+    def connect(self) -> bool:
+        """Conecta ya (en vez de esperar al primer uso). True si quedó conectado."""
+        self._ensure_connected()
+        return self._spreadsheet is not None
+
+    def _ensure_connected(self) -> None:
+        """
+        Conecta, instrumenta clientes y resuelve la estructura UNA vez. Si falla,
+        reintenta como mucho cada SHEETS_CONNECT_RETRY_SECONDS.
+        """
+        with self._connect_lock:
+            # _connecting: accesos reentrantes desde el propio _connect()
+            if self._connected or self._connecting or time.time() < self._next_connect_at:
+                return
+            self._connecting = True
+            t0 = time.perf_counter()
+            try:
+                self._connect()
+                self._instrument_clients()
+                self._load_structure()
+            except Exception as e:
+                self.last_error = f"Error conectando: {e}"
+                logger.error(f"❌ {self.last_error}")
+            finally:
+                self._connecting = False
+            if self._spreadsheet is not None:
+                self._connected = True
+                logger.info(f"⚡ SheetsManager listo en {time.perf_counter() - t0:.1f}s ({self.storage_backend})")
+            else:
+                self._next_connect_at = time.time() + SHEETS_CONNECT_RETRY_SECONDS
+
+    def _load_structure(self) -> None:
+        """Usa el chequeo de estructura cacheado en disco si está vigente; si no, lo corre."""
+        if self._spreadsheet is None:
+            return
+        entry = self._meta_cache.load(self._sheet_id) if self.storage_backend == "gspread" else None
+        if entry and entry.get("structure_ok") and entry.get("sheet_map"):
+            self.sheet_map.update(entry["sheet_map"])
+            logger.info(f"📦 Estructura de {len(self.sheet_map)} pestañas tomada de cache local")
+            return
+        self._check_structure_safe()
+        self._save_metadata_cache()
+
+    def _raw_spreadsheet(self) -> Any:
+        sp = self._spreadsheet
+        return sp.unwrapped if isinstance(sp, InstrumentedSpreadsheet) else sp
+
+    def _save_metadata_cache(self) -> None:
+        raw = self._raw_spreadsheet()
+        if self.storage_backend != "gspread" or not isinstance(raw, gspread.Spreadsheet):
+            return
+        worksheets: Dict[str, Any] = {}
+        for ws in self._ws_cache.values():
+            props = getattr(ws, "_properties", None)
+            if isinstance(props, dict) and props.get("title"):
+                worksheets[props["title"]] = dict(props)
+        self._meta_cache.save(self._sheet_id, {
+            "spreadsheet": dict(getattr(raw, "_properties", {}) or {}),
+            "worksheets": worksheets,
+            "sheet_map": dict(self.sheet_map),
+            "structure_ok": True,
+        })
+
+    def invalidate_metadata_cache(self) -> None:
+        """Olvida pestañas/gids cacheados (p.ej. alguien renombró o borró una pestaña)."""
+        self._meta_cache.invalidate(self._sheet_id)
+        self._ws_cache.clear()
+        for key in [k for k in self._local_cache if k.startswith("ws:")]:
+            self._local_cache.pop(key, None)
+
+    def _open_spreadsheet(self, sheet_id: str) -> Any:
+        """
+        open_by_key() descarga la metadata completa; con la cache de disco
+        vigente se arma el Spreadsheet con las properties guardadas (0 llamadas).
+        """
+        entry = self._meta_cache.load(sheet_id)
+        props = (entry or {}).get("spreadsheet")
+        if props and props.get("id") == sheet_id:
+            try:
+                sp = gspread.Spreadsheet.__new__(gspread.Spreadsheet)
+                sp.client = self.gc.http_client
+                sp._properties = dict(props)
+                logger.info("📦 Metadata del spreadsheet tomada de cache local")
+                return sp
+            except Exception as e:
+                logger.warning(f"⚠️ Cache de metadata inutilizable ({e}), abriendo normal")
+        return self.gc.open_by_key(sheet_id)
+
+    def _cached_worksheet(self, title: str) -> Optional[Any]:
+        """Worksheet armado con las properties cacheadas (sin pedir metadata)."""
+        if self.storage_backend != "gspread":
             return None
-        exp, val = item
-        if allow_expired or time.time() <= exp:
-            return val
-        return None
+        raw = self._raw_spreadsheet()
+        if not isinstance(raw, gspread.Spreadsheet):
+            return None
+        entry = self._meta_cache.load(self._sheet_id)
+        props = ((entry or {}).get("worksheets") or {}).get(title)
+        if not props:
+            return None
+        try:
+            ws = gspread.Worksheet(raw, dict(props), raw.id, raw.client)
+        except Exception:
+            return None
+        if isinstance(self._spreadsheet, InstrumentedSpreadsheet):
+            ws = InstrumentedWorksheet(ws, self.api_metrics, self.rate_limiter)
+        return ws
+
+
+    def _cache_get(self, key: str, *, allow_expired: bool = False) -> Optional[Any]:
+        return self._local_cache.get(key, allow_expired=allow_expired)
 
     def _cache_set(self, key: str, value: Any, ttl_seconds: float) -> None:
-        self._local_cache[key] = (time.time() + float(ttl_seconds), value)
+        self._local_cache.set(key, value, ttl_seconds)
 
     @staticmethod
     def _is_quota_error(exc: Exception) -> bool:
-        msg = str(exc) or ""
-        if "429" in msg or "RESOURCE_EXHAUSTED" in msg:
-            return True
-        if "Read requests" in msg and "per minute" in msg:
-            return True
-        resp = getattr(exc, "response", None)
-        status = getattr(resp, "status_code", None)
-        return status == 429
+        return is_quota_error(exc)
+
+    def _instrument_clients(self) -> None:
+        """Envuelve spreadsheet y Drive para que toda llamada quede contabilizada."""
+        if self.spreadsheet is not None and not isinstance(self.spreadsheet, InstrumentedSpreadsheet):
+            # SQLite no tiene cuota: solo se limita lo que va a Google
+            limiter = None if isinstance(self.spreadsheet, SqliteStorage) else self.rate_limiter
+            self.spreadsheet = InstrumentedSpreadsheet(self.spreadsheet, self.api_metrics, limiter)
+        if self.drive_service is not None and not isinstance(self.drive_service, InstrumentedDrive):
+            self.drive_service = InstrumentedDrive(self.drive_service, self.api_metrics)
+
+    def get_api_metrics(self) -> Dict[str, Any]:
+        """Totales y detalle por operación (llamadas, R/W, 429, reintentos, cache, bytes, latencias)."""
+        snap = self.api_metrics.snapshot()
+        snap["quota_cooldown_remaining_s"] = max(0.0, round(self._quota_cooldown_until - time.time(), 1))
+        snap["backend"] = self.storage_backend
+        snap["rate_limiter"] = self.rate_limiter.snapshot()
+        snap["local_cache"] = self._local_cache.snapshot()
+        snap["drive_uploads"] = self.drive_uploads.stats()
+        return snap
+
+    def api_metrics_summary(self) -> str:
+        """Resumen de una línea para logs y /status."""
+        line = self.api_metrics.summary()
+        cooldown = self._quota_cooldown_until - time.time()
+        if cooldown > 0:
+            line += f" | cooldown {cooldown:.0f}s"
+        lanes = self.rate_limiter.snapshot()["lanes"]
+        pressure = [
+            f"{lane} cola={st['waiting']} dif={st['deferred']} desc={st['dropped']}"
+            for lane, st in lanes.items()
+            if st["waiting"] or st["deferred"] or st["dropped"]
+        ]
+        if pressure:
+            line += " | carriles: " + ", ".join(pressure)
+        if self.drive_uploads.stats()["submitted"]:
+            line += " | " + self.drive_uploads.summary()
+        return line
 
     def _gspread_call(
         self,
@@ -190,44 +1029,111 @@ class SheetsManager:
         retries: int = 4,
         backoff_base: float = 0.8,
         allow_cache_on_error: bool = True,
+        stale_while_revalidate: bool = False,
     ):
+        """
+        Llamada a Sheets con reintentos, cooldown de cuota, cache por `cache_key`
+        y single-flight. `stale_while_revalidate` es opt-in por clave: solo para
+        lecturas donde unos minutos de atraso no cambian decisiones (nunca roles,
+        usuarios ni CONFIG); se sirve vencida hasta LOCAL_CACHE_SWR_MAX_STALE_SECONDS.
+        """
         now = time.time()
         if now < self._quota_cooldown_until:
+            self.api_metrics.record_cooldown_block(op)
             if allow_cache_on_error and cache_key:
                 cached = self._cache_get(cache_key, allow_expired=True)
                 if cached is not None:
                     logger.warning(f"⏳ Quota cooldown activo; usando cache para {op}")
+                    self.api_metrics.record_cache_hit(op)
                     return cached
             raise RuntimeError(f"Quota cooldown activo para {op}")
 
         if cache_key:
-            cached = self._cache_get(cache_key)
-            if cached is not None:
-                return cached
+            item = self._local_cache.get_entry(cache_key)
+            if item is not None and item[1]:
+                self.api_metrics.record_cache_hit(op)
+                return item[0]
+            stale = (
+                self._local_cache.get_stale(cache_key, LOCAL_CACHE_SWR_MAX_STALE_SECONDS)
+                if stale_while_revalidate and cache_ttl else None
+            )
+            if stale is not None:
+                # Vencida hace poco: se sirve ya y se relee en segundo plano (carril sync)
+                self._local_cache.refresh_async(
+                    cache_key,
+                    lambda: self._gspread_call(fn, op=op, retries=1, allow_cache_on_error=False),
+                    cache_ttl,
+                    lambda load: call_in_lane(LANE_SYNC, load),
+                )
+                self.api_metrics.record_cache_hit(op)
+                return stale
+
+            # Single-flight: lecturas idénticas concurrentes comparten una sola llamada
+            value, shared = self._flights.do(
+                f"{op}|{cache_key}",
+                lambda: self._gspread_fetch(
+                    fn, op=op, cache_key=cache_key, cache_ttl=cache_ttl, retries=retries,
+                    backoff_base=backoff_base, allow_cache_on_error=allow_cache_on_error,
+                ),
+            )
+            if shared:
+                self.api_metrics.record_coalesced(op)
+            return value
 
+        return self._gspread_fetch(
+            fn, op=op, cache_key=None, cache_ttl=None, retries=retries,
+            backoff_base=backoff_base, allow_cache_on_error=allow_cache_on_error,
+        )
+
+    def _gspread_fetch(
+        self,
+        fn,
+        *,
+        op: str,
+        cache_key: Optional[str],
+        cache_ttl: Optional[float],
+        retries: int,
+        backoff_base: float,
+        allow_cache_on_error: bool,
+    ):
+        """Llamada real con reintentos/cooldown (la parte de _gspread_call que no es cache)."""
         last_exc: Optional[Exception] = None
+        # Una escritura que invalida la clave mientras se lee gana: no se cachea lo leído
+        gen = self._local_cache.generation(cache_key) if cache_key else 0
         for attempt in range(retries + 1):
             try:
                 res = fn()
                 self._quota_strikes = 0
                 if cache_key and cache_ttl:
-                    self._cache_set(cache_key, res, cache_ttl)
+                    self._local_cache.set(cache_key, res, cache_ttl, generation=gen)
                 return res
             except Exception as exc:
                 last_exc = exc
+                if "Unable to parse range" in str(exc) and self._sheet_id:
+                    # Pestaña renombrada/borrada: la metadata cacheada quedó vieja
+                    logger.warning(f"🗑️ Rango inválido en {op}; invalidando cache de metadata")
+                    self.invalidate_metadata_cache()
                 if self._is_quota_error(exc):
                     self._quota_strikes = min(self._quota_strikes + 1, 10)
-                    cooldown = min(60 * (2 ** (self._quota_strikes - 1)), 15 * 60)
+                    cooldown = min(
+                        QUOTA_COOLDOWN_BASE_SECONDS * (2 ** (self._quota_strikes - 1)),
+                        QUOTA_COOLDOWN_MAX_SECONDS,
+                    )
                     jitter = random.uniform(0, 0.25 * cooldown)
                     self._quota_cooldown_until = time.time() + cooldown + jitter
                     logger.error(
                         f"🚫 Google quota/429 en {op}. Cooldown {cooldown:.0f}s. Error: {exc}"
                     )
                     break
+                if isinstance(exc, RateLimitExceeded):
+                    # Sin token para una llamada de fondo: no reintentar, que pase el próximo ciclo
+                    logger.warning(f"⏱️ {op} postergada por rate limit: {exc}")
+                    break
 
                 if attempt < retries:
                     sleep_s = backoff_base * (2 ** attempt) + random.uniform(0.0, 0.25)
                     logger.warning(f"⚠️ Error en {op}. Reintentando en {sleep_s:.2f}s: {exc}")
+                    self.api_metrics.record_retry(op)
                     time.sleep(sleep_s)
                     continue
                 break
@@ -236,6 +1142,7 @@ class SheetsManager:
             cached = self._cache_get(cache_key, allow_expired=True)
             if cached is not None:
                 logger.warning(f"📦 Usando cache (posible expirado) tras error en {op}")
+                self.api_metrics.record_cache_hit(op)
                 return cached
 
         if last_exc:
@@ -300,6 +1207,45 @@ class SheetsManager:
         return None
 
     def _connect(self) -> None:
+        if self._injected_drive is not None:
+            self.drive_service = self._injected_drive
+        if self._injected_storage is not None:
+            self.storage_backend = type(self._injected_storage).__name__
+            self.spreadsheet = self._injected_storage
+            logger.info(f"🗄️ Usando storage inyectado: {self.storage_backend}")
+            return
+
+        google_conf = self.cfg.get_google_cloud_config()
+        backend = (STORAGE_BACKEND or str(google_conf.get("storage_backend") or "gspread")).strip().lower()
+        if backend != "sqlite":
+            self._connect_google()
+            return
+
+        # SQLite como almacenamiento principal; Google (si hay credenciales)
+        # queda para Drive y como espejo de reportes.
+        self.storage_backend = "sqlite"
+        db_path = str(google_conf.get("sqlite_path") or SQLITE_DB_PATH)
+        try:
+            local = SqliteStorage(db_path)
+        except Exception as e:
+            self.last_error = f"Error abriendo SQLite ({db_path}): {e}"
+            logger.error(f"❌ {self.last_error}")
+            return
+
+        self._connect_google()
+        remote = self.spreadsheet
+        if remote is not None and local.is_empty():
+            try:
+                local.import_from(remote)
+            except Exception as e:
+                logger.error(f"❌ Error importando Google Sheets a SQLite: {e}")
+        if remote is not None and SHEETS_MIRROR_INTERVAL_SECONDS > 0:
+            self.mirror = SheetsMirror(local, InstrumentedSpreadsheet(remote, self.api_metrics, self.rate_limiter))
+            self.mirror.start()
+        self.spreadsheet = local
+        self.last_error = ""
+
+    def _connect_google(self) -> None:
         logger.info("🔌 Conectando a Google Sheets...")
         google_conf = self.cfg.get_google_cloud_config()
         sheet_id = str(google_conf.get("sheet_id_maestro") or "").strip()
@@ -337,8 +1283,11 @@ class SheetsManager:
                 creds.refresh(Request())
 
             self.gc = gspread.authorize(creds)
-            self.drive_service = build("drive", "v3", credentials=creds)
-            self.spreadsheet = self.gc.open_by_key(sheet_id)
+            if self._injected_drive is None:
+                self.drive_service = self._build_drive_service(creds)
+            self._sheet_id = sheet_id
+            self._local_cache.attach(sheet_id)
+            self.spreadsheet = self._open_spreadsheet(sheet_id)
             logger.info(f"✅ Conectado exitosamente a spreadsheet: {sheet_id[:20]}...")
             self.last_error = ""
 
@@ -346,6 +1295,24 @@ class SheetsManager:
             self.last_error = f"Error de conexión Google: {e}"
             logger.error(f"❌ {self.last_error}")
 
+    @staticmethod
+    def _build_drive_service(creds: Credentials) -> Any:
+        """
+        Servicio Drive apto para varios hilos (subidas en paralelo): httplib2 no
+        es thread-safe, así que cada hilo usa su propio Http autorizado (con las
+        mismas credenciales) y lo reutiliza entre requests (conexión keep-alive).
+        """
+        local = threading.local()
+
+        def _request(http: Any, *args: Any, **kwargs: Any) -> HttpRequest:
+            authed_http = getattr(local, "http", None)
+            if authed_http is None:
+                authed_http = local.http = google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http())
+            return HttpRequest(authed_http, *args, **kwargs)
+
+        authed = google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http())
+        return build("drive", "v3", http=authed, requestBuilder=_request)
+
     def _check_structure_safe(self) -> None:
         if not self.spreadsheet:
             return
@@ -358,22 +1325,16 @@ class SheetsManager:
             "LOGS": ["FECHA", "NIVEL", "MENSAJE", "DATOS_EXTRA"],
             "REGISTRO": ["ID_EVENTO", "FECHA", "TIPO", "USUARIO", "DESCRIPCION", "ESTADO"],
             "REPORTE_DIARIO": ["FECHA", "TOTAL_EVENTOS", "ERRORES", "ESTADO"],
-            "RAW_LOGS": [
-                "UUID", "TIMESTAMP", "ID_USER", "USER_NAME", "TYPE", "FILE_ID",
-                "URL_DRIVE", "RAW_JSON", "CLIENT_INPUT", "STATUS", "HASH", "IS_FRAUD",
-            ],
-            "STATS": [
-                "FECHA", "HORA", "VENDEDOR", "GRUPO", "CLIENTE", "TIPO_PDV",
-                "LINK_FOTO", "ESTADO_AUDITORIA", "COMENTARIOS", "UUID_REF",
-                "MSG_ID_SUPERVISOR", "CONTEO_GRUPO", "CHAT_ID_REF", "SYNC_TELEGRAM",
-            ],
+            "RAW_LOGS": RAW_LOGS_HEADERS,
+            "STATS": STATS_HEADERS,
             "GROUPS": ["CHAT_ID", "TITULO", "FIRST_SEEN", "LAST_SEEN"],
             "DASHBOARD": [],
-            "BOT_CONTROL": ["ESTADO", "INICIO", "ARCHIVOS_TOTAL", "PROGRESO"],
-            "COLA_IMAGENES": ["UUID_MSG", "CHAT_ID", "USER_ID", "USERNAME", "FILE_ID", "TIMESTAMP", "MSG_ID", "PROCESADO"],
+            "BOT_CONTROL": ["ESTADO", "INICIO", "ARCHIVOS_TOTAL", "PROGRESO", "ROLES_EPOCH", "ARCHIVO_PENDIENTE"],
+            "COLA_IMAGENES": COLA_IMAGENES_HEADERS,
         }
 
         existing_ws = {ws.title: ws for ws in self.spreadsheet.worksheets()}
+        found: Dict[str, Any] = {}
 
         for logical_name, headers in structures.items():
             target_ws = None
@@ -390,6 +1351,7 @@ class SheetsManager:
                         target_ws.append_row(headers)
                     logger.info(f"🛠 Creada pestaña: {logical_name}")
                     self.sheet_map[logical_name] = logical_name
+                    self._ws_cache[logical_name] = target_ws
                     
                     # Inicializar BOT_CONTROL con datos por defecto
                     if logical_name == "BOT_CONTROL":
@@ -400,24 +1362,67 @@ class SheetsManager:
                     continue
             else:
                 self.sheet_map[logical_name] = target_ws.title
-                if headers:
-                    try:
-                        current_headers = target_ws.row_values(1)
-                        if len(current_headers) < len(headers):
+                # Los handles de worksheets() ya sirven: sin worksheet() por pestaña después
+                self._ws_cache[target_ws.title] = target_ws
+                found[logical_name] = target_ws
+
+        # Headers (y BOT_CONTROL!A2) de todas las pestañas existentes en UNA lectura
+        first_rows = self._read_first_rows(found)
+        for logical_name, target_ws in found.items():
+            headers = structures[logical_name]
+            rows = first_rows.get(logical_name)
+            if headers:
+                try:
+                    current_headers = rows[0] if rows else target_ws.row_values(1)
+                    if len(current_headers) < len(headers):
+                        with self._write_batch(logical_name, target_ws) as wb:
                             for i in range(len(current_headers), len(headers)):
-                                target_ws.update_cell(1, i + 1, headers[i])
-                            logger.info(f"🔧 Headers actualizados en {logical_name}")
-                    except Exception:
-                        continue
-                
-                # Asegurar que BOT_CONTROL tenga datos por defecto
-                if logical_name == "BOT_CONTROL":
-                    try:
-                        if target_ws.row_count < 2 or not target_ws.cell(2, 1).value:
-                            target_ws.update("A2:D2", [["LIBRE", "", 0, ""]])
-                            logger.info(f"✅ BOT_CONTROL inicializado con estado LIBRE")
-                    except Exception:
-                        pass
+                                wb.set_cell(1, i + 1, headers[i])
+                        logger.info(f"🔧 Headers actualizados en {logical_name}")
+                except Exception:
+                    continue
+            
+            # Asegurar que BOT_CONTROL tenga datos por defecto
+            if logical_name == "BOT_CONTROL":
+                try:
+                    if rows is not None:
+                        missing = len(rows) < 2 or not (rows[1][0] if rows[1] else "")
+                    else:
+                        missing = target_ws.row_count < 2 or not target_ws.cell(2, 1).value
+                    if missing:
+                        target_ws.update("A2:D2", [["LIBRE", "", 0, ""]])
+                        logger.info(f"✅ BOT_CONTROL inicializado con estado LIBRE")
+                except Exception:
+                    pass
+
+    def _read_first_rows(self, found: Dict[str, Any]) -> Dict[str, List[List[str]]]:
+        """
+        Filas 1-2 de cada pestaña con un único values_batch_get (solo gspread).
+        Devuelve {} si no se puede; el llamador cae a lecturas por pestaña.
+        """
+        sp = self.spreadsheet
+        if not found or not isinstance(self._raw_spreadsheet(), gspread.Spreadsheet):
+            return {}
+        names = list(found.keys())
+        ranges = []
+        for name in names:
+            title = found[name].title.replace("'", "''")
+            ranges.append(f"'{title}'!1:2")
+        try:
+            res = self._gspread_call(
+                lambda: sp.values_batch_get(ranges),
+                op=f"structure:headers[{len(ranges)}]",
+                retries=2,
+                allow_cache_on_error=False,
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudieron leer headers en lote: {e}")
+            return {}
+        out: Dict[str, List[List[str]]] = {}
+        for name, vr in zip(names, (res or {}).get("valueRanges", [])):
+            rows = [list(r) for r in vr.get("values", [])]
+            out[name] = rows if rows else [[]]
+        return out
 
     def _get_ws(self, name: str):
         if not self.spreadsheet:
@@ -425,6 +1430,10 @@ class SheetsManager:
         mapped = self.sheet_map.get(name, name)
         if mapped in self._ws_cache:
             return self._ws_cache[mapped]
+        cached_ws = self._cached_worksheet(mapped)
+        if cached_ws is not None:
+            self._ws_cache[mapped] = cached_ws
+            return cached_ws
         try:
             ws = self._gspread_call(
                 lambda: self.spreadsheet.worksheet(mapped),
@@ -432,6 +1441,7 @@ class SheetsManager:
                 cache_key=f"ws:{mapped}",
                 cache_ttl=300,
                 retries=2,
+                stale_while_revalidate=True,
             )
             self._ws_cache[mapped] = ws
             return ws
@@ -439,18 +1449,380 @@ class SheetsManager:
             logger.error(f"❌ Error obteniendo worksheet '{mapped}': {e}")
             return None
 
+    # ============================================================================
+    # ESCRITURAS EN LOTE
+    # ============================================================================
+
+    def _write_batch(self, sheet: str, ws: Any = None, value_input_option: str = "USER_ENTERED") -> WriteBatch:
+        """Lote de escrituras para una operación lógica (un batch_update al flushear)."""
+        if ws is None:
+            ws = self._get_ws(sheet)
+        return WriteBatch(self, sheet, ws, value_input_option=value_input_option)
+
+    def _defer_write(
+        self,
+        sheet: str,
+        updates: Dict[str, List[List[Any]]],
+        value_input_option: str = "USER_ENTERED",
+    ) -> None:
+        """
+        Encola escrituras NO críticas (p.ej. LAST_SEEN) para enviarlas junto a
+        otras dentro de WRITE_COALESCE_WINDOW_SECONDS en un único batch_update.
+        """
+        if not updates:
+            return
+        with self._deferred_lock:
+            # Un valor nuevo arranca con sus intentos en cero
+            for rng in updates:
+                self._deferred_attempts.pop((sheet, value_input_option, rng), None)
+        self._queue_deferred(sheet, updates, value_input_option)
+
+    def _queue_deferred(self, sheet: str, updates: Dict[str, List[List[Any]]], value_input_option: str) -> None:
+        with self._deferred_lock:
+            pending = self._deferred_writes.setdefault((sheet, value_input_option), {})
+            pending.update(updates)
+            if self._deferred_timer is None:
+                t = threading.Timer(WRITE_COALESCE_WINDOW_SECONDS, self.flush_deferred_writes)
+                t.daemon = True
+                self._deferred_timer = t
+                t.start()
+
+    @lane_api(LANE_HOUSEKEEPING)
+    def flush_deferred_writes(self) -> None:
+        """Envía las escrituras diferidas (un batch_update por pestaña)."""
+        with self._deferred_lock:
+            pending = self._deferred_writes
+            self._deferred_writes = {}
+            self._deferred_timer = None
+
+        for (sheet, vio), updates in pending.items():
+            ws = self._get_ws(sheet)
+            if not ws:
+                continue
+            wb = self._write_batch(sheet, ws, value_input_option=vio)
+            for rng, vals in updates.items():
+                wb.set_range(rng, vals)
+            try:
+                wb.flush()
+            except Exception as e:
+                logger.error(f"❌ Error enviando escrituras diferidas en {sheet} ({len(updates)} rangos): {e}")
+                # Re-encolar lo que no haya sido pisado por escrituras más nuevas,
+                # hasta DEFERRED_WRITE_MAX_ATTEMPTS intentos por rango
+                retry: Dict[str, List[List[Any]]] = {}
+                dropped = 0
+                with self._deferred_lock:
+                    newer = self._deferred_writes.get((sheet, vio), {})
+                    for rng, vals in updates.items():
+                        if rng in newer:
+                            continue
+                        key = (sheet, vio, rng)
+                        attempts = self._deferred_attempts.get(key, 0) + 1
+                        if attempts >= DEFERRED_WRITE_MAX_ATTEMPTS:
+                            self._deferred_attempts.pop(key, None)
+                            dropped += 1
+                        else:
+                            self._deferred_attempts[key] = attempts
+                            retry[rng] = vals
+                if dropped:
+                    logger.warning(
+                        f"⚠️ Se descartan {dropped} escrituras diferidas en {sheet} "
+                        f"tras {DEFERRED_WRITE_MAX_ATTEMPTS} intentos"
+                    )
+                if retry:
+                    self._queue_deferred(sheet, retry, vio)
+            else:
+                with self._deferred_lock:
+                    for rng in updates:
+                        self._deferred_attempts.pop((sheet, vio, rng), None)
+
+    # ============================================================================
+    # COLA DE APPENDS (RAW_LOGS / STATS)
+    # ============================================================================
+
+    def _enqueue_append(self, ticket: AppendTicket, sheet: str, values: List[Any]) -> None:
+        """Encola una fila; dispara flush por tamaño o programa uno por deadline."""
+        flush_now = False
+        with self._append_lock:
+            queue = self._append_queue.setdefault(sheet, [])
+            queue.append((ticket.uuid, values, ticket))
+            self._append_tickets[ticket.uuid] = ticket
+            self._failed_appends.pop(ticket.uuid, None)
+            if len(queue) >= APPEND_QUEUE_MAX_ROWS:
+                flush_now = True
+            elif self._append_timer is None:
+                # No-daemon: al cerrar el proceso se espera este último flush
+                t = threading.Timer(APPEND_QUEUE_DEADLINE_SECONDS, self.flush_appends)
+                self._append_timer = t
+                t.start()
+        if flush_now:
+            self.flush_appends()
+
+    def flush_appends(self) -> None:
+        """
+        Escribe todas las filas encoladas: UN append_rows por pestaña.
+        Actualiza índice UUID y réplica con la fila real de cada una.
+        """
+        with self._append_flush_lock:
+            with self._append_lock:
+                pending = self._append_queue
+                self._append_queue = {}
+                if self._append_timer is not None:
+                    self._append_timer.cancel()
+                    self._append_timer = None
+
+            for sheet, items in pending.items():
+                ws = self._get_ws(sheet)
+                start_row: Optional[int] = None
+                error = ""
+                if not ws:
+                    error = f"Hoja {sheet} no disponible"
+                else:
+                    try:
+                        # Sin reintentos genéricos: un append reintentado tras un
+                        # timeout puede duplicar filas (evaluaciones dobles).
+                        res = self._gspread_call(
+                            lambda: ws.append_rows([v for _, v, _ in items], value_input_option="USER_ENTERED"),
+                            op=f"{sheet}:append_rows[{len(items)}]",
+                            retries=0,
+                            allow_cache_on_error=False,
+                        )
+                        start_row = self._row_from_append_response(res)
+                    except Exception as e:
+                        error = str(e) or e.__class__.__name__
+                        logger.error(f"❌ Error registrando {len(items)} filas en {sheet}: {e}")
+
+                for offset, (uuid_ref, values, ticket) in enumerate(items):
+                    if error:
+                        ticket._resolve(sheet, None, error)
+                        continue
+                    row = start_row + offset if start_row else None
+                    self._uuid_index[sheet].add(uuid_ref, row)
+                    self._tail_append(sheet, row, values)
+                    ticket._resolve(sheet, row)
+                if not error:
+                    logger.info(f"✅ {len(items)} fila(s) registradas en {sheet}")
+
+            with self._append_lock:
+                for items in pending.values():
+                    for uuid_ref, _, ticket in items:
+                        if ticket.done and self._append_tickets.get(uuid_ref) is ticket:
+                            del self._append_tickets[uuid_ref]
+                            if not ticket.ok:
+                                self._failed_appends[uuid_ref] = ticket
+                while len(self._failed_appends) > APPEND_FAILED_KEEP:
+                    self._failed_appends.popitem(last=False)
+
+    def stats_row_exists(self, uuid_ref: str) -> bool:
+        """True si la fila de `uuid_ref` ya está en STATS (o encolada para escribirse)."""
+        uuid_ref = str(uuid_ref or "").strip()
+        with self._append_lock:
+            if uuid_ref in self._append_tickets:
+                return True
+        return self._uuid_row("STATS", uuid_ref) is not None
+
+    def wait_for_append(self, uuid_ref: str, timeout: Optional[float] = None) -> bool:
+        """
+        Garantiza que la fila de `uuid_ref` ya exista en Sheets (flushea la cola
+        si sigue pendiente). True si no estaba encolada o quedó escrita; False
+        si el append de RAW_LOGS o STATS falló (la foto no quedó registrada).
+        """
+        uuid_ref = str(uuid_ref or "").strip()
+        with self._append_lock:
+            ticket = self._append_tickets.get(uuid_ref) or self._failed_appends.get(uuid_ref)
+        if ticket is None:
+            return True
+        if not ticket.done:
+            self.flush_appends()
+        return ticket.wait(timeout)
+
+    # ============================================================================
+    # RÉPLICA LOCAL DE STATS
+    # ============================================================================
+
+    @staticmethod
+    def _col_letter(col: int) -> str:
+        letters = ""
+        while col > 0:
+            col, rem = divmod(col - 1, 26)
+            letters = chr(65 + rem) + letters
+        return letters
+
+    @staticmethod
+    def _row_from_append_response(res: Any) -> Optional[int]:
+        """Fila donde quedó un append_row (de 'updates.updatedRange', ej. 'STATS!A12:N12')."""
+        try:
+            rng = str(res.get("updates", {}).get("updatedRange", ""))
+            first_cell = rng.split("!")[-1].split(":")[0]
+            digits = "".join(c for c in first_cell if c.isdigit())
+            return int(digits) if digits else None
+        except Exception:
+            return None
+
+    def _tail_sync(self, sheet: str, max_age: Optional[float] = None) -> Optional[TailReplica]:
+        """
+        Devuelve la réplica de `sheet`, reconciliándola si tiene más de
+        `max_age` segundos. La reconciliación normal es UNA llamada (batch_get
+        de header + cola [+ columnas mutables]); la descarga completa solo
+        ocurre en la primera carga, cada `full_resync_seconds` o ante
+        desalineación.
+        """
+        rep = self._tails[sheet]
+        ws = self._get_ws(sheet)
+        if not ws:
+            return None
+        if max_age is None:
+            max_age = rep.refresh_seconds
+
+        asked_at = time.time()
+        with rep.lock:
+            now = time.time()
+            need_full = rep.needs_full(now)
+            if not need_full and (now - rep.refreshed_at) < max_age:
+                return rep
+            if not need_full and rep.refreshed_at >= asked_at:
+                # Otro hilo reconcilió mientras esperábamos el lock: misma lectura, se comparte
+                self.api_metrics.record_coalesced(f"{sheet}:tail_refresh")
+                return rep
+            try:
+                if not need_full:
+                    ranges = rep.refresh_ranges(self._col_letter)
+                    try:
+                        res = self._gspread_call(
+                            lambda: ws.batch_get(ranges),
+                            op=f"{sheet}:tail_refresh",
+                            retries=2,
+                        )
+                    except Exception as e:
+                        if self._is_quota_error(e) or isinstance(e, RateLimitExceeded):
+                            raise
+                        # p.ej. rango fuera de la grilla tras borrados externos
+                        res = None
+                        logger.warning(f"⚠️ Lectura incremental de {sheet} falló ({e}), resincronizando")
+                    if res is not None:
+                        header = list(res[0][0]) if res and res[0] else []
+                        tail = list(res[1]) if len(res) > 1 else []
+                        mutable = list(res[2]) if len(res) > 2 else []
+                        if rep.apply_refresh(header, tail, mutable):
+                            return rep
+                        logger.warning(f"🔁 Réplica {sheet} desalineada, resincronizando completa")
+
+                all_vals = self._gspread_call(
+                    lambda: ws.get_all_values(),
+                    op=f"{sheet}:replica_load",
+                    retries=2,
+                )
+                rep.load(all_vals)
+                if sheet in self._uuid_index:
+                    idx = self._uuid_index[sheet]
+                    key = idx.col - 1
+                    idx.load([r[key] if len(r) > key else "" for r in all_vals])
+                logger.info(f"📥 Réplica {sheet} cargada: {len(rep.rows)} filas")
+            except Exception as e:
+                if rep.loaded:
+                    logger.warning(f"⚠️ No se pudo refrescar réplica {sheet} (se usan datos locales): {e}")
+                    return rep
+                logger.error(f"❌ Error cargando réplica {sheet}: {e}")
+                return None
+        return rep
+
+    def _stats_replica_sync(self, max_age: Optional[float] = None) -> Optional[StatsReplica]:
+        return self._tail_sync("STATS", max_age)
+
+    def _uuid_row(self, sheet: str, uuid_ref: str, *, reload_if_missing: bool = True) -> Optional[int]:
+        """Fila (1-based) del UUID en `sheet` usando el índice; None si no existe."""
+        idx = self._uuid_index[sheet]
+        uuid_ref = str(uuid_ref or "").strip()
+        if not uuid_ref:
+            return None
+        with idx.lock:
+            row = idx.get(uuid_ref) if idx.loaded else None
+            if row is not None:
+                return row
+            if idx.loaded and not (reload_if_missing and idx.can_reload()):
+                return None
+            ws = self._get_ws(sheet)
+            if not ws:
+                return None
+            try:
+                col_vals = self._gspread_call(
+                    lambda: ws.col_values(idx.col),
+                    op=f"{sheet}:uuid_index",
+                    retries=2,
+                )
+            except Exception as e:
+                logger.error(f"❌ Error construyendo índice UUID de {sheet}: {e}")
+                return None
+            idx.load(col_vals)
+            logger.info(f"🗂️ Índice UUID de {sheet}: {len(idx.rows)} filas")
+            return idx.get(uuid_ref)
+
+    def _register_appended_row(self, sheet: str, uuid_ref: str, res: Any) -> Optional[int]:
+        """Actualiza índice UUID con la fila devuelta por append_row."""
+        row = self._row_from_append_response(res)
+        self._uuid_index[sheet].add(uuid_ref, row)
+        return row
+
+    def _delete_rows(self, sheet: str, ws: Any, start: int, end: Optional[int] = None) -> None:
+        """Borra filas y mantiene consistentes índice UUID y réplica."""
+        end = end or start
+        ws.delete_rows(start, end)
+        if sheet in self._uuid_index:
+            self._uuid_index[sheet].rows_deleted(start, end)
+        if sheet in self._tails:
+            self._tails[sheet].delete_rows(start, end)
+
+    def _tail_append(self, sheet: str, row: Optional[int], values: List[Any]) -> None:
+        """Refleja en la réplica de `sheet` una fila que agregamos nosotros."""
+        tail = self._tails.get(sheet)
+        if tail is not None:
+            tail.append(row, self._stats_row_for_replica(values))
+
+    @staticmethod
+    def _stats_row_for_replica(row_stats: List[Any]) -> List[Any]:
+        """Las fórmulas (p.ej. CONTEO_GRUPO) las calcula Sheets; en la réplica van vacías."""
+        return ["" if isinstance(v, str) and v.startswith("=") else v for v in row_stats]
+
     def _escape_drive_query_value(self, s: str) -> str:
         s = s.replace("\\", "\\\\").replace("'", "\\'")
         return s
 
-    def _ensure_drive_folder(self, parent_id: str, folder_name: str) -> str:
+    @staticmethod
+    def _drive_folder_key(parent_id: str, folder_name: str) -> str:
+        return f"drive:folder:{parent_id}/{folder_name}"
+
+    def _cached_drive_folder(self, parent_id: str, folder_name: str) -> str:
+        cache_key = (parent_id, folder_name)
+        fid = self._drive_folder_cache.get(cache_key)
+        if not fid:
+            fid = self._cache_get(self._drive_folder_key(parent_id, folder_name)) or ""
+            if fid:
+                self._drive_folder_cache[cache_key] = fid
+        return fid
+
+    def _forget_drive_folder(self, parent_id: str, folder_name: str) -> None:
+        self._drive_folder_cache.pop((parent_id, folder_name), None)
+        self._local_cache.pop(self._drive_folder_key(parent_id, folder_name), None)
+
+    def _ensure_drive_folder(self, parent_id: str, folder_name: str,
+                             ttl: float = DRIVE_FOLDER_CACHE_TTL_SECONDS) -> str:
         if not self.drive_service or not parent_id or not folder_name:
             return ""
 
-        cache_key = (parent_id, folder_name)
-        if cache_key in self._drive_folder_cache:
-            return self._drive_folder_cache[cache_key]
+        fid = self._cached_drive_folder(parent_id, folder_name)
+        if fid:
+            return fid
+
+        # Subidas en paralelo: una sola búsqueda/creación por carpeta (single-flight,
+        # sin carpetas duplicadas); carpetas distintas se resuelven a la vez
+        def _resolve() -> str:
+            return (self._cached_drive_folder(parent_id, folder_name)
+                    or self._find_or_create_drive_folder(parent_id, folder_name, ttl))
+
+        fid, _ = self._flights.do(self._drive_folder_key(parent_id, folder_name), _resolve)
+        return fid
 
+    def _find_or_create_drive_folder(self, parent_id: str, folder_name: str, ttl: float) -> str:
+        cache_key = (parent_id, folder_name)
         safe_name = self._escape_drive_query_value(folder_name)
         q = (
             "mimeType='application/vnd.google-apps.folder' and trashed=false "
@@ -463,6 +1835,7 @@ class SheetsManager:
             if files:
                 fid = files[0]["id"]
                 self._drive_folder_cache[cache_key] = fid
+                self._cache_set(self._drive_folder_key(parent_id, folder_name), fid, ttl)
                 return fid
         except Exception:
             pass
@@ -477,6 +1850,7 @@ class SheetsManager:
             fid = created.get("id", "")
             if fid:
                 self._drive_folder_cache[cache_key] = fid
+                self._cache_set(self._drive_folder_key(parent_id, folder_name), fid, ttl)
             return fid
         except Exception:
             return ""
@@ -513,22 +1887,62 @@ class SheetsManager:
 
     def upload_image_to_drive(self, file_bytes: bytes, filename: str, user_id: int, username: str, group_title: str = "BOT_UPLOAD") -> Any:
         """
-        Wrapper de compatibilidad para host_bot.py.
+        Wrapper de compatibilidad para host_bot.py. Sube también las versiones
+        livianas de la foto (ver image_renditions), solo si el original subió.
         """
-        link = self.upload_to_drive(
-            file_bytes=file_bytes,
-            filename=filename,
-            group_title=group_title, 
-            sent_at=datetime.now()
-        )
-        
-        class UploadResult:
-            def __init__(self, lnk):
-                self.drive_link = lnk
-        
-        return UploadResult(link)
+        sent_at = datetime.now()
+        original = self.submit_drive_upload(file_bytes, filename, group_title, sent_at)
+        renditions = make_renditions(file_bytes)  # mientras el original sube
+        return self.finish_image_upload(original, renditions, filename, group_title, sent_at)
+
+    def finish_image_upload(self, original: Any, renditions: Dict[str, bytes], filename: str,
+                            group_title: str, sent_at: Any) -> DriveUploadResult:
+        """
+        Espera el Future del original y, solo si subió, sube sus versiones
+        livianas (no quedan huérfanas ni ocupan la cola). Compartido con
+        AsyncSheetsManager.upload_image_to_drive.
+        """
+        try:
+            link = original.result()
+        except Exception as e:
+            logger.error(f"❌ Error subiendo a Drive: {e}")
+            link = ""
+        result = DriveUploadResult(link)
+        if not link:
+            return result
+        extra = {
+            kind: self.submit_drive_upload(data, rendition_filename(filename, kind), group_title, sent_at)
+            for kind, data in renditions.items()
+        }
+        for kind, fut in extra.items():
+            try:
+                setattr(result, f"{kind}_link", fut.result())
+            except Exception:
+                pass
+        return result
 
     def upload_to_drive(self, file_bytes: bytes, filename: str, group_title: str, sent_at: Any) -> str:
+        """Sube por la cola de Drive y espera el link ("" si falló)."""
+        try:
+            return self.submit_drive_upload(file_bytes, filename, group_title, sent_at).result()
+        except Exception as e:
+            logger.error(f"❌ Error subiendo a Drive: {e}")
+            return ""
+
+    def submit_drive_upload(self, file_bytes: bytes, filename: str, group_title: str = "BOT_UPLOAD",
+                            sent_at: Any = None, *, block: bool = True, timeout: Optional[float] = None) -> Any:
+        """
+        Encola la subida en drive_uploads y devuelve un Future con el link.
+        Con la cola llena espera lugar (o DriveQueueFull con block=False).
+        """
+        sent_at = sent_at if sent_at is not None else datetime.now()
+        return self.drive_uploads.submit(
+            lambda: self._upload_to_drive_now(file_bytes, filename, group_title, sent_at),
+            label=filename, nbytes=len(file_bytes), block=block, timeout=timeout,
+        )
+
+    def _upload_to_drive_now(self, file_bytes: bytes, filename: str, group_title: str, sent_at: Any) -> str:
+        """Una subida (worker de drive_uploads): levanta si vale reintentar."""
         base_folder_id = self.cfg.get_google_cloud_config().get("drive_folder_id")
         if not base_folder_id or not self.drive_service:
             return ""
@@ -537,35 +1951,55 @@ class SheetsManager:
         sent_dt = self._parse_sent_datetime(sent_at)
         date_folder = sent_dt.strftime("%d-%m-%Y")
 
+        # Sin carpeta (error de Drive al buscar/crear) también se reintenta
+        group_folder_id = self._ensure_drive_folder(base_folder_id, group_title)
+        if not group_folder_id:
+            raise RuntimeError(f"No se pudo resolver la carpeta Drive '{group_title}'")
+        date_folder_id = self._ensure_drive_folder(group_folder_id, date_folder, DRIVE_DATE_FOLDER_CACHE_TTL_SECONDS)
+        if not date_folder_id:
+            self._forget_drive_folder(base_folder_id, group_title)
+            raise RuntimeError(f"No se pudo resolver la carpeta Drive '{group_title}/{date_folder}'")
+
+        meta = {"name": filename, "parents": [date_folder_id]}
+        # Fotos chicas: un solo request multipart; resumable solo para archivos grandes
+        media = MediaIoBaseUpload(
+            io.BytesIO(file_bytes), mimetype="image/jpeg",
+            resumable=len(file_bytes) > DRIVE_MULTIPART_MAX_BYTES,
+        )
         try:
-            group_folder_id = self._ensure_drive_folder(base_folder_id, group_title)
-            if not group_folder_id:
-                return ""
-            date_folder_id = self._ensure_drive_folder(group_folder_id, date_folder)
-            if not date_folder_id:
-                return ""
-        except Exception as e:
-            logger.error(f"❌ Error crítico carpetas Drive: {e}")
-            return ""
-
-        max_retries = 3
-        for attempt in range(1, max_retries + 1):
-            try:
-                meta = {"name": filename, "parents": [date_folder_id]}
-                media = MediaIoBaseUpload(io.BytesIO(file_bytes), mimetype="image/jpeg", resumable=True)
-                
-                f = self.drive_service.files().create(body=meta, media_body=media, fields="webViewLink").execute()
-                return f.get("webViewLink", "")
-                
-            except Exception as e:
-                wait_s = attempt * 2
-                logger.warning(f"⚠️ Falló subida Drive (Intento {attempt}/{max_retries}): {e}. Reintentando en {wait_s}s...")
-                if attempt < max_retries:
-                    time.sleep(wait_s)
-                else:
-                    logger.error("❌ Falló definitivamente la subida a Drive.")
-        
-        return ""
+            f = self.drive_service.files().create(body=meta, media_body=media, fields="webViewLink").execute()
+        except Exception:
+            # Puede ser una carpeta cacheada que ya no existe: el reintento la vuelve a resolver
+            self._forget_drive_folder(group_folder_id, date_folder)
+            raise
+        link = f.get("webViewLink", "")
+        if not link:
+            raise RuntimeError("Drive no devolvió webViewLink")
+        return link
+
+    @lane_api(LANE_SYNC)
+    def prewarm_drive_folders(self, day: Optional[date] = None) -> Dict[str, int]:
+        """
+        Resuelve (o crea) la carpeta de cada grupo de GROUPS y su carpeta del
+        día, así la primera foto del día no paga esas búsquedas en Drive.
+        """
+        base_folder_id = self.cfg.get_google_cloud_config().get("drive_folder_id")
+        if not base_folder_id or not self.drive_service:
+            return {"groups": 0, "ready": 0, "failed": 0}
+
+        # Misma fecha que calcula upload_to_drive para una foto subida ahora
+        date_folder = (day or self._parse_sent_datetime(datetime.now()).date()).strftime("%d-%m-%Y")
+        titles = sorted({g["title"] for g in self.get_groups() if g.get("title")})
+        ready = failed = 0
+        for title in titles:
+            group_folder_id = self._ensure_drive_folder(base_folder_id, title)
+            if group_folder_id and self._ensure_drive_folder(
+                group_folder_id, date_folder, DRIVE_DATE_FOLDER_CACHE_TTL_SECONDS
+            ):
+                ready += 1
+            else:
+                failed += 1
+        return {"groups": len(titles), "ready": ready, "failed": failed}
 
     def get_pos_types(self) -> List[str]:
         try:
@@ -583,14 +2017,20 @@ class SheetsManager:
     def get_next_id(self) -> str:
         return str(uuid.uuid4())
         
-    def log_raw(self, user_id: int, username: str, nro_cliente: str, tipo_pdv: str, drive_link: str, group_title: str = "BOT_UPLOAD", chat_id: int = 0) -> str:
+    def log_raw(self, user_id: int, username: str, nro_cliente: str, tipo_pdv: str, drive_link: str, group_title: str = "BOT_UPLOAD", chat_id: int = 0, uuid_ref: str = "",
+                web_link: str = "", thumb_link: str = "") -> str:
         """
-        Registra la subida en RAW_LOGS y devuelve el UUID generado.
+        Registra la subida en RAW_LOGS/STATS y devuelve el UUID generado ("" si
+        no se pudo encolar). Las filas quedan en la cola de appends: quien
+        necesite que ya existan usa wait_for_append(uuid), que devuelve False
+        si la escritura falló.
+        `uuid_ref` permite usar un UUID reservado antes (journal de subidas).
+        `web_link`/`thumb_link`: versiones livianas (LINK_WEB / LINK_THUMB).
         """
         if not drive_link:
             return ""
             
-        new_uuid = self.get_next_id()
+        new_uuid = uuid_ref or self.get_next_id()
         file_id_fake = f"DRIVE_{int(time.time())}"
         
         data = {
@@ -605,10 +2045,13 @@ class SheetsManager:
             "is_fraud": False,
             "group_title": group_title,
             "type": tipo_pdv,
-            "chat_id": chat_id
+            "chat_id": chat_id,
+            "web_link": web_link,
+            "thumb_link": thumb_link,
         }
         
-        self.register_image(data)
+        if self.register_image(data) is None:
+            return ""
         return new_uuid
 
     def registrar_aprobacion_directa(self, user_id: int, username: str, nro_cliente: str, tipo_pdv: str, drive_link: str, estado: str, supervisor_name: str) -> str:
@@ -627,7 +2070,7 @@ class SheetsManager:
         ws_raw = self._get_ws("RAW_LOGS")
         if ws_raw:
             try:
-                ws_raw.append_row([
+                row_raw = [
                     new_uuid,
                     ts_now.strftime("%d/%m/%Y %H:%M:%S"),
                     user_id,
@@ -640,7 +2083,10 @@ class SheetsManager:
                     estado.upper(),
                     "DIRECT_UPLOAD",
                     "NO",
-                ], value_input_option="USER_ENTERED")
+                ]
+                res_raw = ws_raw.append_row(row_raw, value_input_option="USER_ENTERED")
+                row = self._register_appended_row("RAW_LOGS", new_uuid, res_raw)
+                self._tail_append("RAW_LOGS", row, row_raw)
             except Exception as e:
                 logger.error(f"❌ Error registrando aprobación directa en RAW_LOGS: {e}")
 
@@ -664,7 +2110,9 @@ class SheetsManager:
                 "OK",
             ]
             try:
-                ws_stats.append_row(row_stats, value_input_option="USER_ENTERED")
+                res = ws_stats.append_row(row_stats, value_input_option="USER_ENTERED")
+                row = self._register_appended_row("STATS", new_uuid, res)
+                self._tail_append("STATS", row, row_stats)
                 logger.info(f"✅ Aprobación directa registrada: UUID={new_uuid[:8]} Estado={estado}")
                 return new_uuid
             except Exception as e:
@@ -708,14 +2156,15 @@ class SheetsManager:
         cur_state = safe_get(4) or "activo"
 
         try:
-            if full_name and full_name != cur_name:
-                ws.update_cell(row, 2, full_name)
-            if username and username != cur_user:
-                ws.update_cell(row, 3, username)
-            if role and cur_role == "":
-                ws.update_cell(row, 4, role)
-            if cur_state == "":
-                ws.update_cell(row, 5, "activo")
+            with self._write_batch("USERS", ws) as wb:
+                if full_name and full_name != cur_name:
+                    wb.set_cell(row, 2, full_name)
+                if username and username != cur_user:
+                    wb.set_cell(row, 3, username)
+                if role and cur_role == "":
+                    wb.set_cell(row, 4, role)
+                if cur_state == "":
+                    wb.set_cell(row, 5, "activo")
         except Exception:
             pass
 
@@ -788,9 +2237,10 @@ class SheetsManager:
 
         try:
             row = cell.row
-            if title:
-                ws.update_cell(row, 2, title)
-            ws.update_cell(row, 4, now)
+            with self._write_batch("GROUPS", ws) as wb:
+                if title:
+                    wb.set_cell(row, 2, title)
+                wb.set_cell(row, 4, now)
         except Exception:
             pass
 
@@ -816,9 +2266,10 @@ class SheetsManager:
         except Exception:
             return []
 
-    def register_image(self, img_data: Dict[str, Any]) -> None:
+    def register_image(self, img_data: Dict[str, Any]) -> Optional[AppendTicket]:
         """
-        Registra la imagen en RAW_LOGS y en STATS.
+        Encola la imagen para RAW_LOGS y STATS (ver flush_appends).
+        Devuelve el ticket para esperar a que las filas existan en Sheets.
         """
         uuid_val = img_data.get("id", "")
         logger.info(f"📝 Registrando imagen: UUID={uuid_val[:8]}...")
@@ -826,31 +2277,26 @@ class SheetsManager:
         fecha = sent_dt.strftime("%d/%m/%Y")
         hora = sent_dt.strftime("%H:%M")
 
-        ws_raw = self._get_ws("RAW_LOGS")
-        ws_stats = self._get_ws("STATS")
-        if not ws_raw or not ws_stats:
-            return
+        if not self._get_ws("RAW_LOGS") or not self._get_ws("STATS"):
+            return None
 
         raw_link = img_data.get("drive_link", "")
-        
-        try:
-            ws_raw.append_row([
-                img_data["id"],
-                datetime.now(AR_TZ).strftime("%d/%m/%Y %H:%M:%S"),
-                img_data["uploader_id"],
-                img_data["uploader_name"],
-                "Foto",
-                img_data["file_id"],
-                raw_link,
-                "",
-                img_data["client_id"],
-                "OK",
-                img_data["hash_md5"],
-                "SI" if img_data["is_fraud"] else "NO",
-            ], value_input_option="USER_ENTERED")
-        except Exception as e:
-            logger.error(f"❌ Error registrando en RAW_LOGS: {e}")
-            
+
+        row_raw = [
+            img_data["id"],
+            datetime.now(AR_TZ).strftime("%d/%m/%Y %H:%M:%S"),
+            img_data["uploader_id"],
+            img_data["uploader_name"],
+            "Foto",
+            img_data["file_id"],
+            raw_link,
+            "",
+            img_data["client_id"],
+            "OK",
+            img_data["hash_md5"],
+            "SI" if img_data["is_fraud"] else "NO",
+        ]
+
         row_stats = [
             fecha,
             hora,
@@ -866,37 +2312,52 @@ class SheetsManager:
             f'=COUNTIF(D:D, "{img_data.get("group_title","")}")',
             img_data["chat_id"],
             "",
+            img_data.get("web_link", ""),
+            img_data.get("thumb_link", ""),
         ]
 
-        try:
-            ws_stats.append_row(row_stats, value_input_option="USER_ENTERED")
-            logger.info(f"✅ Imagen registrada correctamente")
-        except Exception as e:
-            logger.error(f"❌ Error registrando en STATS: {e}")
+        ticket = AppendTicket(uuid_val, ("RAW_LOGS", "STATS"))
+        self._enqueue_append(ticket, "RAW_LOGS", row_raw)
+        self._enqueue_append(ticket, "STATS", row_stats)
+        return ticket
+
     def update_telegram_refs(self, uuid_ref: str, chat_id: int, msg_id: int) -> None:
         """Guarda referencias de Telegram en STATS (MSG_ID_SUPERVISOR y CHAT_ID_REF)."""
+        self.update_telegram_refs_many([uuid_ref], chat_id, msg_id)
+
+    def update_telegram_refs_many(self, uuid_refs: List[str], chat_id: int, msg_id: int) -> None:
+        """Como update_telegram_refs para todas las fotos de una ráfaga, en un solo batch_update."""
+        for uuid_ref in uuid_refs:
+            self.wait_for_append(uuid_ref)
         ws = self._get_ws("STATS")
         if not ws:
             return
         try:
-            cell = ws.find(str(uuid_ref))
-            if not cell:
+            rows = [r for r in (self._uuid_row("STATS", u) for u in uuid_refs) if r]
+            if not rows:
                 return
-            ws.update_cell(cell.row, 11, str(msg_id))
-            ws.update_cell(cell.row, 13, str(chat_id))
+            with self._write_batch("STATS", ws) as wb:
+                for row in rows:
+                    wb.set_cell(row, 11, str(msg_id))
+                    wb.set_cell(row, 13, str(chat_id))
+            for row in rows:
+                self._stats_replica.patch(row, {11: str(msg_id), 13: str(chat_id)})
         except Exception:
             pass
 
 
 
     def update_supervisor_msg_id(self, uuid_ref: str, msg_id: int) -> None:
+        self.wait_for_append(uuid_ref)
         ws = self._get_ws("STATS")
         if not ws:
             return
         try:
-            cell = ws.find(str(uuid_ref))
-            if cell:
-                ws.update_cell(cell.row, 11, str(msg_id))
+            row = self._uuid_row("STATS", uuid_ref)
+            if row:
+                with self._write_batch("STATS", ws) as wb:
+                    wb.set_cell(row, 11, str(msg_id))
+                self._stats_replica.patch(row, {11: str(msg_id)})
         except Exception:
             pass
 
@@ -905,33 +2366,48 @@ class SheetsManager:
         Retorna: "OK", "LOCKED", "ERROR"
         """
         logger.info(f"🔄 Actualizando estado: UUID={uuid_ref[:8]}... → {new_status}")
+        self.wait_for_append(uuid_ref)
         ws = self._get_ws("STATS")
         if not ws:
             return "ERROR"
         try:
-            cell = ws.find(str(uuid_ref))
-            if not cell:
+            row = self._uuid_row("STATS", uuid_ref)
+            if not row:
                 return "ERROR"
-            
+
             # --- OPTIMISTIC LOCKING ---
-            try:
-                current_status = ws.cell(cell.row, 8).value
-            except Exception:
-                current_status = ""
+            # Una sola lectura chica (H:J) trae el estado actual y el UUID de la
+            # fila, que verifica que el índice siga alineado.
+            current_status = ""
+            for attempt in range(2):
+                try:
+                    vals = ws.get(f"H{row}:J{row}")
+                    vals = vals[0] if vals else []
+                except Exception:
+                    vals = []
+                row_uuid = str(vals[2]).strip() if len(vals) > 2 else ""
+                if row_uuid == str(uuid_ref).strip():
+                    current_status = str(vals[0]).strip() if vals else ""
+                    break
+                # Índice desalineado: reconstruir y reintentar una vez
+                self._uuid_index["STATS"].invalidate()
+                row = self._uuid_row("STATS", uuid_ref) if attempt == 0 else None
+                if not row:
+                    return "ERROR"
 
             if current_status and current_status not in ("Pendiente", ""):
                 logger.warning(f"🔒 UUID ya evaluado (estado actual: {current_status})")
                 return "LOCKED"
             # --------------------------
 
-            ws.update_cell(cell.row, 8, new_status)
-            
             note = f"Evaluado por {supervisor_name}"
             if comments:
                 note += f" | Nota: {comments}"
-            
-            ws.update_cell(cell.row, 9, note)
-            ws.update_cell(cell.row, 14, "OK")
+
+            with self._write_batch("STATS", ws) as wb:
+                wb.set_range(f"H{row}:I{row}", [[new_status, note]])
+                wb.set_cell(row, 14, "OK")
+            self._stats_replica.patch(row, {8: new_status, 9: note, 14: "OK"})
             logger.info(f"✅ Estado actualizado correctamente")
             return "OK"
         except Exception as e:
@@ -943,23 +2419,30 @@ class SheetsManager:
         if not ws:
             return []
         try:
-            rows = self._gspread_call(lambda: ws.get_all_records(), op='ws:get_all_records', retries=2)
-            grouped: Dict[Tuple[str, str], Dict[str, Any]] = {}
-            for i, row in enumerate(rows):
-                estado = str(row.get("ESTADO_AUDITORIA", "")).strip()
+            # Se llama cada 30s desde sync_telegram_job: reconciliar siempre
+            # (lectura incremental, no descarga completa).
+            rep = self._stats_replica_sync(max_age=0)
+            if not rep:
+                return []
+            tbl = rep.columnar()
+            estados = tbl.strs("ESTADO_AUDITORIA")
+            syncs = tbl.strs("SYNC_TELEGRAM")
+            msg_ids = tbl.ints("MSG_ID_SUPERVISOR")
+            chat_ids = tbl.ints("CHAT_ID_REF")
+            grouped: Dict[Tuple[int, int], Dict[str, Any]] = {}
+            for i in range(len(tbl)):
+                estado = estados[i]
                 # Si el estado es "Pendiente", ignoramos
-                if estado in ("Pendiente", ""):
+                if not estado or estado == ESTADO_PENDIENTE:
                     continue
 
-                sync = str(row.get("SYNC_TELEGRAM", "")).strip().upper()
                 # Si ya está marcado como OK, ignoramos
-                if sync == "OK":
+                if syncs[i].upper() == "OK":
                     continue
 
-                msg_id = str(row.get("MSG_ID_SUPERVISOR", "")).strip()
-                chat_id = str(row.get("CHAT_ID_REF", "")).strip()
-
                 # Si no tenemos referencias de Telegram, no podemos editar nada
+                # (int() ya contempla el ".0" que a veces pone Google Sheets)
+                msg_id, chat_id = msg_ids[i], chat_ids[i]
                 if not msg_id or not chat_id:
                     continue
 
@@ -967,14 +2450,14 @@ class SheetsManager:
                 if key not in grouped:
                     grouped[key] = {
                         "row_nums": [i + 2],
-                        "uuid": row.get("UUID_REF"),
+                        "uuid": tbl.strs("UUID_REF")[i],
                         "estado": estado,
-                        "chat_id": int(float(chat_id)),  # Usar float por si Google Sheets pone .0
-                        "msg_id": int(float(msg_id)),
-                        "cliente": row.get("CLIENTE"),
-                        "tipo": row.get("TIPO_PDV"),
-                        "vendedor": row.get("VENDEDOR"),
-                        "comentarios": str(row.get("COMENTARIOS", "")).strip()
+                        "chat_id": chat_id,
+                        "msg_id": msg_id,
+                        "cliente": tbl.strs("CLIENTE")[i],
+                        "tipo": tbl.strs("TIPO_PDV")[i],
+                        "vendedor": tbl.strs("VENDEDOR")[i],
+                        "comentarios": tbl.strs("COMENTARIOS")[i],
                     }
                 else:
                     grouped[key]["row_nums"].append(i + 2)
@@ -989,22 +2472,31 @@ class SheetsManager:
         ws = self._get_ws("STATS")
         if not ws:
             return
+        try:
+            with self._write_batch("STATS", ws) as wb:
+                for rn in row_nums:
+                    wb.set_cell(rn, 14, "OK")
+        except Exception as e:
+            logger.error(f"❌ Error marcando {len(row_nums)} filas como sincronizadas: {e}")
+            return
         for rn in row_nums:
-            try:
-                ws.update_cell(rn, 14, "OK")
-            except Exception:
-                continue
+            self._stats_replica.patch(rn, {14: "OK"})
 
     def get_pending_evaluations(self) -> List[Dict[str, Any]]:
         ws = self._get_ws("STATS")
         if not ws:
             return []
         try:
-            rows = self._gspread_call(lambda: ws.get_all_records(), op='ws:get_all_records', retries=2)
+            rep = self._stats_replica_sync(max_age=0)
+            if not rep:
+                return []
+            tbl = rep.columnar()
+            estados = tbl.strs("ESTADO_AUDITORIA")
+            msg_ids = tbl.ints("MSG_ID_SUPERVISOR")
             pendientes = []
-            for i, row in enumerate(rows):
-                if str(row.get("ESTADO_AUDITORIA", "")).strip() == "Pendiente":
-                    raw = str(row.get("LINK_FOTO", "")).strip()
+            for i in range(len(tbl)):
+                if estados[i] == ESTADO_PENDIENTE:
+                    raw = tbl.strs("LINK_FOTO")[i]
                     url = raw if raw.startswith("http") else ""
                     if '"' in raw:
                         parts = raw.split('"')
@@ -1012,14 +2504,16 @@ class SheetsManager:
                             url = parts[1]
                     pendientes.append({
                         "row_num": i + 2,
-                        "uuid": row.get("UUID_REF"),
-                        "cliente": row.get("CLIENTE"),
-                        "vendedor": row.get("VENDEDOR"),
+                        "uuid": tbl.strs("UUID_REF")[i],
+                        "cliente": tbl.strs("CLIENTE")[i],
+                        "vendedor": tbl.strs("VENDEDOR")[i],
                         "url_foto": url,
-                        "msg_id_telegram": row.get("MSG_ID_SUPERVISOR"),
-                        "fecha": row.get("FECHA", ""),
-                        "hora": row.get("HORA", ""),
-                        "tipo": row.get("TIPO_PDV", ""),
+                        "url_web": tbl.strs("LINK_WEB")[i],
+                        "url_thumb": tbl.strs("LINK_THUMB")[i],
+                        "msg_id_telegram": str(msg_ids[i]) if msg_ids[i] else "",
+                        "fecha": tbl.strs("FECHA")[i],
+                        "hora": tbl.strs("HORA")[i],
+                        "tipo": tbl.strs("TIPO_PDV")[i],
                     })
             return pendientes
         except Exception as e:
@@ -1039,9 +2533,10 @@ class SheetsManager:
             if current_status and current_status not in ("Pendiente", ""):
                 return "LOCKED"
 
-            ws.update_cell(row_num, 8, new_status)
-            ws.update_cell(row_num, 9, comments)
-            ws.update_cell(row_num, 14, "") 
+            with self._write_batch("STATS", ws) as wb:
+                wb.set_range(f"H{row_num}:I{row_num}", [[new_status, comments]])
+                wb.set_cell(row_num, 14, "")
+            self._stats_replica.patch(row_num, {8: new_status, 9: comments, 14: ""})
             return "OK"
         except Exception:
             return "ERROR"
@@ -1056,25 +2551,24 @@ class SheetsManager:
                 fid = drive_link.split("/d/")[1].split("/")[0]
             else:
                 return None
-            request = self.drive_service.files().get_media(fileId=fid)
-            fh = io.BytesIO()
-            downloader = MediaIoBaseDownload(fh, request)
-            done = False
-            while not done:
-                _, done = downloader.next_chunk()
+            # La descarga por chunks no pasa por execute(): se mide acá
+            with self.api_metrics.track("drive:get_media") as info:
+                request = self.drive_service.files().get_media(fileId=fid)
+                fh = io.BytesIO()
+                downloader = MediaIoBaseDownload(fh, request)
+                done = False
+                while not done:
+                    _, done = downloader.next_chunk()
+                info["bytes"] = fh.tell()
             return base64.b64encode(fh.getvalue()).decode("utf-8")
         except Exception:
             return None
 
     def get_all_hashes(self) -> List[str]:
-        ws = self._get_ws("RAW_LOGS")
-        if not ws:
-            return []
-        try:
-            vals = ws.col_values(11)
-            return vals[1:] if len(vals) > 1 else []
-        except Exception:
+        rep = self._tail_sync("RAW_LOGS")
+        if not rep:
             return []
+        return [h for h in rep.column(RAW_LOGS_HEADERS.index("HASH") + 1) if h]
 
     def _parse_ddmmyyyy(self, s: str) -> Optional[date]:
         s = (s or "").strip()
@@ -1085,50 +2579,28 @@ class SheetsManager:
         except Exception:
             return None
 
-    def _stats_from_rows(
-        self,
-        stats_rows: List[Dict[str, Any]],
-        uuid_to_user: Dict[str, str],
-        user_id: Optional[int],
-        start_d: Optional[date],
-        end_d: Optional[date],
-    ) -> Dict[str, Any]:
-        counts = {"aprobadas": 0, "destacadas": 0, "rechazadas": 0, "pendientes": 0, "total": 0, "puntos": 0}
-        min_d: Optional[date] = None
-        max_d: Optional[date] = None
-
-        for row in stats_rows:
-            uuid_ref = str(row.get("UUID_REF", "")).strip()
-            if user_id is not None and uuid_to_user.get(uuid_ref) != str(user_id):
-                continue
-
-            d = self._parse_ddmmyyyy(str(row.get("FECHA", "")).strip())
-            if d is None:
-                continue
-
-            if start_d and d < start_d:
-                continue
-            if end_d and d > end_d:
-                continue
-
-            min_d = d if min_d is None else min(min_d, d)
-            max_d = d if max_d is None else max(max_d, d)
-
-            estado = str(row.get("ESTADO_AUDITORIA", "")).strip()
-            if estado == "Aprobado":
-                counts["aprobadas"] += 1
-                counts["puntos"] += 1
-            elif estado == "Destacado":
-                counts["destacadas"] += 1
-                counts["aprobadas"] += 1
-                counts["puntos"] += 2
-            elif estado == "Rechazado":
-                counts["rechazadas"] += 1
-            else:
-                counts["pendientes"] += 1
-            counts["total"] += 1
+    def _report_tables(self) -> Tuple[Optional[ColumnarTable], Optional[ColumnarTable]]:
+        """Vistas columnares de STATS y RAW_LOGS (RAW_LOGS es opcional para los reportes)."""
+        rep = self._stats_replica_sync()
+        stats = rep.columnar() if rep else None
+        raw = None
+        try:
+            raw_rep = self._tail_sync("RAW_LOGS")
+            raw = raw_rep.columnar() if raw_rep else None
+        except Exception:
+            pass
+        return stats, raw
 
-        return {"counts": counts, "min_date": min_d, "max_date": max_d}
+    def _report_aggregates(self) -> StatsAggregates:
+        """
+        Agregados de /stats y /ranking al día. Con las réplicas frescas es O(1):
+        los cambios de estado y filas nuevas ya se aplicaron incrementalmente.
+        """
+        stats, raw = self._report_tables()
+        if stats is None:
+            stats = ColumnarTable(STATS_HEADERS, [], STATS_SCHEMA)
+        self._apply_archive_summaries()
+        return self._aggregates.sync(stats, raw)
 
     def get_stats_report(self, user_id: Optional[int] = None) -> Dict[str, Any]:
         ws_stats = self._get_ws("STATS")
@@ -1147,40 +2619,12 @@ class SheetsManager:
                 },
             }
 
-        try:
-            stats_rows = ws_stats.get_all_records()
-        except Exception:
-            stats_rows = []
-
-        uuid_to_user: Dict[str, str] = {}
-        try:
-            raw_rows = ws_raw.get_all_records()
-            for r in raw_rows:
-                uid = str(r.get("ID_USER", "")).strip()
-                uu = str(r.get("UUID", "")).strip()
-                if uid and uu:
-                    uuid_to_user[uu] = uid
-        except Exception:
-            pass
-
+        agg = self._report_aggregates()
         today = datetime.now(AR_TZ).date()
         last30_start = today - timedelta(days=30)
 
-        historico = self._stats_from_rows(
-            stats_rows=stats_rows,
-            uuid_to_user=uuid_to_user,
-            user_id=user_id,
-            start_d=None,
-            end_d=None,
-        )
-
-        ultimo_mes = self._stats_from_rows(
-            stats_rows=stats_rows,
-            uuid_to_user=uuid_to_user,
-            user_id=user_id,
-            start_d=last30_start,
-            end_d=today,
-        )
+        historico = agg.user_report(user_id, None, None)
+        ultimo_mes = agg.user_report(user_id, last30_start, today)
 
         return {
             "historico": historico,
@@ -1197,75 +2641,478 @@ class SheetsManager:
         if not ws_stats or not ws_raw:
             return []
 
-        try:
-            stats_rows = ws_stats.get_all_records()
-        except Exception:
-            stats_rows = []
-
-        uuid_to_user: Dict[str, str] = {}
-        user_to_name: Dict[str, str] = {}
-        try:
-            raw_rows = ws_raw.get_all_records()
-            for r in raw_rows:
-                uid = str(r.get("ID_USER", "")).strip()
-                uu = str(r.get("UUID", "")).strip()
-                uname = str(r.get("USER_NAME", "")).strip()
-                if uid and uu:
-                    uuid_to_user[uu] = uid
-                if uid and uname:
-                    user_to_name[uid] = uname
-        except Exception:
-            pass
-
+        agg = self._report_aggregates()
         today = datetime.now(AR_TZ).date()
-        month_start = today.replace(day=1)
-        
-        vendedor_stats: Dict[str, Dict[str, int]] = {}
-        
-        for row in stats_rows:
-            uuid_ref = str(row.get("UUID_REF", "")).strip()
-            user_id = uuid_to_user.get(uuid_ref, "")
-            
-            vendedor = user_to_name.get(user_id, str(row.get("VENDEDOR", "")).strip() or "Sin nombre")
-            
-            d = self._parse_ddmmyyyy(str(row.get("FECHA", "")).strip())
-            if d is None or d < month_start or d > today:
-                continue
-            
-            estado = str(row.get("ESTADO_AUDITORIA", "")).strip()
-            
-            if vendedor not in vendedor_stats:
-                vendedor_stats[vendedor] = {
-                    "puntos": 0, "aprobadas": 0, "destacadas": 0, "rechazadas": 0, "total": 0
-                }
-            
-            if estado == "Aprobado":
-                vendedor_stats[vendedor]["aprobadas"] += 1
-                vendedor_stats[vendedor]["puntos"] += 1
-                vendedor_stats[vendedor]["total"] += 1
-            elif estado == "Destacado":
-                vendedor_stats[vendedor]["destacadas"] += 1
-                vendedor_stats[vendedor]["aprobadas"] += 1
-                vendedor_stats[vendedor]["puntos"] += 2
-                vendedor_stats[vendedor]["total"] += 1
-            elif estado == "Rechazado":
-                vendedor_stats[vendedor]["rechazadas"] += 1
-                vendedor_stats[vendedor]["total"] += 1
-        
+        vendedor_stats = agg.month_ranking(today.replace(day=1), today)
+
         ranking = []
-        for vendedor, stats in vendedor_stats.items():
+        for vendedor, c in vendedor_stats.items():
+            if not any(c):
+                continue
+            counts = counts_dict(c)
             ranking.append({
                 "vendedor": vendedor,
-                "puntos": stats["puntos"],
-                "aprobadas": stats["aprobadas"],
-                "destacadas": stats["destacadas"],
-                "rechazadas": stats["rechazadas"],
-                "total": stats["total"]
+                "puntos": counts["puntos"],
+                "aprobadas": counts["aprobadas"],
+                "destacadas": counts["destacadas"],
+                "rechazadas": counts["rechazadas"],
+                # El ranking no cuenta pendientes en el total
+                "total": counts["aprobadas"] + counts["rechazadas"],
             })
-        
+
         ranking.sort(key=lambda x: x["puntos"], reverse=True)
         return ranking
 
+    # ============================================================================
+    # ARCHIVO MENSUAL
+    # ============================================================================
+
+    def _archive_book(self) -> Any:
+        """Spreadsheet donde van las pestañas de archivo (el mismo, salvo ARCHIVE_SPREADSHEET_ID)."""
+        if not ARCHIVE_SPREADSHEET_ID or self.gc is None or ARCHIVE_SPREADSHEET_ID == self._sheet_id:
+            return self.spreadsheet
+        if self._archive_spreadsheet is None:
+            book = self._gspread_call(
+                lambda: self.gc.open_by_key(ARCHIVE_SPREADSHEET_ID),
+                op="archive:open",
+                retries=2,
+            )
+            self._archive_spreadsheet = InstrumentedSpreadsheet(book, self.api_metrics, self.rate_limiter)
+        return self._archive_spreadsheet
+
+    def _archive_ws(self, title: str, headers: List[str], *, create: bool = True) -> Optional[Any]:
+        """Pestaña de archivo/resumen; la crea con headers si no existe (y `create`)."""
+        ws = self._archive_ws_cache.get(title)
+        if ws is not None:
+            return ws
+        book = self._archive_book()
+        if book is None:
+            return None
+        try:
+            ws = self._gspread_call(lambda: book.worksheet(title), op=f"archive:worksheet:{title}", retries=0)
+        except Exception as e:
+            if not isinstance(e, gspread.exceptions.WorksheetNotFound) and "not found" not in str(e).lower():
+                raise
+            if not create:
+                return None
+            ws = self._gspread_call(
+                lambda: book.add_worksheet(title=title, rows=100, cols=len(headers)),
+                op="archive:add_worksheet",
+                retries=1,
+            )
+            self._gspread_call(
+                lambda: ws.update(f"A1:{self._col_letter(len(headers))}1", [headers]),
+                op=f"archive:{title}:header",
+                retries=1,
+            )
+            logger.info(f"🗄️ Creada pestaña de archivo: {title}")
+        self._archive_ws_cache[title] = ws
+        return ws
+
+    def _archive_records(self, title: str, headers: List[str]) -> List[Dict[str, Any]]:
+        """Filas de una pestaña de resumen (cacheadas; [] si todavía no existe)."""
+        def _load() -> List[Dict[str, Any]]:
+            ws = self._archive_ws(title, headers, create=False)
+            if ws is None:
+                return []
+            vals = ws.get_all_values()
+            hdr = [str(h).strip() for h in (vals[0] if vals else headers)]
+            return [dict(zip(hdr, r)) for r in vals[1:] if any(str(v).strip() for v in r)]
+
+        try:
+            return self._gspread_call(
+                _load,
+                op=f"archive:{title}:read",
+                cache_key=f"archive:{title}",
+                cache_ttl=ARCHIVE_SUMMARY_TTL_SECONDS,
+                retries=1,
+                stale_while_revalidate=True,
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo leer {title}: {e}")
+            return []
+
+    def _apply_archive_summaries(self) -> None:
+        """Pasa los resúmenes de meses archivados a los agregados y al historial (si cambiaron)."""
+        mensual = self._archive_records("RESUMEN_MENSUAL", RESUMEN_MENSUAL_HEADERS)
+        clientes = self._archive_records("RESUMEN_CLIENTES", RESUMEN_CLIENTES_HEADERS)
+        if mensual is self._archive_applied[0] and clientes is self._archive_applied[1]:
+            return
+        self._aggregates.set_baseline(mensual)
+        archived: Dict[Tuple[str, int], List[Tuple[str, str, str]]] = {}
+        for r in clientes:
+            try:
+                key = (str(r.get("CLIENTE", "")).strip(), int(float(str(r.get("CHAT_ID", "")).strip())))
+                ultimas = json.loads(str(r.get("ULTIMAS") or "[]"))
+            except (TypeError, ValueError):
+                continue
+            archived[key] = [(str(u[0]), str(u[1]), str(u[2])) for u in ultimas if len(u) >= 3]
+        self._client_history.set_archived(archived)
+        self._archive_applied = (mensual, clientes)
+
+    @staticmethod
+    def _month_of(fecha: str) -> Optional[Tuple[int, int]]:
+        """'DD/MM/AAAA[ hh:mm:ss]' → (año, mes)."""
+        parts = fecha.strip()[:10].split("/")
+        if len(parts) != 3:
+            return None
+        try:
+            y, m = int(parts[2]), int(parts[1])
+        except ValueError:
+            return None
+        return (y, m) if 1 <= m <= 12 else None
+
+    @lane_api(LANE_SYNC)
+    def archive_closed_months(self, keep_months: Optional[int] = None,
+                              max_rows: int = ARCHIVE_MAX_ROWS_PER_RUN) -> Dict[str, Any]:
+        """
+        Mueve los meses cerrados de STATS y RAW_LOGS a pestañas por mes y
+        actualiza RESUMEN_MENSUAL (por vendedor y mes) y RESUMEN_CLIENTES
+        (últimas visitas por cliente y grupo), para que /stats, /ranking y el
+        historial sigan completos sin leer los archivos.
+
+        Solo se archiva un prefijo de filas (las hojas crecen en orden): se
+        corta en la primera fila del período que se conserva, pendiente de
+        evaluar, con evaluación sin sincronizar a Telegram o sin fecha válida.
+        RAW_LOGS además conserva los UUID que siguen vivos en STATS.
+
+        Orden: copiar al archivo (saltea UUIDs ya copiados) → borrar de la hoja
+        viva → resúmenes (recalculados desde la pestaña de archivo). Un mes solo
+        entra a los resúmenes cuando ninguna de sus filas archivadas sigue en
+        STATS (si no, /stats y /ranking las contarían dos veces); los que
+        quedan esperando se anotan en BOT_CONTROL!F2 y se retoman en la
+        próxima corrida. Si se corta a mitad, la próxima completa sin duplicar.
+        Correrlo en horario sin actividad: borrar filas corre los números de
+        fila que tengan otros procesos (p.ej. el visor). Solo corre con
+        ARCHIVE_ENABLED=1: el dashboard lee STATS directo y no ve lo archivado.
+        """
+        result: Dict[str, Any] = {"stats": 0, "raw": 0, "months": []}
+        if not ARCHIVE_ENABLED:
+            return result
+        keep = max(1, keep_months or ARCHIVE_KEEP_MONTHS)
+        today = datetime.now(AR_TZ).date()
+        cutoff = today.year * 12 + today.month - 1 - keep
+
+        ws_stats = self._get_ws("STATS")
+        ws_raw = self._get_ws("RAW_LOGS")
+        rep = self._stats_replica_sync(max_age=0)
+        raw_rep = self._tail_sync("RAW_LOGS", max_age=0)
+        if not ws_stats or not ws_raw or not rep or not raw_rep:
+            return result
+
+        # --- STATS: prefijo archivable (copias, para no retener los locks durante la red)
+        with rep.lock:
+            uuid_to_user = raw_rep.columnar().lookup("UUID", "ID_USER")
+            col = {h: i for i, h in enumerate(rep.header)}
+            i_fecha, i_estado, i_sync = col.get("FECHA", 0), col.get("ESTADO_AUDITORIA", 7), col.get("SYNC_TELEGRAM", 13)
+            i_uuid, i_msg, i_chat = col.get("UUID_REF", 9), col.get("MSG_ID_SUPERVISOR", 10), col.get("CHAT_ID_REF", 12)
+            stats_rows: List[List[str]] = []
+            for row in rep.rows[:max_rows]:
+                ym = self._month_of(row[i_fecha])
+                if ym is None or ym[0] * 12 + ym[1] - 1 > cutoff:
+                    break
+                estado = row[i_estado].strip()
+                if estado == "Pendiente":
+                    break
+                unsynced = (estado and row[i_sync].strip().upper() != "OK"
+                            and row[i_msg].strip() and row[i_chat].strip())
+                if unsynced:
+                    break
+                stats_rows.append(list(row[:len(ARCHIVE_STATS_HEADERS)]) + [uuid_to_user.get(row[i_uuid].strip(), "")])
+            hot_uuids = {r[i_uuid].strip() for r in rep.rows[len(stats_rows):]}
+
+        with raw_rep.lock:
+            raw_rows: List[List[str]] = []
+            for row in raw_rep.rows[:max_rows]:
+                ym = self._month_of(row[1])
+                if ym is None or ym[0] * 12 + ym[1] - 1 > cutoff or row[0].strip() in hot_uuids:
+                    break
+                raw_rows.append(list(row[:len(RAW_LOGS_HEADERS)]))
+
+        pending = self._archive_pending_months()
+        if not stats_rows and not raw_rows and not pending:
+            logger.info("🗄️ Archivo mensual: nada para archivar")
+            return result
+
+        def by_month(rows: List[List[str]], date_idx: int) -> Dict[Tuple[int, int], List[List[str]]]:
+            out: Dict[Tuple[int, int], List[List[str]]] = {}
+            for r in rows:
+                out.setdefault(self._month_of(r[date_idx]), []).append(r)
+            return out
+
+        # --- 1) Copiar a las pestañas de archivo (idempotente por UUID)
+        stats_headers = ARCHIVE_STATS_HEADERS + ["ID_USER"]
+        archived_months: Dict[Tuple[int, int], List[List[str]]] = {}
+        for (y, m), rows in sorted(by_month(stats_rows, i_fecha).items()):
+            title = f"STATS_{y}_{m:02d}"
+            ws_a = self._archive_ws(title, stats_headers)
+            existing = set(self._gspread_call(lambda: ws_a.col_values(STATS_HEADERS.index("UUID_REF") + 1),
+                                              op=f"archive:{title}:uuids", retries=2))
+            new_rows = [r for r in rows if r[i_uuid].strip() not in existing]
+            if new_rows:
+                # Sin reintentos: un append que llegó pero "falló" duplicaría filas;
+                # la próxima corrida completa lo que falte (saltea UUIDs ya copiados)
+                self._gspread_call(lambda: ws_a.append_rows(new_rows, value_input_option="RAW"),
+                                   op=f"archive:{title}:append", retries=0)
+            # Resumen desde el archivo completo del mes (incluye corridas anteriores)
+            all_vals = self._gspread_call(lambda: ws_a.get_all_values(), op=f"archive:{title}:read", retries=2)
+            archived_months[(y, m)] = [list(r) + [""] * (len(stats_headers) - len(r)) for r in all_vals[1:]]
+            result["months"].append(f"{y}-{m:02d}")
+
+        # Meses de corridas anteriores que todavía no entraron a los resúmenes
+        for (y, m) in pending:
+            if (y, m) in archived_months:
+                continue
+            title = f"STATS_{y}_{m:02d}"
+            ws_a = self._archive_ws(title, stats_headers, create=False)
+            if ws_a is None:
+                continue
+            all_vals = self._gspread_call(lambda: ws_a.get_all_values(), op=f"archive:{title}:read", retries=2)
+            archived_months[(y, m)] = [list(r) + [""] * (len(stats_headers) - len(r)) for r in all_vals[1:]]
+        if archived_months:
+            # Antes de borrar de la hoja viva: si no se puede anotar, se corta acá
+            self._set_archive_pending_months(sorted(archived_months))
+
+        for (y, m), rows in sorted(by_month(raw_rows, 1).items()):
+            title = f"RAW_LOGS_{y}_{m:02d}"
+            ws_a = self._archive_ws(title, RAW_LOGS_HEADERS)
+            existing = set(self._gspread_call(lambda: ws_a.col_values(1), op=f"archive:{title}:uuids", retries=2))
+            new_rows = [r for r in rows if r[0].strip() not in existing]
+            if new_rows:
+                # Sin reintentos: un append que llegó pero "falló" duplicaría filas;
+                # la próxima corrida completa lo que falte (saltea UUIDs ya copiados)
+                self._gspread_call(lambda: ws_a.append_rows(new_rows, value_input_option="RAW"),
+                                   op=f"archive:{title}:append", retries=0)
+
+        # --- 2) Borrar el prefijo de la hoja viva (verificando que siga siendo el mismo)
+        for sheet, ws, rows, key_idx in (("STATS", ws_stats, stats_rows, i_uuid), ("RAW_LOGS", ws_raw, raw_rows, 0)):
+            if not rows:
+                continue
+            letter = self._col_letter(key_idx + 1)
+            current = self._gspread_call(lambda: ws.get(f"{letter}2:{letter}{len(rows) + 1}"),
+                                         op=f"{sheet}:archive_verify", retries=2)
+            current_keys = [(r[0] if r else "").strip() for r in current]
+            if current_keys != [r[key_idx].strip() for r in rows]:
+                logger.warning(f"⚠️ {sheet} cambió durante el archivo; no se borran filas (se reintenta en la próxima corrida)")
+                continue
+            # Sin reintentos: un delete que llegó pero "falló" no debe repetirse
+            try:
+                self._gspread_call(lambda: self._delete_rows(sheet, ws, 2, len(rows) + 1),
+                                   op=f"{sheet}:archive_delete", retries=0)
+            except Exception as e:
+                logger.error(f"❌ No se pudieron borrar de {sheet} las filas archivadas: {e}")
+                continue
+            result["stats" if sheet == "STATS" else "raw"] = len(rows)
+
+        # --- 3) Resúmenes: solo meses sin filas archivadas vivas en STATS
+        if archived_months:
+            with rep.lock:
+                live_uuids = {r[i_uuid].strip() for r in rep.rows}
+            ready = {ym: rows for ym, rows in archived_months.items()
+                     if not any(r[i_uuid].strip() in live_uuids for r in rows)}
+            waiting = sorted(set(archived_months) - set(ready))
+            if ready:
+                self._write_archive_summaries(ready)
+            try:
+                self._set_archive_pending_months(waiting)
+            except Exception as e:
+                # Queda la lista anterior (un superconjunto): recalcular de más no duplica
+                logger.warning(f"⚠️ No se pudo actualizar BOT_CONTROL!{ARCHIVE_PENDING_CELL}: {e}")
+            if waiting:
+                logger.warning(
+                    f"⚠️ Resumen pendiente para {', '.join(f'{y}-{m:02d}' for y, m in waiting)}: "
+                    f"sus filas siguen en STATS (se retoma en la próxima corrida)"
+                )
+
+        self._local_cache.pop("archive:RESUMEN_MENSUAL")
+        self._local_cache.pop("archive:RESUMEN_CLIENTES")
+        self._apply_archive_summaries()
+        logger.info(
+            f"🗄️ Archivo mensual: STATS -{result['stats']} filas, RAW_LOGS -{result['raw']} filas "
+            f"({', '.join(result['months']) or 'sin meses nuevos'})"
+        )
+        return result
+
+    def _archive_pending_months(self) -> List[Tuple[int, int]]:
+        """Meses con resumen pendiente, de BOT_CONTROL!F2 ('AAAA-MM,AAAA-MM')."""
+        ws = self._get_ws("BOT_CONTROL")
+        if not ws:
+            return []
+        res = self._gspread_call(lambda: ws.get(ARCHIVE_PENDING_CELL), op="BOT_CONTROL:archive_pending", retries=2)
+        raw = str(res[0][0] if res and res[0] else "")
+        months: List[Tuple[int, int]] = []
+        for part in raw.split(","):
+            y, _, m = part.strip().partition("-")
+            if y.isdigit() and m.isdigit() and 1 <= int(m) <= 12:
+                months.append((int(y), int(m)))
+        return months
+
+    def _set_archive_pending_months(self, months: List[Tuple[int, int]]) -> None:
+        ws = self._get_ws("BOT_CONTROL")
+        if not ws:
+            raise RuntimeError("BOT_CONTROL no disponible")
+        value = ",".join(f"{y}-{m:02d}" for y, m in months)
+        self._gspread_call(
+            lambda: ws.update(ARCHIVE_PENDING_CELL, [[value]], value_input_option="RAW"),
+            op="BOT_CONTROL:archive_pending_write",
+            retries=2,
+        )
+
+    def _write_archive_summaries(self, archived_months: Dict[Tuple[int, int], List[List[str]]]) -> None:
+        """Recalcula RESUMEN_MENSUAL para esos meses y fusiona RESUMEN_CLIENTES."""
+        i_fecha = STATS_HEADERS.index("FECHA")
+        i_vend = STATS_HEADERS.index("VENDEDOR")
+        i_cli = STATS_HEADERS.index("CLIENTE")
+        i_tipo = STATS_HEADERS.index("TIPO_PDV")
+        i_estado = STATS_HEADERS.index("ESTADO_AUDITORIA")
+        i_uuid = STATS_HEADERS.index("UUID_REF")
+        i_chat = STATS_HEADERS.index("CHAT_ID_REF")
+        i_user = len(ARCHIVE_STATS_HEADERS)
+        codes = {"Aprobado": 0, "Destacado": 1, "Rechazado": 2}
+
+        # RESUMEN_MENSUAL: se reemplazan las filas de los meses recalculados
+        months = {f"{y}-{m:02d}" for (y, m) in archived_months}
+        self._local_cache.pop("archive:RESUMEN_MENSUAL")
+        summary = [r for r in self._archive_records("RESUMEN_MENSUAL", RESUMEN_MENSUAL_HEADERS)
+                   if str(r.get("MES", "")).strip() not in months]
+        for (y, m), rows in sorted(archived_months.items()):
+            groups: Dict[Tuple[str, str], Dict[str, Any]] = {}
+            seen: set = set()
+            for r in rows:
+                o = parse_date_ordinal(r[i_fecha].strip())
+                if not o:
+                    continue
+                # Una fila duplicada en el archivo (append repetido) cuenta una sola vez
+                uuid_ref = r[i_uuid].strip()
+                if uuid_ref:
+                    if uuid_ref in seen:
+                        continue
+                    seen.add(uuid_ref)
+                g = groups.setdefault((r[i_user].strip(), r[i_vend].strip()), {"c": [0, 0, 0, 0], "min": o, "max": o})
+                g["c"][codes.get(r[i_estado].strip(), 3)] += 1
+                g["min"], g["max"] = min(g["min"], o), max(g["max"], o)
+            for (user, vend), g in groups.items():
+                c = counts_dict(g["c"])
+                summary.append({
+                    "MES": f"{y}-{m:02d}", "ID_USER": user, "VENDEDOR": vend,
+                    "APROBADAS": c["aprobadas"], "DESTACADAS": c["destacadas"], "RECHAZADAS": c["rechazadas"],
+                    "PENDIENTES": c["pendientes"], "TOTAL": c["total"], "PUNTOS": c["puntos"],
+                    "PRIMERA_FECHA": date.fromordinal(g["min"]).strftime("%d/%m/%Y"),
+                    "ULTIMA_FECHA": date.fromordinal(g["max"]).strftime("%d/%m/%Y"),
+                })
+        self._rewrite_archive_tab("RESUMEN_MENSUAL", RESUMEN_MENSUAL_HEADERS,
+                                  sorted(summary, key=lambda r: (str(r.get("MES", "")), str(r.get("VENDEDOR", "")))))
+
+        # RESUMEN_CLIENTES: últimas N visitas archivadas por (cliente, grupo)
+        self._local_cache.pop("archive:RESUMEN_CLIENTES")
+        clientes: Dict[Tuple[str, str], List[List[str]]] = {}
+        for r in self._archive_records("RESUMEN_CLIENTES", RESUMEN_CLIENTES_HEADERS):
+            try:
+                clientes[(str(r.get("CLIENTE", "")).strip(), str(r.get("CHAT_ID", "")).strip())] = \
+                    json.loads(str(r.get("ULTIMAS") or "[]"))
+            except ValueError:
+                continue
+        for rows in archived_months.values():
+            for r in rows:
+                cliente, chat = r[i_cli].strip(), r[i_chat].strip()
+                if not cliente or not chat:
+                    continue
+                try:
+                    chat = str(int(float(chat)))
+                except ValueError:
+                    continue
+                visits = clientes.setdefault((cliente, chat), [])
+                if any(v[3] == r[i_uuid].strip() for v in visits if len(v) > 3):
+                    continue
+                visits.append([r[i_fecha].strip(), r[i_tipo].strip(), r[i_estado].strip() or "Pendiente",
+                               r[i_uuid].strip()])
+        now_txt = datetime.now(AR_TZ).strftime("%d/%m/%Y %H:%M:%S")
+        client_rows = []
+        for (cliente, chat), visits in sorted(clientes.items()):
+            visits.sort(key=lambda v: parse_date_ordinal(v[0]), reverse=True)
+            client_rows.append({
+                "CLIENTE": cliente, "CHAT_ID": chat,
+                "ULTIMAS": json.dumps(visits[:ARCHIVE_CLIENT_HISTORY_KEEP], ensure_ascii=False),
+                "ACTUALIZADO": now_txt,
+            })
+        self._rewrite_archive_tab("RESUMEN_CLIENTES", RESUMEN_CLIENTES_HEADERS, client_rows)
+
+    def _rewrite_archive_tab(self, title: str, headers: List[str], records: List[Dict[str, Any]]) -> None:
+        """
+        Reescribe completa una pestaña de resumen (son chicas: filas por
+        vendedor/mes o por cliente). Primero pisa los valores y después blanquea
+        solo las filas sobrantes: si algo falla a mitad, la pestaña nunca queda
+        vacía (a lo sumo conserva filas viejas al final, que la próxima corrida
+        recalcula).
+        """
+        ws = self._archive_ws(title, headers)
+        values = [headers] + [[r.get(h, "") for h in headers] for r in records]
+        last_col = self._col_letter(len(headers))
+        old_len = len(self._gspread_call(lambda: ws.col_values(1), op=f"archive:{title}:len", retries=2))
+        self._gspread_call(
+            lambda: ws.update(f"A1:{last_col}{len(values)}", values, value_input_option="RAW"),
+            op=f"archive:{title}:write",
+            retries=2,
+        )
+        if old_len > len(values):
+            blank = [[""] * len(headers) for _ in range(old_len - len(values))]
+            self._gspread_call(
+                lambda: ws.update(f"A{len(values) + 1}:{last_col}{old_len}", blank, value_input_option="RAW"),
+                op=f"archive:{title}:trim",
+                retries=2,
+            )
+
+    # ============================================================================
+    # ÉPOCA DE ROLES (detección barata de cambios en GROUP_ROLES)
+    # ============================================================================
+
+    def _note_roles_epoch(self, raw: Any) -> int:
+        """Registra la época leída de BOT_CONTROL!E2 (ms de la última escritura de roles)."""
+        try:
+            epoch = int(float(str(raw).strip())) if str(raw).strip() else 0
+        except ValueError:
+            epoch = 0
+        self.roles_epoch = max(self.roles_epoch, epoch)
+        self._cache_set("roles:epoch", self.roles_epoch, ROLES_EPOCH_TTL_SECONDS)
+        return self.roles_epoch
+
+    def get_roles_epoch(self) -> int:
+        """
+        Época de GROUP_ROLES: crece cada vez que algún proceso escribe roles.
+        Quien tenga roles cacheados (bot, visor, dashboard) compara contra la
+        época con la que cargó y recarga solo si cambió. Una celda, cacheada
+        ROLES_EPOCH_TTL_SECONDS (y refrescada sin costo por el semáforo).
+        """
+        cached = self._cache_get("roles:epoch")
+        if cached is not None:
+            return int(cached)
+        ws = self._get_ws("BOT_CONTROL")
+        if not ws:
+            return self.roles_epoch
+        try:
+            res = self._gspread_call(lambda: ws.get("E2"), op="BOT_CONTROL:roles_epoch", retries=1)
+        except Exception as e:
+            logger.debug(f"No se pudo leer la época de roles: {e}")
+            return self.roles_epoch
+        return self._note_roles_epoch(res[0][0] if res and res[0] else "")
+
+    def bump_roles_epoch(self) -> int:
+        """Marca GROUP_ROLES como modificada (una escritura, sin leer antes)."""
+        epoch = max(int(time.time() * 1000), self.roles_epoch + 1)
+        ws = self._get_ws("BOT_CONTROL")
+        if ws:
+            try:
+                self._gspread_call(
+                    lambda: ws.update("E2", [[str(epoch)]], value_input_option="RAW"),
+                    op="BOT_CONTROL:roles_epoch_write",
+                    retries=2,
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudo publicar la época de roles: {e}")
+        self.roles_epoch = epoch
+        self._cache_set("roles:epoch", epoch, ROLES_EPOCH_TTL_SECONDS)
+        return epoch
+
     def get_semaforo_estado(self) -> Dict[str, Any]:
         ws = self._get_ws("BOT_CONTROL")
         if not ws:
@@ -1276,7 +3123,7 @@ class SheetsManager:
             if ws.row_count < 2:
                 return {"estado": "LIBRE", "inicio": None, "archivos_total": 0, "progreso": "", "timestamp_lectura": datetime.now(AR_TZ)}
             
-            result = ws.get("A2:D2")
+            result = ws.get("A2:E2")
             valores = result[0] if result and len(result) > 0 else []
             
             if len(valores) < 1:
@@ -1287,6 +3134,8 @@ class SheetsManager:
             inicio = str(valores[1] if len(valores) > 1 and valores[1] else "").strip()
             archivos = valores[2] if len(valores) > 2 and valores[2] else 0
             progreso = str(valores[3] if len(valores) > 3 and valores[3] else "").strip()
+            # Viaja gratis con el polling del semáforo (ver get_roles_epoch)
+            self._note_roles_epoch(valores[4] if len(valores) > 4 else "")
             
             # Normalizar estado
             if not estado or estado not in ("LIBRE", "DISTRIBUYENDO"):
@@ -1311,16 +3160,19 @@ class SheetsManager:
         
         try:
             ts = timestamp or datetime.now(AR_TZ)
-            ws.append_row([str(uuid.uuid4()), str(chat_id), str(user_id), username, file_id, ts.strftime("%d/%m/%Y %H:%M:%S"), str(message_id), "NO"])
+            values = [str(uuid.uuid4()), str(chat_id), str(user_id), username, file_id, ts.strftime("%d/%m/%Y %H:%M:%S"), str(message_id), "NO"]
+            res = ws.append_row(values)
+            self._tail_append("COLA_IMAGENES", self._row_from_append_response(res), values)
             return True
         except Exception:
             return False
 
     def get_imagenes_pendientes(self) -> List[Dict[str, Any]]:
-        ws = self._get_ws("COLA_IMAGENES")
-        if not ws: return []
+        # Job de 30s: lectura incremental (cola + PROCESADO), no descarga completa
+        rep = self._tail_sync("COLA_IMAGENES", max_age=0)
+        if not rep: return []
         try:
-            rows = self._gspread_call(lambda: ws.get_all_records(), op='ws:get_all_records', retries=2)
+            rows = rep.records()
             pendientes = []
             for i, row in enumerate(rows):
                 if str(row.get("PROCESADO", "")).strip().upper() != "SI":
@@ -1343,6 +3195,7 @@ class SheetsManager:
         if not ws: return False
         try:
             ws.update_cell(row_num, 8, "SI")
+            self._tails["COLA_IMAGENES"].patch(row_num, {8: "SI"})
             return True
         except Exception:
             return False
@@ -1350,11 +3203,13 @@ class SheetsManager:
     def limpiar_cola_imagenes(self) -> int:
         ws = self._get_ws("COLA_IMAGENES")
         if not ws: return 0
+        rep = self._tail_sync("COLA_IMAGENES", max_age=0)
+        if not rep: return 0
         try:
-            rows = self._gspread_call(lambda: ws.get_all_records(), op='ws:get_all_records', retries=2)
+            rows = rep.records()
             filas = [i + 2 for i, r in enumerate(rows) if str(r.get("PROCESADO", "")).strip().upper() == "SI"]
             for row_num in reversed(filas):
-                ws.delete_rows(row_num)
+                self._delete_rows("COLA_IMAGENES", ws, row_num)
             return len(filas)
         except Exception:
             return 0
@@ -1413,54 +3268,72 @@ class SheetsManager:
             return None
 
 
-    def get_all_group_roles(self) -> List[Dict[str, Any]]:
+    def _group_roles_index(self) -> Tuple[List[Dict[str, Any]], Dict[Tuple[int, int], str], Dict[int, str]]:
         """
-        Obtiene TODOS los roles de TODOS los grupos.
-        Para cache: se llama 1 vez cada 24hs.
-
-        Returns:
-            Lista de dicts con chat_id, user_id, rol
+        GROUP_ROLES parseada una sola vez por lectura: (lista, {(chat_id, user_id): rol},
+        {user_id: rol de su primera asignación}). Se recalcula solo cuando la
+        cache 'group_roles:all' trae otra lectura.
         """
         ws = self._get_ws("GROUP_ROLES")
         if not ws:
             # Si no existe, crearla
             ws = self._create_group_roles_sheet()
             if not ws:
-                return []
+                return [], {}, {}
+
+        # Usar get_all_values() en vez de get_all_records() para evitar
+        # problemas de precision con IDs numericos grandes/negativos
+        all_vals = self._gspread_call(
+            lambda: ws.get_all_values(),
+            op='GROUP_ROLES:get_all',
+            cache_key='group_roles:all',
+            cache_ttl=600,  # 10 min (se invalida al usar /setall_rol)
+            retries=2
+        )
+        parsed = self._group_roles_parsed
+        if parsed is not None and parsed[0] is all_vals:
+            return parsed[1]
+
+        result: List[Dict[str, Any]] = []
+        by_pair: Dict[Tuple[int, int], str] = {}
+        by_user: Dict[int, str] = {}
+        for row in all_vals[1:]:  # Skip header
+            if len(row) < 5:
+                continue
 
-        try:
-            # Usar get_all_values() en vez de get_all_records() para evitar
-            # problemas de precision con IDs numericos grandes/negativos
-            all_vals = self._gspread_call(
-                lambda: ws.get_all_values(),
-                op='GROUP_ROLES:get_all',
-                cache_key='group_roles:all',
-                cache_ttl=600,  # 10 min (se invalida al usar /setall_rol)
-                retries=2
-            )
+            chat_id_str = str(row[0]).strip()
+            user_id_str = str(row[1]).strip()
+            rol = str(row[4]).strip().lower()
 
-            result = []
-            for row in all_vals[1:]:  # Skip header
-                if len(row) < 5:
+            if chat_id_str and user_id_str and rol:
+                try:
+                    chat_id, user_id = int(float(chat_id_str)), int(float(user_id_str))
+                except ValueError:
                     continue
+                result.append({"chat_id": chat_id, "user_id": user_id, "rol": rol})
+                by_pair.setdefault((chat_id, user_id), rol)
+                by_user.setdefault(user_id, rol)
 
-                chat_id_str = str(row[0]).strip()
-                user_id_str = str(row[1]).strip()
-                rol = str(row[4]).strip().lower()
+        logger.info(f"📊 Cargados {len(result)} roles desde GROUP_ROLES")
+        index = (result, by_pair, by_user)
+        self._group_roles_parsed = (all_vals, index)
+        return index
 
-                if chat_id_str and user_id_str and rol:
-                    try:
-                        result.append({
-                            "chat_id": int(float(chat_id_str)),
-                            "user_id": int(float(user_id_str)),
-                            "rol": rol
-                        })
-                    except ValueError:
-                        continue
+    def get_all_group_roles(self, fresh: bool = False) -> List[Dict[str, Any]]:
+        """
+        Obtiene TODOS los roles de TODOS los grupos.
+        Para cache: se llama 1 vez cada 24hs.
 
-            logger.info(f"📊 Cargados {len(result)} roles desde GROUP_ROLES")
-            return result
+        Args:
+            fresh: ignorar la cache de 10 min (recarga completa del cache de roles)
 
+        Returns:
+            Lista de dicts con chat_id, user_id, rol
+        """
+        if fresh:
+            self._local_cache.pop('group_roles:all', None)
+        try:
+            return list(self._group_roles_index()[0])
         except Exception as e:
             logger.error(f"Error obteniendo roles: {e}")
             return []
@@ -1478,36 +3351,11 @@ class SheetsManager:
         Returns:
             Rol del usuario: "vendedor", "supervisor", "observador"
         """
-        ws = self._get_ws("GROUP_ROLES")
-        if not ws:
+        if not self._get_ws("GROUP_ROLES"):
             return default
     
         try:
-            # Buscar por chat_id + user_id
-            all_vals = self._gspread_call(
-                lambda: ws.get_all_values(),
-                op='GROUP_ROLES:search',
-                cache_key=f'role:{chat_id}:{user_id}',
-                cache_ttl=300,
-                retries=2
-            )
-        
-            for row in all_vals[1:]:  # Skip header
-                if len(row) < 5:
-                    continue
-            
-                try:
-                    row_chat = int(float(str(row[0]).strip()))
-                    row_user = int(float(str(row[1]).strip()))
-                    row_rol = str(row[4]).strip().lower()
-                
-                    if row_chat == chat_id and row_user == user_id and row_rol:
-                        return row_rol
-                except (ValueError, IndexError):
-                    continue
-        
-            return default
-        
+            return self._group_roles_index()[1].get((chat_id, user_id)) or default
         except Exception as e:
             logger.error(f"Error buscando rol: {e}")
             return default
@@ -1520,7 +3368,8 @@ class SheetsManager:
         username: str,
         full_name: str,
         rol: str, 
-        asignado_por: str
+        asignado_por: str,
+        bump_epoch: bool = True
     ) -> bool:
         """
         Asigna o actualiza el rol de un usuario en un grupo.
@@ -1532,6 +3381,8 @@ class SheetsManager:
             full_name: Nombre completo
             rol: Rol a asignar ("vendedor", "supervisor", "observador")
             asignado_por: Quién asignó el rol
+            bump_epoch: Publicar la nueva época de roles (en lotes, False
+                y un bump_roles_epoch() al final)
     
         Returns:
             True si se guardó correctamente
@@ -1582,8 +3433,9 @@ class SheetsManager:
                 logger.info(f"✅ Rol asignado: {full_name} → {rol} en grupo {chat_id}")
         
             # Invalidar cache
-            self._local_cache.pop(f'role:{chat_id}:{user_id}', None)
             self._local_cache.pop('group_roles:all', None)
+            if bump_epoch:
+                self.bump_roles_epoch()
         
             return True
         
@@ -1682,10 +3534,12 @@ class SheetsManager:
                     continue
         
             if existing_row:
-                # Actualizar LAST_SEEN (columna F)
-                ws.update(f"F{existing_row}", [[timestamp]])
-                # Actualizar username/full_name por si cambió
-                ws.update(f"C{existing_row}:D{existing_row}", [[username, full_name]])
+                # LAST_SEEN (F) + username/full_name (C:D) por si cambió.
+                # No es crítico: se junta con otras interacciones en un solo batch.
+                self._defer_write("KNOWN_USERS", {
+                    f"C{existing_row}:D{existing_row}": [[username, full_name]],
+                    f"F{existing_row}": [[timestamp]],
+                })
             else:
                 # Agregar nuevo usuario (RAW para evitar que Sheets interprete IDs negativos)
                 data = [
@@ -1737,58 +3591,16 @@ class SheetsManager:
             if not ws:
                 return []
 
-            all_vals = self._gspread_call(
-                lambda: ws.get_all_values(),
-                op="STATS:client_history",
-                cache_key=f"client_history:{chat_id}:{nro_cliente}",
-                cache_ttl=180,
-                retries=2,
-            )
-
-            if not all_vals or len(all_vals) < 2:
-                return []
-
-            # Mapear columnas por nombre del header
-            header = all_vals[0]
-            col_map = {name.strip(): idx for idx, name in enumerate(header)}
-
-            col_fecha = col_map.get("FECHA")
-            col_cliente = col_map.get("CLIENTE")
-            col_tipo = col_map.get("TIPO_PDV")
-            col_estado = col_map.get("ESTADO_AUDITORIA")
-            col_chat = col_map.get("CHAT_ID_REF")
-
-            if col_fecha is None or col_cliente is None or col_chat is None:
+            rep = self._stats_replica_sync()
+            if not rep:
                 return []
-
-            nro_cliente_str = str(nro_cliente).strip()
-            chat_id_str = str(chat_id).strip()
+            tbl = rep.columnar()
+            rows = self._client_history.sync(tbl).lookup(str(nro_cliente).strip(), int(chat_id), limit)
 
             resultados = []
-            for row in all_vals[1:]:
-                if len(row) <= max(
-                    col_fecha, col_cliente, col_chat,
-                    col_tipo or 0, col_estado or 0
-                ):
-                    continue
-
-                if str(row[col_cliente]).strip() != nro_cliente_str:
-                    continue
-
-                # Comparar chat_id como int para evitar problemas de formato
-                try:
-                    row_chat_id = int(float(str(row[col_chat]).strip()))
-                except (ValueError, TypeError):
-                    continue
-
-                if row_chat_id != chat_id:
-                    continue
-
-                fecha_raw = str(row[col_fecha]).strip()
-                tipo_pdv = str(row[col_tipo]).strip() if col_tipo is not None else ""
-                estado = str(row[col_estado]).strip() if col_estado is not None else ""
-                if not estado:
-                    estado = "Pendiente"
+            for i in rows:
+                fecha_raw = tbl.strs("FECHA")[i]
+                estado = tbl.strs("ESTADO_AUDITORIA")[i] or "Pendiente"
 
                 # Extraer DD/MM para display
                 fecha_short = fecha_raw
@@ -1797,29 +3609,27 @@ class SheetsManager:
                     if len(partes) >= 2:
                         fecha_short = f"{partes[0]}/{partes[1]}"
 
-                # Parsear fecha completa para ordenar
-                dia, mes, anio = 0, 0, 0
-                if "/" in fecha_raw:
-                    partes = fecha_raw.split("/")
-                    try:
-                        dia = int(partes[0]) if len(partes) > 0 else 0
-                        mes = int(partes[1]) if len(partes) > 1 else 0
-                        anio = int(partes[2]) if len(partes) > 2 else 0
-                    except ValueError:
-                        pass
-
                 resultados.append({
                     "fecha": fecha_short,
-                    "tipo_pdv": tipo_pdv,
+                    "tipo_pdv": tbl.strs("TIPO_PDV")[i],
                     "estado": estado,
-                    "_fecha_full": (anio, mes, dia),
                 })
 
-            # Ordenar por fecha descendente (más nueva primero)
-            resultados.sort(key=lambda x: x["_fecha_full"], reverse=True)
+            # Completar con visitas de meses archivados (RESUMEN_CLIENTES)
+            if len(resultados) < limit:
+                self._apply_archive_summaries()
+                for fecha_raw, tipo, estado in self._client_history.archived(
+                    str(nro_cliente).strip(), int(chat_id), limit - len(resultados)
+                ):
+                    partes = fecha_raw.split("/")
+                    resultados.append({
+                        "fecha": f"{partes[0]}/{partes[1]}" if len(partes) >= 2 else fecha_raw,
+                        "tipo_pdv": tipo,
+                        "estado": estado or "Pendiente",
+                    })
 
-            # Retornar los primeros `limit` resultados
-            return resultados[:limit]
+            # Ya vienen ordenados por fecha descendente (más nueva primero)
+            return resultados
 
         except Exception as e:
             logger.debug(f"Error obteniendo historial de cliente: {e}")
@@ -1842,11 +3652,7 @@ class SheetsManager:
             ningún rol en ningún grupo o ante cualquier error.
         """
         try:
-            all_roles = self.get_all_group_roles()
-            for entry in all_roles:
-                if entry.get("user_id") == user_id:
-                    return entry.get("rol")
-            return None
+            return self._group_roles_index()[2].get(user_id)
         except Exception:
             return None
 
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+# file: single_flight.py
+"""
+Single-flight: si varios hilos piden lo mismo a la vez, solo el primero
+ejecuta la llamada; el resto espera y recibe el mismo resultado (o la misma
+excepción).
+
+Pensado para lecturas idénticas concurrentes contra Google (p.ej. /ranking en
+varios grupos a la vez, o el job de sync y un handler pidiendo lo mismo). No
+es una cache: terminada la llamada, la próxima vuelve a ejecutar.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Un seguidor no espera más que esto al líder (el líder tiene sus propios
+# timeouts/reintentos); vencido, ejecuta la llamada por su cuenta.
+SINGLE_FLIGHT_WAIT_SECONDS = 120.0
+
+
+class _Flight:
+    __slots__ = ("event", "result", "error", "followers")
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """
+    Uso:
+        value, shared = flights.do("STATS:get_all_values", lambda: ws.get_all_values())
+        # shared=True si el valor vino de la llamada de otro hilo
+    """
+
+    def __init__(self, wait_seconds: float = SINGLE_FLIGHT_WAIT_SECONDS) -> None:
+        self.wait_seconds = wait_seconds
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.followers += 1
+
+        if not leader:
+            if flight.event.wait(self.wait_seconds):
+                with self._lock:
+                    self.coalesced += 1
+                if flight.error is not None:
+                    raise flight.error
+                return flight.result, True
+            return fn(), False
+
+        try:
+            flight.result = fn()
+            return flight.result, False
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.event.set()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
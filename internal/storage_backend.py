@@ -0,0 +1,642 @@
+# -*- coding: utf-8 -*-
+# file: storage_backend.py
+"""
+Backends de almacenamiento para SheetsManager.
+
+SheetsManager trabaja contra un objeto "spreadsheet" (worksheets(),
+worksheet(title), add_worksheet(...)) y sus "worksheets" (el subconjunto de
+la API de gspread que usa el bot: get_all_values, get, batch_get, find,
+append_rows, batch_update, delete_rows, ...). Con gspread ese objeto es el
+Spreadsheet real; este módulo define la misma interfaz sobre SQLite para
+correr el bot contra una base local:
+
+    SHEETS_BACKEND=sqlite             (o google_cloud.storage_backend en config)
+    SHEETS_SQLITE_PATH=/ruta/bot.db   (default: <raíz>/data/bot_storage.sqlite3)
+
+Semántica de filas: igual que en Sheets (fila 1 = header, números de fila
+1-based, delete_rows/insert_row corren las filas siguientes), así el resto de
+SheetsManager (índices UUID, réplica de STATS) no cambia.
+
+SheetsMirror exporta periódicamente las pestañas de SQLite a un Spreadsheet
+de Google, que queda solo como superficie de reportes.
+"""
+
+import logging
+import os
+from abc import ABC, abstractmethod
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    from logger_config import get_logger
+    logger = get_logger(__name__)
+except ImportError:
+    logger = logging.getLogger("StorageBackend")
+
+try:
+    from rate_limiter import LANE_HOUSEKEEPING, api_lane
+except ImportError:
+    from src.rate_limiter import LANE_HOUSEKEEPING, api_lane
+
+
+STORAGE_BACKEND = (os.getenv("SHEETS_BACKEND") or "").strip().lower()
+SQLITE_DB_PATH = os.getenv(
+    "SHEETS_SQLITE_PATH",
+    str(Path(__file__).resolve().parent.parent / "data" / "bot_storage.sqlite3"),
+)
+SHEETS_MIRROR_INTERVAL_SECONDS = float(os.getenv("SHEETS_MIRROR_INTERVAL_SECONDS", "300"))
+SHEETS_MIRROR_TABS = tuple(
+    t.strip() for t in os.getenv(
+        "SHEETS_MIRROR_TABS", "STATS,RAW_LOGS,GROUP_ROLES,KNOWN_USERS,GROUPS,USERS"
+    ).split(",") if t.strip()
+)
+
+# Índices por pestaña (número de columna 1-based, según los headers de
+# SheetsManager._check_structure_safe).
+TAB_INDEXES: Dict[str, List[Tuple[int, ...]]] = {
+    "STATS": [(10,), (5, 13)],          # UUID_REF, (CLIENTE, CHAT_ID_REF)
+    "RAW_LOGS": [(1,)],                 # UUID
+    "GROUP_ROLES": [(1, 2)],            # (CHAT_ID, USER_ID)
+    "KNOWN_USERS": [(1, 2)],            # (CHAT_ID, USER_ID)
+    "COLA_IMAGENES": [(1,)],            # UUID_MSG
+    "USERS": [(1,)],                    # ID_TELEGRAM
+    "GROUPS": [(1,)],                   # CHAT_ID
+}
+
+_A1_CELL = re.compile(r"^([A-Za-z]*)(\d*)$")
+
+
+def col_to_index(letters: str) -> int:
+    n = 0
+    for c in letters.upper():
+        n = n * 26 + (ord(c) - 64)
+    return n
+
+
+def index_to_col(col: int) -> str:
+    letters = ""
+    while col > 0:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def parse_a1_range(a1: str) -> Tuple[int, int, Optional[int], Optional[int]]:
+    """
+    'B2:D5' → (2, 2, 5, 4). Extremos abiertos ('A2:C', 'H:H') devuelven None
+    en la fila/columna final. Ignora el prefijo de hoja ('STATS!A1').
+    """
+    a1 = a1.split("!")[-1].replace("$", "").strip()
+    start, _, end = a1.partition(":")
+    m1 = _A1_CELL.match(start)
+    m2 = _A1_CELL.match(end or start)
+    if not m1 or not m2:
+        raise ValueError(f"Rango A1 inválido: {a1}")
+    r1 = int(m1.group(2)) if m1.group(2) else 1
+    c1 = col_to_index(m1.group(1)) if m1.group(1) else 1
+    r2 = int(m2.group(2)) if m2.group(2) else None
+    c2 = col_to_index(m2.group(1)) if m2.group(1) else None
+    return r1, c1, r2, c2
+
+
+def _to_text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    return str(value)
+
+
+def numericise(value: str) -> Any:
+    """Mismo criterio que gspread.get_all_records: '12' → 12, '1.5' → 1.5."""
+    if value == "":
+        return value
+    if re.fullmatch(r"-?\d[\d,]*", value):
+        return int(value.replace(",", ""))
+    if re.fullmatch(r"-?\d*\.\d+", value):
+        return float(value)
+    return value
+
+
+def trim_values(rows: List[List[str]]) -> List[List[str]]:
+    """Quita celdas vacías al final de cada fila y filas vacías al final (como la API)."""
+    out = []
+    for r in rows:
+        r = list(r)
+        while r and r[-1] == "":
+            r.pop()
+        out.append(r)
+    while out and not out[-1]:
+        out.pop()
+    return out
+
+
+class Cell:
+    """Equivalente mínimo de gspread.Cell."""
+
+    def __init__(self, row: int, col: int, value: Optional[str]) -> None:
+        self.row = row
+        self.col = col
+        self.value = value
+
+    def __repr__(self) -> str:
+        return f"<Cell R{self.row}C{self.col} {self.value!r}>"
+
+
+# ============================================================================
+# INTERFAZ
+# ============================================================================
+
+class StorageBackend(ABC):
+    """
+    Interfaz "spreadsheet" que consume SheetsManager. Un gspread.Spreadsheet
+    la cumple tal cual (por duck typing); SqliteStorage la implementa sobre SQLite.
+    """
+
+    @abstractmethod
+    def worksheets(self) -> List[Any]:
+        ...
+
+    @abstractmethod
+    def worksheet(self, title: str) -> Any:
+        ...
+
+    @abstractmethod
+    def add_worksheet(self, title: str, rows: int = 100, cols: int = 26, index: Optional[int] = None) -> Any:
+        ...
+
+    def close(self) -> None:
+        pass
+
+
+# ============================================================================
+# SQLITE
+# ============================================================================
+
+class WorksheetNotFound(Exception):
+    pass
+
+
+class SqliteWorksheet:
+    """
+    Una pestaña guardada en la tabla `tbl` (columnas pos, c1..cN). `pos` es el
+    número de fila de Sheets; las filas totalmente vacías no se guardan.
+    """
+
+    def __init__(self, storage: "SqliteStorage", title: str, tbl: str, gid: int) -> None:
+        self._storage = storage
+        self.title = title
+        self.id = gid
+        self._tbl = tbl
+
+    # --- helpers ------------------------------------------------------------
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        return self._storage._db
+
+    @property
+    def _lock(self) -> threading.RLock:
+        return self._storage._lock
+
+    def _ncols(self) -> int:
+        return self._storage._ncols(self._tbl)
+
+    def _ensure_cols(self, n: int) -> None:
+        self._storage._ensure_cols(self._tbl, n)
+
+    def _max_pos(self) -> int:
+        row = self._db.execute(f'SELECT MAX(pos) FROM "{self._tbl}"').fetchone()
+        return int(row[0] or 0)
+
+    def _rows_between(self, r1: int, r2: Optional[int], c1: int, c2: Optional[int]) -> List[List[str]]:
+        ncols = self._ncols()
+        c2 = min(c2 or ncols, ncols)
+        r2 = r2 if r2 is not None else self._max_pos()
+        if c2 < c1 or r2 < r1:
+            return []
+        cols = ", ".join(f"c{i}" for i in range(c1, c2 + 1))
+        cur = self._db.execute(
+            f'SELECT pos, {cols} FROM "{self._tbl}" WHERE pos BETWEEN ? AND ? ORDER BY pos',
+            (r1, r2),
+        )
+        width = c2 - c1 + 1
+        out: List[List[str]] = []
+        expected = r1
+        for rec in cur:
+            pos = rec[0]
+            while expected < pos:
+                out.append([""] * width)
+                expected += 1
+            out.append([v or "" for v in rec[1:]])
+            expected = pos + 1
+        return trim_values(out)
+
+    def _touch(self) -> None:
+        self._storage._bump_version(self.title)
+
+    def _write_values(self, r1: int, c1: int, values: Sequence[Sequence[Any]]) -> None:
+        if not values:
+            return
+        width = max((len(r) for r in values), default=0)
+        if width == 0:
+            return
+        self._ensure_cols(c1 + width - 1)
+        for i, row in enumerate(values):
+            pos = r1 + i
+            cols = list(range(c1, c1 + len(row)))
+            if not cols:
+                continue
+            texts = [_to_text(v) for v in row]
+            exists = self._db.execute(
+                f'SELECT id FROM "{self._tbl}" WHERE pos = ? LIMIT 1', (pos,)
+            ).fetchone()
+            if exists:
+                sets = ", ".join(f"c{c} = ?" for c in cols)
+                self._db.execute(f'UPDATE "{self._tbl}" SET {sets} WHERE id = ?', (*texts, exists[0]))
+            elif any(texts):
+                names = ", ".join(f"c{c}" for c in cols)
+                marks = ", ".join("?" for _ in cols)
+                self._db.execute(
+                    f'INSERT INTO "{self._tbl}" (pos, {names}) VALUES (?, {marks})', (pos, *texts)
+                )
+            self._drop_if_empty(pos)
+
+    def _drop_if_empty(self, pos: int) -> None:
+        ncols = self._ncols()
+        empty = " AND ".join(f"COALESCE(c{i}, '') = ''" for i in range(1, ncols + 1))
+        self._db.execute(f'DELETE FROM "{self._tbl}" WHERE pos = ? AND {empty}', (pos,))
+
+    # --- lecturas -----------------------------------------------------------
+
+    @property
+    def row_count(self) -> int:
+        with self._lock:
+            return max(self._max_pos(), self._storage._grid_rows(self.title))
+
+    @property
+    def col_count(self) -> int:
+        with self._lock:
+            return self._ncols()
+
+    def get_all_values(self, **kwargs: Any) -> List[List[str]]:
+        with self._lock:
+            return self._rows_between(1, None, 1, None)
+
+    def get_all_records(self, head: int = 1, **kwargs: Any) -> List[Dict[str, Any]]:
+        values = self.get_all_values()
+        if len(values) < head:
+            return []
+        keys = values[head - 1]
+        out = []
+        for row in values[head:]:
+            row = row + [""] * (len(keys) - len(row))
+            out.append({k: numericise(row[i]) for i, k in enumerate(keys)})
+        return out
+
+    def get(self, range_name: Optional[str] = None, **kwargs: Any) -> List[List[str]]:
+        with self._lock:
+            if not range_name:
+                return self._rows_between(1, None, 1, None)
+            r1, c1, r2, c2 = parse_a1_range(range_name)
+            return self._rows_between(r1, r2, c1, c2)
+
+    def batch_get(self, ranges: Iterable[str], **kwargs: Any) -> List[List[List[str]]]:
+        with self._lock:
+            return [self.get(r) for r in ranges]
+
+    def row_values(self, row: int, **kwargs: Any) -> List[str]:
+        vals = self.get(f"A{row}:{index_to_col(max(self.col_count, 1))}{row}")
+        return vals[0] if vals else []
+
+    def col_values(self, col: int, **kwargs: Any) -> List[str]:
+        with self._lock:
+            if col > self._ncols():
+                return []
+            rows = self._rows_between(1, None, col, col)
+            out = [r[0] if r else "" for r in rows]
+            while out and out[-1] == "":
+                out.pop()
+            return out
+
+    def cell(self, row: int, col: int, **kwargs: Any) -> Cell:
+        vals = self.get(f"{index_to_col(col)}{row}")
+        value = vals[0][0] if vals and vals[0] else ""
+        return Cell(row, col, value or None)
+
+    def acell(self, label: str, **kwargs: Any) -> Cell:
+        r1, c1, _, _ = parse_a1_range(label)
+        return self.cell(r1, c1)
+
+    def find(self, query: Any, in_row: Optional[int] = None, in_column: Optional[int] = None, **kwargs: Any) -> Optional[Cell]:
+        query = _to_text(query)
+        with self._lock:
+            ncols = self._ncols()
+            cols = [in_column] if in_column else list(range(1, ncols + 1))
+            best: Optional[Cell] = None
+            for c in cols:
+                if c > ncols:
+                    continue
+                sql = f'SELECT pos FROM "{self._tbl}" WHERE c{c} = ?'
+                args: List[Any] = [query]
+                if in_row:
+                    sql += " AND pos = ?"
+                    args.append(in_row)
+                rec = self._db.execute(sql + " ORDER BY pos LIMIT 1", args).fetchone()
+                if rec and (best is None or rec[0] < best.row or (rec[0] == best.row and c < best.col)):
+                    best = Cell(rec[0], c, query)
+            return best
+
+    # --- escrituras ---------------------------------------------------------
+
+    def append_row(self, values: Sequence[Any], **kwargs: Any) -> Dict[str, Any]:
+        return self.append_rows([values], **kwargs)
+
+    def append_rows(self, values: Sequence[Sequence[Any]], **kwargs: Any) -> Dict[str, Any]:
+        with self._lock, self._db:
+            start = self._max_pos() + 1
+            self._write_values(start, 1, values)
+            self._touch()
+        end = start + len(values) - 1
+        width = max((len(r) for r in values), default=1)
+        return {
+            "updates": {
+                "updatedRange": f"{self.title}!A{start}:{index_to_col(width)}{end}",
+                "updatedRows": len(values),
+            }
+        }
+
+    def update_cell(self, row: int, col: int, value: Any) -> None:
+        with self._lock, self._db:
+            self._write_values(row, col, [[value]])
+            self._touch()
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        """Acepta las dos firmas de gspread: update(rango, valores) y update(valores, rango)."""
+        a = args[0] if len(args) > 0 else None
+        b = args[1] if len(args) > 1 else None
+        if isinstance(a, str) or (a is None and b is not None and not isinstance(b, str)):
+            range_name, values = a, b
+        else:
+            values, range_name = a, b
+        range_name = kwargs.get("range_name", range_name) or "A1"
+        values = kwargs.get("values", values) or []
+        r1, c1, _, _ = parse_a1_range(range_name)
+        with self._lock, self._db:
+            self._write_values(r1, c1, values)
+            self._touch()
+
+    def batch_update(self, data: Sequence[Dict[str, Any]], **kwargs: Any) -> None:
+        with self._lock, self._db:
+            for item in data:
+                r1, c1, _, _ = parse_a1_range(item["range"])
+                self._write_values(r1, c1, item.get("values") or [])
+            self._touch()
+
+    def insert_row(self, values: Sequence[Any], index: int = 1, **kwargs: Any) -> None:
+        with self._lock, self._db:
+            self._db.execute(f'UPDATE "{self._tbl}" SET pos = pos + 1 WHERE pos >= ?', (index,))
+            self._write_values(index, 1, [values])
+            self._touch()
+
+    def delete_rows(self, start_index: int, end_index: Optional[int] = None) -> None:
+        end_index = end_index or start_index
+        n = end_index - start_index + 1
+        with self._lock, self._db:
+            self._db.execute(
+                f'DELETE FROM "{self._tbl}" WHERE pos BETWEEN ? AND ?', (start_index, end_index)
+            )
+            self._db.execute(f'UPDATE "{self._tbl}" SET pos = pos - ? WHERE pos > ?', (n, end_index))
+            self._touch()
+
+    def clear(self) -> None:
+        with self._lock, self._db:
+            self._db.execute(f'DELETE FROM "{self._tbl}"')
+            self._touch()
+
+    def format(self, *args: Any, **kwargs: Any) -> None:
+        # Sin formato en SQLite
+        pass
+
+
+class SqliteStorage(StorageBackend):
+    """
+    Spreadsheet local en un archivo SQLite (modo WAL). Thread-safe: una única
+    conexión compartida protegida por un RLock.
+    """
+
+    def __init__(self, path: str = SQLITE_DB_PATH) -> None:
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA busy_timeout=5000")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS _tabs ("
+            " title TEXT PRIMARY KEY, tbl TEXT NOT NULL, gid INTEGER NOT NULL,"
+            " ncols INTEGER NOT NULL, nrows INTEGER NOT NULL, version INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._db.commit()
+        self._ws: Dict[str, SqliteWorksheet] = {}
+        logger.info(f"🗄️ Storage SQLite: {path}")
+
+    # --- metadatos ----------------------------------------------------------
+
+    def _tab_row(self, title: str) -> Optional[Tuple[str, str, int, int, int, int]]:
+        return self._db.execute(
+            "SELECT title, tbl, gid, ncols, nrows, version FROM _tabs WHERE UPPER(title) = UPPER(?)",
+            (title,),
+        ).fetchone()
+
+    def _ncols(self, tbl: str) -> int:
+        row = self._db.execute("SELECT ncols FROM _tabs WHERE tbl = ?", (tbl,)).fetchone()
+        return int(row[0]) if row else 0
+
+    def _grid_rows(self, title: str) -> int:
+        row = self._tab_row(title)
+        return int(row[4]) if row else 0
+
+    def _ensure_cols(self, tbl: str, n: int) -> None:
+        cur = self._ncols(tbl)
+        if n <= cur:
+            return
+        for i in range(cur + 1, n + 1):
+            self._db.execute(f'ALTER TABLE "{tbl}" ADD COLUMN c{i} TEXT')
+        self._db.execute("UPDATE _tabs SET ncols = ? WHERE tbl = ?", (n, tbl))
+
+    def _bump_version(self, title: str) -> None:
+        self._db.execute("UPDATE _tabs SET version = version + 1 WHERE title = ?", (title,))
+
+    def version(self, title: str) -> int:
+        """Contador de escrituras de la pestaña (lo usa SheetsMirror)."""
+        with self._lock:
+            row = self._tab_row(title)
+            return int(row[5]) if row else -1
+
+    def _worksheet_obj(self, row: Tuple[str, str, int, int, int, int]) -> SqliteWorksheet:
+        title, tbl, gid = row[0], row[1], row[2]
+        ws = self._ws.get(title)
+        if ws is None:
+            ws = SqliteWorksheet(self, title, tbl, gid)
+            self._ws[title] = ws
+        return ws
+
+    # --- interfaz spreadsheet -----------------------------------------------
+
+    def worksheets(self) -> List[SqliteWorksheet]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT title, tbl, gid, ncols, nrows, version FROM _tabs ORDER BY gid"
+            ).fetchall()
+            return [self._worksheet_obj(r) for r in rows]
+
+    def worksheet(self, title: str) -> SqliteWorksheet:
+        with self._lock:
+            row = self._tab_row(title)
+            if not row:
+                raise WorksheetNotFound(title)
+            return self._worksheet_obj(row)
+
+    def add_worksheet(self, title: str, rows: int = 100, cols: int = 26, index: Optional[int] = None) -> SqliteWorksheet:
+        with self._lock, self._db:
+            if self._tab_row(title):
+                raise ValueError(f'A sheet with the name "{title}" already exists.')
+            gid = int(self._db.execute("SELECT COALESCE(MAX(gid), 0) + 1 FROM _tabs").fetchone()[0])
+            tbl = f"t{gid}_" + re.sub(r"\W", "_", title.upper())
+            self._db.execute(
+                f'CREATE TABLE "{tbl}" (id INTEGER PRIMARY KEY AUTOINCREMENT, pos INTEGER NOT NULL)'
+            )
+            self._db.execute(f'CREATE INDEX "ix_{tbl}_pos" ON "{tbl}" (pos)')
+            self._db.execute(
+                "INSERT INTO _tabs (title, tbl, gid, ncols, nrows) VALUES (?, ?, ?, 0, ?)",
+                (title, tbl, gid, int(rows)),
+            )
+            indexes = TAB_INDEXES.get(title.upper(), [])
+            self._ensure_cols(tbl, max([int(cols)] + [max(ix) for ix in indexes]))
+            for ix in indexes:
+                name = f"ix_{tbl}_" + "_".join(f"c{c}" for c in ix)
+                cols_sql = ", ".join(f"c{c}" for c in ix)
+                self._db.execute(f'CREATE INDEX "{name}" ON "{tbl}" ({cols_sql})')
+            return self._worksheet_obj(self._tab_row(title))
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM _tabs").fetchone()[0] == 0
+
+    def import_from(self, spreadsheet: Any, tabs: Optional[Iterable[str]] = None) -> int:
+        """
+        Copia pestañas de otro spreadsheet (p.ej. el de Google) a SQLite.
+        Se usa para sembrar la base la primera vez. Devuelve filas copiadas.
+        """
+        wanted = {t.upper() for t in tabs} if tabs else None
+        total = 0
+        for src in spreadsheet.worksheets():
+            if wanted is not None and src.title.upper() not in wanted:
+                continue
+            values = src.get_all_values()
+            try:
+                dst = self.worksheet(src.title)
+                dst.clear()
+            except WorksheetNotFound:
+                width = max((len(r) for r in values), default=1)
+                dst = self.add_worksheet(src.title, rows=max(len(values), 100), cols=max(width, 1))
+            if values:
+                dst.update("A1", values)
+            total += len(values)
+            logger.info(f"📥 {src.title}: {len(values)} filas importadas a SQLite")
+        return total
+
+
+# ============================================================================
+# ESPEJO A GOOGLE SHEETS
+# ============================================================================
+
+class SheetsMirror:
+    """
+    Exporta pestañas de SqliteStorage a un Spreadsheet de Google (reportes).
+    Solo reescribe las pestañas que cambiaron desde la última exportación:
+    un clear + un batch_update por pestaña.
+    """
+
+    def __init__(
+        self,
+        source: SqliteStorage,
+        target: Any,
+        tabs: Iterable[str] = SHEETS_MIRROR_TABS,
+        interval_seconds: float = SHEETS_MIRROR_INTERVAL_SECONDS,
+    ) -> None:
+        self.source = source
+        self.target = target
+        self.tabs = tuple(tabs)
+        self.interval = interval_seconds
+        self._exported: Dict[str, int] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_export_at: Optional[float] = None
+        self.last_error: str = ""
+
+    def export_once(self) -> int:
+        """Exporta lo pendiente. Devuelve cuántas pestañas se escribieron."""
+        written = 0
+        for title in self.tabs:
+            version = self.source.version(title)
+            if version < 0 or self._exported.get(title) == version:
+                continue
+            values = self.source.worksheet(title).get_all_values()
+            try:
+                try:
+                    ws = self.target.worksheet(title)
+                except Exception:
+                    width = max((len(r) for r in values), default=1)
+                    ws = self.target.add_worksheet(title=title, rows=max(len(values) + 100, 200), cols=max(width, 1))
+                if values:
+                    # Primero se pisan los valores y después se recortan las filas
+                    # sobrantes: un corte a mitad no deja la pestaña vacía
+                    ws.batch_update([{"range": "A1", "values": values}], value_input_option="USER_ENTERED")
+                    if ws.row_count > len(values):
+                        ws.delete_rows(len(values) + 1, ws.row_count)
+                else:
+                    ws.clear()
+                self._exported[title] = version
+                written += 1
+                logger.info(f"📤 Espejo {title}: {len(values)} filas exportadas")
+            except Exception as e:
+                self.last_error = f"{title}: {e}"
+                logger.error(f"❌ Error exportando {title} a Google Sheets: {e}")
+        self.last_export_at = time.time()
+        return written
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                with api_lane(LANE_HOUSEKEEPING):
+                    self.export_once()
+            except Exception as e:
+                logger.error(f"❌ Error en espejo a Google Sheets: {e}")
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sheets-mirror", daemon=True)
+        self._thread.start()
+        logger.info(f"🪞 Espejo a Google Sheets cada {self.interval:.0f}s: {', '.join(self.tabs)}")
+
+    def stop(self, final_export: bool = True) -> None:
+        self._stop.set()
+        if final_export:
+            try:
+                self.export_once()
+            except Exception as e:
+                logger.error(f"❌ Error en exportación final del espejo: {e}")
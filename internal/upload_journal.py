@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+# file: upload_journal.py
+"""
+Journal local de las sesiones de subida de fotos (upload_sessions).
+
+Cada paso de una sesión se agrega como un evento en SQLite (append-only):
+fotos recibidas (file_id de Telegram), nro de cliente, tipo elegido, bytes
+guardados en disco, link de Drive, UUID de la fila y mensaje de evaluación.
+Si el proceso muere (/hardreset, os._exit, takeover, crash), al arrancar el
+host rearma las sesiones sin terminar con unfinished() y retoma desde el
+último paso registrado (ver host_bot.replay_upload_journal).
+
+Las sesiones terminadas (o descartadas) se compactan: se borran sus eventos y
+sus archivos del spool.
+
+record()/finish()/discard_spool() se llaman desde el event loop: solo
+encolan. Un único hilo escritor hace los commits de SQLite y los borrados
+del spool en el mismo orden en que se pidieron.
+"""
+
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    from logger_config import get_logger
+    logger = get_logger(__name__)
+except ImportError:
+    logger = logging.getLogger("UploadJournal")
+
+
+_DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+UPLOAD_JOURNAL_PATH = os.getenv("UPLOAD_JOURNAL_PATH", str(_DATA_DIR / "upload_journal.sqlite3"))
+# Bytes descargados de Telegram hasta que quedan en Drive
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR", str(_DATA_DIR / "upload_spool"))
+# Sesiones sin terminar más viejas que esto no se retoman (se descartan)
+UPLOAD_JOURNAL_MAX_AGE_SECONDS = float(os.getenv("UPLOAD_JOURNAL_MAX_AGE_SECONDS", str(3 * 86400)))
+
+# Eventos que cierran una sesión
+_TERMINAL = ("done", "closed")
+
+
+@dataclass
+class JournalSession:
+    """Estado de una sesión reconstruido a partir de sus eventos."""
+    session_id: str
+    user_id: int = 0
+    fields: Dict[str, Any] = field(default_factory=dict)  # chat_id, chat_title, vendor_name, ...
+    stage: str = ""           # WAITING_ID | WAITING_TYPE | PROCESSING
+    photos: List[Dict[str, Any]] = field(default_factory=list)
+    eval_msg: Optional[Dict[str, Any]] = None  # {"message_id", "uuid", "ref_msg"}
+    created_at: float = 0.0
+    updated_at: float = 0.0
+
+
+class UploadJournal:
+    """
+    Uso:
+        sid = journal.open_session(user_id, chat_id=..., vendor_name=...)
+        journal.record(sid, "photo", idx=0, file_id=..., message_id=...)
+        journal.record(sid, "client", nro_cliente="1234")
+        journal.record(sid, "processing", tipo_pdv="Kiosco")
+        path = journal.spool(sid, 0, data)          → "spooled"
+        journal.record(sid, "drive", idx=0, link=..., web=..., thumb=...)
+        journal.record(sid, "row", idx=0, uuid=...)
+        journal.record(sid, "eval_msg", message_id=..., uuid=..., ref_msg=...)
+        journal.finish(sid)                          → "done" + compactación
+    """
+
+    def __init__(self, path: Optional[str] = UPLOAD_JOURNAL_PATH,
+                 spool_dir: Optional[str] = UPLOAD_SPOOL_DIR) -> None:
+        self.path = path
+        self.spool_dir = Path(spool_dir) if spool_dir else None
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._disabled = not path
+        self._ops: "queue.Queue[Optional[Callable[[], None]]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+
+    # ============================================================================
+    # HILO ESCRITOR
+    # ============================================================================
+
+    def _submit(self, op: Callable[[], None]) -> None:
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_loop, name="upload-journal", daemon=True)
+                self._writer.start()
+        self._ops.put(op)
+
+    def _write_loop(self) -> None:
+        while True:
+            op = self._ops.get()
+            try:
+                if op is None:
+                    return
+                op()
+            except Exception as e:  # un op roto no frena a los siguientes
+                logger.warning(f"⚠️ Journal de subidas: {e}")
+            finally:
+                self._ops.task_done()
+
+    def flush(self) -> None:
+        """Espera a que el hilo escritor aplique todo lo encolado (no llamar desde el event loop)."""
+        if self._writer is not None:
+            self._ops.join()
+
+    # ============================================================================
+    # SQLITE
+    # ============================================================================
+
+    def _conn(self) -> Optional[sqlite3.Connection]:
+        if self._db is not None or self._disabled:
+            return self._db
+        try:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS events ("
+                " seq INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL,"
+                " kind TEXT NOT NULL, data TEXT NOT NULL, ts REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS events_session ON events (session_id)")
+            db.commit()
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"⚠️ Journal de subidas deshabilitado ({self.path}): {e}")
+            self._disabled = True
+            return None
+        self._db = db
+        return db
+
+    def record(self, session_id: Optional[str], kind: str, **data: Any) -> None:
+        """Encola un evento. Nunca levanta: un journal roto no frena las subidas."""
+        if not session_id:
+            return
+        payload = json.dumps(data, ensure_ascii=False, default=str)
+        ts = time.time()
+        self._submit(lambda: self._insert(session_id, kind, payload, ts))
+
+    def _insert(self, session_id: str, kind: str, payload: str, ts: float) -> None:
+        with self._lock:
+            db = self._conn()
+            if db is None:
+                return
+            try:
+                with db:
+                    db.execute(
+                        "INSERT INTO events (session_id, kind, data, ts) VALUES (?, ?, ?, ?)",
+                        (session_id, kind, payload, ts),
+                    )
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ No se pudo registrar {kind} en el journal: {e}")
+
+    def open_session(self, user_id: int, **fields: Any) -> str:
+        session_id = uuid.uuid4().hex
+        self.record(session_id, "open", user_id=user_id, **fields)
+        return session_id
+
+    def finish(self, session_id: Optional[str], outcome: str = "done") -> None:
+        """Cierra la sesión ("done" o "closed") y compacta sus eventos y spool."""
+        if not session_id:
+            return
+        self.record(session_id, outcome)
+        self._submit(lambda: self._compact(session_id))
+
+    def _compact(self, session_id: str) -> None:
+        with self._lock:
+            db = self._conn()
+            if db is not None:
+                try:
+                    with db:
+                        db.execute("DELETE FROM events WHERE session_id = ?", (session_id,))
+                except sqlite3.Error as e:
+                    logger.debug(f"Journal: no se pudo compactar {session_id}: {e}")
+        self._remove_spool(session_id)
+
+    # ============================================================================
+    # SPOOL (bytes de Telegram hasta que llegan a Drive)
+    # ============================================================================
+
+    def spool(self, session_id: Optional[str], idx: int, data: bytes) -> str:
+        """Guarda los bytes de la foto y registra "spooled". Devuelve la ruta ("" si no se pudo)."""
+        if not session_id or self.spool_dir is None or self._disabled:
+            return ""
+        path = self.spool_dir / f"{session_id}_{idx}.jpg"
+        tmp = path.with_suffix(".tmp")
+        try:
+            self.spool_dir.mkdir(parents=True, exist_ok=True)
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"⚠️ No se pudo guardar la foto en el spool: {e}")
+            return ""
+        self.record(session_id, "spooled", idx=idx, path=str(path), size=len(data))
+        return str(path)
+
+    @staticmethod
+    def read_spool(path: str) -> Optional[bytes]:
+        try:
+            return Path(path).read_bytes() if path else None
+        except OSError:
+            return None
+
+    def discard_spool(self, path: str) -> None:
+        """Borra un archivo del spool desde el hilo escritor (después de los eventos ya encolados)."""
+        if path:
+            self._submit(lambda: self.drop_spool(path))
+
+    @staticmethod
+    def drop_spool(path: str) -> None:
+        try:
+            if path:
+                Path(path).unlink()
+        except OSError:
+            pass
+
+    def _remove_spool(self, session_id: str) -> None:
+        if self.spool_dir is None or not self.spool_dir.exists():
+            return
+        for p in self.spool_dir.glob(f"{session_id}_*"):
+            self.drop_spool(str(p))
+
+    # ============================================================================
+    # REPLAY
+    # ============================================================================
+
+    def unfinished(self) -> List[JournalSession]:
+        """
+        Sesiones sin "done"/"closed", reconstruidas evento por evento (en orden
+        de llegada). Las más viejas que UPLOAD_JOURNAL_MAX_AGE_SECONDS se
+        descartan. Bloquea: correr fuera del event loop.
+        """
+        self.flush()
+        with self._lock:
+            db = self._conn()
+            if db is None:
+                return []
+            try:
+                rows = db.execute("SELECT session_id, kind, data, ts FROM events ORDER BY seq").fetchall()
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ No se pudo leer el journal de subidas: {e}")
+                return []
+
+        sessions: Dict[str, JournalSession] = {}
+        for session_id, kind, raw, ts in rows:
+            try:
+                data = json.loads(raw)
+            except ValueError:
+                continue
+            s = sessions.get(session_id)
+            if s is None:
+                s = sessions[session_id] = JournalSession(session_id, created_at=ts)
+            s.updated_at = ts
+            self._apply(s, kind, data)
+
+        now = time.time()
+        out: List[JournalSession] = []
+        for s in sessions.values():
+            if s.stage in _TERMINAL:
+                continue
+            if now - s.created_at > UPLOAD_JOURNAL_MAX_AGE_SECONDS or not s.photos:
+                logger.info(f"🧹 Journal: se descarta la sesión {s.session_id[:8]} (vieja o sin fotos)")
+                self.finish(s.session_id, "closed")
+                continue
+            out.append(s)
+        return out
+
+    @staticmethod
+    def _apply(s: JournalSession, kind: str, data: Dict[str, Any]) -> None:
+        if kind == "open":
+            s.user_id = int(data.pop("user_id", 0) or 0)
+            s.fields.update(data)
+            s.stage = "WAITING_ID"
+        elif kind == "photo":
+            idx = int(data.get("idx", len(s.photos)))
+            while len(s.photos) <= idx:
+                s.photos.append({})
+            s.photos[idx].update(file_id=data.get("file_id"), message_id=data.get("message_id"))
+        elif kind == "client":
+            s.fields["nro_cliente"] = data.get("nro_cliente")
+            s.stage = "WAITING_TYPE"
+        elif kind == "buttons":
+            s.fields["buttons_message_id"] = data.get("message_id")
+        elif kind == "processing":
+            s.fields["tipo_pdv"] = data.get("tipo_pdv")
+            s.stage = "PROCESSING"
+        elif kind in ("spooled", "drive", "row"):
+            idx = int(data.get("idx", -1))
+            if 0 <= idx < len(s.photos):
+                key = {"spooled": "spool_path", "drive": "drive_link", "row": "uuid"}[kind]
+                s.photos[idx][key] = data.get({"spooled": "path", "drive": "link", "row": "uuid"}[kind])
+                if kind == "drive":
+                    s.photos[idx].update(web_link=data.get("web", ""), thumb_link=data.get("thumb", ""))
+        elif kind == "eval_msg":
+            s.eval_msg = dict(data)
+        elif kind in _TERMINAL:
+            s.stage = kind
+
+    def close(self) -> None:
+        """Aplica lo encolado, frena el hilo escritor y cierra SQLite."""
+        with self._writer_lock:
+            writer, self._writer = self._writer, None
+        if writer is not None and writer.is_alive():
+            self._ops.put(None)
+            writer.join(timeout=10)
+        with self._lock:
+            if self._db is not None:
+                try:
+                    self._db.close()
+                except sqlite3.Error:
+                    pass
+                self._db = None
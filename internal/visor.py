@@ -143,6 +143,11 @@ def drive_file_id(url: str) -> Optional[str]:
     return None
 
 
+def _display_url(foto: Dict[str, Any]) -> str:
+    """Link a mostrar: la versión web (LINK_WEB) si existe, si no el original."""
+    return str(foto.get("url_web") or foto.get("url_foto") or "").strip()
+
+
 def drive_candidates(url: str) -> List[str]:
     u = (url or "").strip()
     fid = drive_file_id(u)
@@ -324,6 +329,8 @@ def group_into_exhibitions(photos: List[Dict[str, Any]]) -> List[Dict[str, Any]]
                 "row_num": photo.get("row_num"),
                 "uuid": photo.get("uuid"),
                 "url_foto": photo.get("url_foto", ""),
+                "url_web": photo.get("url_web", ""),
+                "url_thumb": photo.get("url_thumb", ""),
                 "fecha": photo.get("fecha", ""),
                 "hora": photo.get("hora", ""),
                 "msg_id_telegram": photo.get("msg_id_telegram"),
@@ -340,6 +347,8 @@ def group_into_exhibitions(photos: List[Dict[str, Any]]) -> List[Dict[str, Any]]
                     "row_num": other.get("row_num"),
                     "uuid": other.get("uuid"),
                     "url_foto": other.get("url_foto", ""),
+                    "url_web": other.get("url_web", ""),
+                    "url_thumb": other.get("url_thumb", ""),
                     "fecha": other.get("fecha", ""),
                     "hora": other.get("hora", ""),
                     "msg_id_telegram": other.get("msg_id_telegram"),
@@ -1082,7 +1091,7 @@ def main(page: ft.Page) -> None:
         status_icon = "✓" if is_seen else ""
         label = ft.Text(f"Foto {index + 1} {status_icon}", size=10, text_align=ft.TextAlign.CENTER)
 
-        raw_url = str(foto.get("url_foto") or "").strip()
+        raw_url = str(foto.get("url_thumb") or foto.get("url_foto") or "").strip()
         fid = drive_file_id(raw_url)
         thumb_src = (
             f"https://drive.google.com/thumbnail?id={fid}&sz=w{THUMBNAIL_SIZE}"
@@ -1221,7 +1230,7 @@ def main(page: ft.Page) -> None:
         nxt = manager.current_photo_index + PREFETCH_AHEAD
         if not (0 <= nxt < len(fotos)):
             return
-        nxt_url = str((fotos[nxt] or {}).get("url_foto") or "").strip()
+        nxt_url = _display_url(fotos[nxt] or {})
         if not nxt_url:
             return
         hit, _ = manager.get_cached_image(nxt_url)
@@ -1245,7 +1254,7 @@ def main(page: ft.Page) -> None:
         update_details()
         page.update()
 
-        link = str(photo.get("url_foto") or "").strip()
+        link = _display_url(photo)
         if link:
             hit, cached_src = manager.get_cached_image(link)
             if hit: